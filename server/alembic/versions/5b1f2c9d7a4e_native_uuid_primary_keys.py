@@ -0,0 +1,129 @@
+"""store primary and foreign keys as native uuid (16-byte blob on sqlite)
+
+Revision ID: 5b1f2c9d7a4e
+Revises: 290bce38f0a0
+Create Date: 2026-10-19 10:12:31.118734
+
+On PostgreSQL this runs in one of two ways:
+
+* If `scripts/migrate_uuid_keys.py` already prepared and backfilled the
+  `<column>_uuid` shadow columns online, the migration only swaps them in,
+  which takes brief locks regardless of table size.
+* Otherwise the columns are converted in place with `USING <column>::uuid`,
+  which rewrites the tables under an exclusive lock.
+
+SQLite databases are converted row by row; that is meant for local copies only.
+"""
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f2c9d7a4e'
+down_revision: Union[str, None] = '290bce38f0a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# every uuid column, parents before children
+KEY_COLUMNS = {
+    "users": ["id"],
+    "products": ["id"],
+    "cart_items": ["id", "user_id", "product_id"],
+}
+FOREIGN_KEYS = [
+    ("cart_items_user_id_fkey", "user_id", "users"),
+    ("cart_items_product_id_fkey", "product_id", "products"),
+]
+
+
+def _has_shadow_columns() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return all(
+        f"{column}_uuid" in {c["name"] for c in inspector.get_columns(table)}
+        for table, columns in KEY_COLUMNS.items()
+        for column in columns
+    )
+
+
+def _swap_in_shadow_columns() -> None:
+    """Replace each text column by its backfilled uuid shadow column."""
+    for table, columns in KEY_COLUMNS.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_uuid_sync ON {table}")
+        for column in columns:
+            op.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            op.execute(f"ALTER TABLE {table} RENAME COLUMN {column}_uuid TO {column}")
+            # instant thanks to the validated NOT NULL check added by the script
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_uuid_not_null")
+
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey "
+            f"PRIMARY KEY USING INDEX {table}_id_uuid_key"
+        )
+        op.execute(f"ALTER INDEX ix_{table}_id_uuid RENAME TO ix_{table}_id")
+
+    op.execute("DROP FUNCTION IF EXISTS sync_uuid_shadow_columns()")
+
+
+def _convert_sqlite(to_bytes: bool) -> None:
+    """Rewrite key values between text and 16-byte blobs."""
+    conn = op.get_bind()
+    for table, columns in KEY_COLUMNS.items():
+        rows = conn.execute(sa.text(f"SELECT rowid, {', '.join(columns)} FROM {table}")).fetchall()
+        for rowid, *values in rows:
+            converted = {
+                column: (uuid.UUID(str(value)).bytes if to_bytes else str(uuid.UUID(bytes=value)))
+                for column, value in zip(columns, values)
+                if value is not None
+            }
+            assignments = ", ".join(f"{column} = :{column}" for column in converted)
+            conn.execute(
+                sa.text(f"UPDATE {table} SET {assignments} WHERE rowid = :rowid"),
+                {**converted, "rowid": rowid},
+            )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        _convert_sqlite(to_bytes=True)
+        return
+
+    for name, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, "cart_items", type_="foreignkey")
+
+    if _has_shadow_columns():
+        _swap_in_shadow_columns()
+    else:
+        for table, columns in KEY_COLUMNS.items():
+            for column in columns:
+                op.alter_column(
+                    table,
+                    column,
+                    type_=postgresql.UUID(as_uuid=False),
+                    postgresql_using=f"{column}::uuid",
+                )
+
+    for name, column, parent in FOREIGN_KEYS:
+        op.create_foreign_key(name, "cart_items", parent, [column], ["id"])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        _convert_sqlite(to_bytes=False)
+        return
+
+    for name, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, "cart_items", type_="foreignkey")
+
+    for table, columns in KEY_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column, type_=sa.String(), postgresql_using=f"{column}::text"
+            )
+
+    for name, column, parent in FOREIGN_KEYS:
+        op.create_foreign_key(name, "cart_items", parent, [column], ["id"])
@@ -0,0 +1,52 @@
+"""index cart items by user and product, and products by price
+
+Revision ID: 8d3e6a1f4c2b
+Revises: 5b1f2c9d7a4e
+Create Date: 2026-10-19 15:40:12.503118
+
+Without these, loading a cart, checking whether a product is already in it
+and the price range filter scan whole tables; `tests/test_query_plans.py`
+checks that they are used. On PostgreSQL the indexes are built
+concurrently, so the tables stay writable while they are built.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3e6a1f4c2b'
+down_revision: Union[str, None] = '5b1f2c9d7a4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_cart_items_user_id_product_id", "cart_items", ["user_id", "product_id"]),
+    ("ix_cart_items_product_id", "cart_items", ["product_id"]),
+    ("ix_products_price", "products", ["price"]),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False)
+        return
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
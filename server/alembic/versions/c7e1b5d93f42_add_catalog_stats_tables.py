@@ -0,0 +1,62 @@
+"""add catalog_stats and product_cart_stats tables
+
+Revision ID: c7e1b5d93f42
+Revises: a4f2d8c61e93
+Create Date: 2026-10-19 21:40:18.205117
+
+Counters of the admin dashboard, kept up to date by the product and cart
+writes (see `app.core.stats`). The tables start empty: fill them from the
+existing rows with `python scripts/recompute_stats.py --fix` after upgrading.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.base.types import UUIDType
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1b5d93f42'
+down_revision: Union[str, None] = 'a4f2d8c61e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('catalog_stats',
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('products', sa.BigInteger(), nullable=False),
+    sa.Column('out_of_stock', sa.BigInteger(), nullable=False),
+    sa.Column('stock_units', sa.BigInteger(), nullable=False),
+    sa.Column('inventory_value', sa.DECIMAL(precision=20, scale=2), nullable=False),
+    sa.Column('cart_items', sa.BigInteger(), nullable=False),
+    sa.Column('cart_units', sa.BigInteger(), nullable=False),
+    sa.Column('active_carts', sa.BigInteger(), nullable=False),
+    sa.Column('id', UUIDType(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shard')
+    )
+    op.create_index(op.f('ix_catalog_stats_id'), 'catalog_stats', ['id'], unique=False)
+    op.create_table('product_cart_stats',
+    sa.Column('product_id', UUIDType(), nullable=False),
+    sa.Column('carts', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('id', UUIDType(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id')
+    )
+    op.create_index(op.f('ix_product_cart_stats_id'), 'product_cart_stats', ['id'], unique=False)
+    op.create_index(op.f('ix_product_cart_stats_carts'), 'product_cart_stats', ['carts'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_cart_stats_carts'), table_name='product_cart_stats')
+    op.drop_index(op.f('ix_product_cart_stats_id'), table_name='product_cart_stats')
+    op.drop_table('product_cart_stats')
+    op.drop_index(op.f('ix_catalog_stats_id'), table_name='catalog_stats')
+    op.drop_table('catalog_stats')
@@ -1,3 +1,6 @@
 from app.api.models.user import User  # noqa: F401
 from app.api.models.product import Product  # noqa: F401
-from app.api.models.cart_item import CartItem  # noqa: F401
\ No newline at end of file
+from app.api.models.cart_item import CartItem  # noqa: F401
+from app.api.models.idempotency_key import IdempotencyKey  # noqa: F401
+from app.api.models.outbox_event import OutboxEvent  # noqa: F401
+from app.api.models.catalog_stats import CatalogStatsShard, ProductCartStats  # noqa: F401
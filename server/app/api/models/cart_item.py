@@ -1,14 +1,18 @@
 """CartItem data model"""
 
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, Index, Integer, ForeignKey
 from app.core.base.model import BaseTableModel
+from app.core.base.types import UUIDType
 from sqlalchemy.orm import relationship
 
 class CartItem(BaseTableModel):
     __tablename__ = "cart_items"
+    # a user's cart, and one product in it, are looked up on every cart
+    # request; the product index serves the foreign key on product deletes
+    __table_args__ = (Index("ix_cart_items_user_id_product_id", "user_id", "product_id"),)
 
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    product_id = Column(String, ForeignKey("products.id"), nullable=False)
+    user_id = Column(UUIDType, ForeignKey("users.id"), nullable=False)
+    product_id = Column(UUIDType, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
 
     user = relationship("User", back_populates="cart_items")
@@ -0,0 +1,44 @@
+"""Catalog statistics data models"""
+
+from sqlalchemy import BigInteger, Column, DECIMAL, Integer
+from app.core.base.model import BaseTableModel
+from app.core.base.types import UUIDType
+
+
+class CatalogStatsShard(BaseTableModel):
+    """One of STATS_SHARDS rows whose column sums are the catalog totals of
+    the admin dashboard. Writes add their deltas to a random shard, so
+    concurrent transactions rarely wait on the same row lock; see
+    `app.core.stats`."""
+
+    __tablename__ = "catalog_stats"
+
+    shard = Column(Integer, nullable=False, unique=True)
+    products = Column(BigInteger, nullable=False, default=0)
+    out_of_stock = Column(BigInteger, nullable=False, default=0)
+    stock_units = Column(BigInteger, nullable=False, default=0)
+    # sum of price * stock over the catalog
+    inventory_value = Column(DECIMAL(20, 2), nullable=False, default=0)
+    cart_items = Column(BigInteger, nullable=False, default=0)
+    cart_units = Column(BigInteger, nullable=False, default=0)
+    # users with at least one cart item
+    active_carts = Column(BigInteger, nullable=False, default=0)
+
+    def __str__(self):
+        return "CatalogStatsShard: {}".format(self.shard)
+
+
+class ProductCartStats(BaseTableModel):
+    """How many carts hold a product, and how many units of it. No foreign
+    key: the row of a deleted product is dropped with the product's other
+    statistics, in the same transaction."""
+
+    __tablename__ = "product_cart_stats"
+
+    product_id = Column(UUIDType, nullable=False, unique=True)
+    # indexed for the most-carted products
+    carts = Column(Integer, nullable=False, default=0, index=True)
+    units = Column(Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return "ProductCartStats: Product: {}, Carts: {}".format(self.product_id, self.carts)
@@ -0,0 +1,27 @@
+"""IdempotencyKey data model"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String, UniqueConstraint
+from app.core.base.model import BaseTableModel
+from app.core.base.types import UUIDType
+
+
+class IdempotencyKey(BaseTableModel):
+    """The response of a write request sent with an `Idempotency-Key`
+    header, replayed when the client retries with the same key. Stored in the
+    transaction of the write itself, so a key exists exactly when its write
+    was committed."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),)
+
+    user_id = Column(UUIDType, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    # hash of the method, path and parameters: a key cannot be reused for another request
+    fingerprint = Column(String(64), nullable=False)
+    # empty while the request that claimed the key runs
+    status_code = Column(Integer)
+    response_body = Column(LargeBinary)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __str__(self):
+        return "IdempotencyKey: User ID: {}, Key: {}, Status: {}".format(self.user_id, self.key, self.status_code)
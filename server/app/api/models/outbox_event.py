@@ -0,0 +1,32 @@
+"""OutboxEvent data model"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, text
+from app.core.base.model import BaseTableModel
+
+
+class OutboxEvent(BaseTableModel):
+    """A product or cart change waiting to be delivered to the outbox sinks.
+    Written in the transaction of the change itself, so an event exists
+    exactly when its change was committed; see `app.core.outbox`."""
+
+    __tablename__ = "outbox_events"
+    # the relay reads undelivered events in id (uuid7, so write) order
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending",
+            "id",
+            postgresql_where=text("delivered_at IS NULL"),
+            sqlite_where=text("delivered_at IS NULL"),
+        ),
+    )
+
+    topic = Column(String(64), nullable=False)
+    # id of the changed product, cart item or user
+    key = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # set instead of deleting the row when OUTBOX_DELETE_DELIVERED is off
+    delivered_at = Column(DateTime(timezone=True))
+
+    def __str__(self):
+        return "OutboxEvent: Topic: {}, Key: {}, Attempts: {}".format(self.topic, self.key, self.attempts)
@@ -11,8 +11,8 @@ class Product(BaseTableModel):
     name = Column(String, unique=True, nullable=False)
     description = Column(String, nullable=True)
 
-    # 2 decimal places
-    price = Column(DECIMAL(10, 2), nullable=False)
+    # 2 decimal places; indexed for the price range filter
+    price = Column(DECIMAL(10, 2), nullable=False, index=True)
 
     stock = Column(Integer, nullable=False, default=0)
 
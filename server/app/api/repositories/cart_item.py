@@ -1,9 +1,11 @@
+from sqlalchemy import Row, delete, lambda_stmt, select
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
 from app.core.base.repository import BaseRepository
 from app.api.models.cart_item import CartItem
 from app.api.models.product import Product
+from app.db.routing import read_only
 
 
 class CartItemRepository(BaseRepository[CartItem]):
@@ -18,6 +20,7 @@ class CartItemRepository(BaseRepository[CartItem]):
     def __init__(self, db: Session):
         super().__init__(CartItem, db)  
 
+    @read_only
     def get_user_cart_items(self, user_id: str) -> List[tuple[CartItem, Product]]:
         """Get all cart items for a specific user by user_id.
 
@@ -27,13 +30,16 @@ class CartItemRepository(BaseRepository[CartItem]):
         Returns:
             List[Tuple[CartItem, Product]]: A list of tuples containing CartItem and associated Product objects.
         """
-        return (
-            self.db.query(self.model, Product)
-            .filter(self.model.user_id == user_id)
-            .join(Product, Product.id == self.model.product_id)
-            .all()
-        )
-
+        model = self.model
+        return self.db.execute(
+            lambda_stmt(
+                lambda: select(model, Product)
+                .join(Product, Product.id == model.product_id)
+                .where(model.user_id == user_id)
+            )
+        ).all()
+
+    @read_only
     def get_product_from_user_cart(
         self, user_id: str, product_id: str
     ) -> Optional[CartItem]:
@@ -49,12 +55,20 @@ class CartItemRepository(BaseRepository[CartItem]):
         Returns:
             CartItem | None: The cart item if found, None otherwise.
         """
+        model = self.model
         return (
-            self.db.query(self.model)
-            .filter(self.model.user_id == user_id, self.model.product_id == product_id)
+            self.db.execute(
+                lambda_stmt(
+                    lambda: select(model)
+                    .where(model.user_id == user_id, model.product_id == product_id)
+                    .limit(1)
+                )
+            )
+            .scalars()
             .first()
         )
 
+    @read_only
     def get_user_cart_item(self, item_id: str, user_id: str) -> Optional[CartItem]:
         """Get a cart item by its ID and verify it belongs to the user.
 
@@ -68,9 +82,16 @@ class CartItemRepository(BaseRepository[CartItem]):
         Returns:
         Optional[CartItem]: The cart item if found and belongs to user, None otherwise.
         """
+        model = self.model
         return (
-            self.db.query(self.model)
-            .filter(self.model.id == item_id, self.model.user_id == user_id)
+            self.db.execute(
+                lambda_stmt(
+                    lambda: select(model)
+                    .where(model.id == item_id, model.user_id == user_id)
+                    .limit(1)
+                )
+            )
+            .scalars()
             .first()
         )
 
@@ -92,16 +113,47 @@ class CartItemRepository(BaseRepository[CartItem]):
         cart_item = self.get_user_cart_item(item_id, user_id)
         if cart_item:
             cart_item.quantity = quantity
-            self.db.commit()
-            self.db.refresh(cart_item)
+            self.save()
             return cart_item
         return None
 
-    def delete_cart_items_by_user_id(self, user_id: str) -> None:
+    def delete_cart_items_by_user_id(self, user_id: str) -> List[Row]:
         """Delete all cart items for a specific user by user_id.
 
         Args:
             user_id (str): The ID of the user.
+
+        Returns:
+            List[Row]: (product_id, quantity) of the deleted cart items.
+        """
+        model = self.model
+        deleted = self.db.execute(
+            lambda_stmt(
+                lambda: delete(model)
+                .where(model.user_id == user_id)
+                .returning(model.product_id, model.quantity)
+            )
+        ).all()
+        self.save()
+        return deleted
+
+    def delete_cart_items_by_product_ids(self, product_ids: List[str]) -> List[Row]:
+        """Delete the cart items of the given products from every cart.
+
+        Args:
+            product_ids (List[str]): The IDs of the products.
+
+        Returns:
+            List[Row]: (id, user_id, product_id, quantity) of the deleted cart items.
         """
-        self.db.query(self.model).filter(self.model.user_id == user_id).delete()
-        self.db.commit()
+        model = self.model
+        deleted = []
+        for chunk in self.chunks(product_ids):
+            deleted += self.db.execute(
+                delete(model)
+                .where(self.match_any(model.product_id, chunk))
+                .returning(model.id, model.user_id, model.product_id, model.quantity),
+                execution_options={"synchronize_session": False},
+            ).all()
+        self.save()
+        return deleted
@@ -0,0 +1,217 @@
+from decimal import Decimal
+
+from sqlalchemy import Row, case, delete, distinct, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from typing import Dict, List, Mapping
+
+from app.core.base.repository import BaseRepository
+from app.api.models.cart_item import CartItem
+from app.api.models.catalog_stats import CatalogStatsShard, ProductCartStats
+from app.api.models.product import Product
+from app.db.routing import read_only
+
+TOTALS = (
+    "products",
+    "out_of_stock",
+    "stock_units",
+    "inventory_value",
+    "cart_items",
+    "cart_units",
+    "active_carts",
+)
+
+
+class CatalogStatsRepository(BaseRepository[CatalogStatsShard]):
+    """
+    Repository of the admin dashboard counters: the catalog_stats shards
+    and the per-product product_cart_stats rows.
+    Increments are upserts (`INSERT ... ON CONFLICT DO UPDATE`), so a shard
+    or product row is created by the first write that touches it.
+    Attributes:
+        model (Type[CatalogStatsShard]): The SQLAlchemy CatalogStatsShard model class.
+        db (Session): The SQLAlchemy session.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(CatalogStatsShard, db)
+
+    def _insert(self, table):
+        if self.db.get_bind().dialect.name == "postgresql":
+            return postgresql.insert(table)
+        return sqlite.insert(table)
+
+    # incremental updates, written by `app.core.stats` before a commit
+
+    def add_totals(self, shard: int, totals: Mapping[str, object]) -> None:
+        """Add deltas to the totals of one shard.
+
+        Args:
+            shard (int): The shard, from 0 to STATS_SHARDS - 1.
+            totals (Mapping[str, object]): Delta of each column in TOTALS.
+        """
+        table = self.model.__table__
+        stmt = self._insert(table).values(shard=shard, **totals)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in totals}
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.shard], set_={**set_, "updated_at": func.now()}
+            )
+        )
+
+    def add_product_carts(self, deltas: Mapping[str, tuple[int, int]]) -> None:
+        """Add deltas to the cart counters of products.
+
+        Args:
+            deltas (Mapping[str, tuple[int, int]]): Product id to (carts, units) deltas.
+        """
+        table = ProductCartStats.__table__
+        rows = [
+            {"product_id": product_id, "carts": carts, "units": units}
+            for product_id, (carts, units) in deltas.items()
+            if carts or units
+        ]
+        if not rows:
+            return
+        stmt = self._insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.product_id],
+            set_={
+                "carts": table.c.carts + stmt.excluded.carts,
+                "units": table.c.units + stmt.excluded.units,
+                "updated_at": func.now(),
+            },
+        )
+        # one executemany statement for all the products of the transaction
+        self.db.execute(stmt, rows)
+
+    def delete_product_carts(self, product_ids: List[str]) -> None:
+        """Drop the cart counters of deleted products."""
+        model = ProductCartStats
+        for chunk in self.chunks(product_ids):
+            self.db.execute(delete(model).where(self.match_any(model.product_id, chunk)))
+
+    def active_cart_change(self, cart_rows: Mapping[str, int]) -> int:
+        """How many carts became non-empty minus how many became empty.
+
+        Counts the cart items of the users now, in the transaction that
+        added or removed them; the count before is that less the change.
+
+        Args:
+            cart_rows (Mapping[str, int]): User id to cart items added
+                minus removed in the transaction.
+
+        Returns:
+            int: The change of the number of active carts.
+        """
+        users = [user_id for user_id, rows in cart_rows.items() if rows]
+        counts: Dict[str, int] = {}
+        for chunk in self.chunks(users):
+            counts.update(
+                self.db.execute(
+                    select(CartItem.user_id, func.count())
+                    .where(self.match_any(CartItem.user_id, chunk))
+                    .group_by(CartItem.user_id)
+                ).all()
+            )
+        change = 0
+        for user_id in users:
+            after = counts.get(user_id, 0)
+            change += (after > 0) - (after - cart_rows[user_id] > 0)
+        return change
+
+    # reads of the dashboard: at most STATS_SHARDS rows and an index range
+
+    @read_only
+    def totals(self) -> Dict[str, object]:
+        """The sums of every shard, by column name."""
+        table = self.model.__table__
+        row = self.db.execute(
+            select(*(func.coalesce(func.sum(table.c[name]), 0).label(name) for name in TOTALS))
+        ).one()
+        return row._asdict()
+
+    @read_only
+    def most_carted(self, limit: int) -> List[Row]:
+        """The products in the most carts.
+
+        Returns:
+            List[Row]: (product_id, name, carts, units), most carts first.
+        """
+        model = ProductCartStats
+        return self.db.execute(
+            select(model.product_id, Product.name, model.carts, model.units)
+            .join(Product, Product.id == model.product_id)
+            .where(model.carts > 0)
+            .order_by(model.carts.desc(), model.units.desc())
+            .limit(limit)
+        ).all()
+
+    # full recomputation from the products and cart items
+
+    def lock(self) -> None:
+        """Hold back the increments of other transactions until this one
+        ends, so a recomputation neither misses nor double counts them.
+        SQLite serializes writers anyway."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(
+                text("LOCK TABLE catalog_stats, product_cart_stats IN SHARE ROW EXCLUSIVE MODE")
+            )
+
+    def compute_totals(self) -> Dict[str, object]:
+        """The totals computed from scratch, scanning every product and cart item."""
+        products = self.db.execute(
+            select(
+                func.count(Product.id).label("products"),
+                func.coalesce(func.sum(case((Product.stock <= 0, 1), else_=0)), 0).label("out_of_stock"),
+                func.coalesce(func.sum(Product.stock), 0).label("stock_units"),
+                func.coalesce(func.sum(Product.price * Product.stock), 0).label("inventory_value"),
+            )
+        ).one()
+        carts = self.db.execute(
+            select(
+                func.count(CartItem.id).label("cart_items"),
+                func.coalesce(func.sum(CartItem.quantity), 0).label("cart_units"),
+                func.count(distinct(CartItem.user_id)).label("active_carts"),
+            )
+        ).one()
+        totals = {**products._asdict(), **carts._asdict()}
+        # SQLite sums the prices as floats
+        totals["inventory_value"] = Decimal(str(totals["inventory_value"])).quantize(Decimal("0.01"))
+        return totals
+
+    def compute_product_carts(self) -> Dict[str, tuple[int, int]]:
+        """Product id to (carts, units), computed from the cart items."""
+        return {
+            product_id: (carts, units)
+            for product_id, carts, units in self.db.execute(
+                select(CartItem.product_id, func.count(), func.sum(CartItem.quantity)).group_by(
+                    CartItem.product_id
+                )
+            )
+        }
+
+    def stored_product_carts(self) -> Dict[str, tuple[int, int]]:
+        """Product id to (carts, units), as maintained; products at zero are left out."""
+        model = ProductCartStats
+        return {
+            product_id: (carts, units)
+            for product_id, carts, units in self.db.execute(
+                select(model.product_id, model.carts, model.units).where(
+                    (model.carts != 0) | (model.units != 0)
+                )
+            )
+        }
+
+    def replace(self, totals: Mapping[str, object], product_carts: Mapping[str, tuple[int, int]]) -> None:
+        """Replace every counter with recomputed values, the totals in shard 0."""
+        self.db.execute(delete(self.model))
+        self.db.execute(insert(self.model.__table__).values(shard=0, **totals))
+        self.db.execute(delete(ProductCartStats))
+        rows = [
+            {"product_id": product_id, "carts": carts, "units": units}
+            for product_id, (carts, units) in product_carts.items()
+        ]
+        for chunk in self.chunks(rows):
+            self.db.execute(insert(ProductCartStats.__table__), chunk)
+        self.save()
@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+from app.core.base.repository import BaseRepository
+from app.api.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKey]):
+    """
+    IdempotencyKey repository class for the stored responses of keyed writes.
+    This class inherits from BaseRepository and provides specific methods for IdempotencyKey model.
+    Attributes:
+        model (Type[IdempotencyKey]): The SQLAlchemy IdempotencyKey model class.
+        db (Session): The SQLAlchemy session.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(IdempotencyKey, db)
+
+    def get_by_key(self, user_id: str, key: str) -> Optional[IdempotencyKey]:
+        """Get the record of a user's key, expired or not.
+
+        Reads go to the primary: a retry must see the record its first
+        attempt just committed.
+
+        Args:
+            user_id (str): The ID of the user who sent the key.
+            key (str): The Idempotency-Key header value.
+
+        Returns:
+            Optional[IdempotencyKey]: The record if found, None otherwise.
+        """
+        model = self.model
+        return (
+            self.db.execute(
+                lambda_stmt(
+                    lambda: select(model).where(model.user_id == user_id, model.key == key).limit(1)
+                )
+            )
+            .scalars()
+            .first()
+        )
+
+    def delete_expired(self, now: datetime) -> int:
+        """Delete every record that expired before `now`.
+
+        Returns:
+            int: The number of records deleted.
+        """
+        model = self.model
+        deleted = self.db.execute(
+            lambda_stmt(lambda: delete(model).where(model.expires_at <= now))
+        ).rowcount
+        self.save()
+        return deleted
@@ -1,7 +1,9 @@
+from sqlalchemy import Row, delete, lambda_stmt, select, update
 from sqlalchemy.orm import Session, Query
-from typing import Optional
+from typing import List, Optional, Sequence
 from app.core.base.repository import BaseRepository
 from app.api.models.product import Product
+from app.db.routing import read_only
 
 
 class ProductRepository(BaseRepository[Product]):
@@ -16,6 +18,7 @@ class ProductRepository(BaseRepository[Product]):
     def __init__(self, db: Session):
         super().__init__(Product, db)
 
+    @read_only
     def get_by_name(self, name: str) -> Product:
         """Get a product by name.
 
@@ -25,7 +28,14 @@ class ProductRepository(BaseRepository[Product]):
         Returns:
             Product: The product object if found, None otherwise.
         """
-        return self.db.query(self.model).filter(self.model.name == name).first()
+        model = self.model
+        return (
+            self.db.execute(
+                lambda_stmt(lambda: select(model).where(model.name == name).limit(1))
+            )
+            .scalars()
+            .first()
+        )
 
     # filter methods that can be chained together in the service layer
 
@@ -86,4 +96,89 @@ class ProductRepository(BaseRepository[Product]):
 
         return query.filter(
             self.model.price >= min_price, self.model.price <= max_price
-        )
\ No newline at end of file
+        )
+
+    # set-based bulk writes: one statement per BULK_CHUNK_SIZE products, with
+    # the ORM's session synchronization off; objects already loaded in the
+    # session are not updated
+
+    def adjust_stock(self, deltas: Sequence[tuple[str, int]]) -> List[Row]:
+        """Add a delta to the stock of each product, unless that would make
+        it negative.
+
+        Args:
+            deltas (Sequence[tuple[str, int]]): (product id, stock delta) pairs.
+
+        Returns:
+            List[Row]: (id, name, stock, price) of the updated products.
+        """
+        model = self.model
+        updated = []
+        for chunk in self.chunks(deltas):
+            change = self.values_table("change", (model.id, model.stock), chunk)
+            updated += self.db.execute(
+                update(model)
+                .values(stock=model.stock + change.c.stock)
+                .where(model.id == change.c.id, model.stock + change.c.stock >= 0)
+                .returning(model.id, model.name, model.stock, model.price),
+                execution_options={"synchronize_session": False},
+            ).all()
+        self.save()
+        return updated
+
+    def set_prices(self, prices: Sequence[tuple[str, object]]) -> List[Row]:
+        """Set the price of each product.
+
+        Args:
+            prices (Sequence[tuple[str, Decimal]]): (product id, price) pairs.
+
+        Returns:
+            List[Row]: (id, name, stock, price) of the updated products.
+        """
+        model = self.model
+        updated = []
+        for chunk in self.chunks(prices):
+            change = self.values_table("change", (model.id, model.price), chunk)
+            updated += self.db.execute(
+                update(model)
+                .values(price=change.c.price)
+                .where(model.id == change.c.id)
+                .returning(model.id, model.name, model.stock, model.price),
+                execution_options={"synchronize_session": False},
+            ).all()
+        self.save()
+        return updated
+
+    def delete_many(self, ids: Sequence[str]) -> List[Row]:
+        """Delete products by id; their cart items must be deleted first.
+
+        Returns:
+            List[Row]: (id, stock, price) of the deleted products.
+        """
+        model = self.model
+        deleted = []
+        for chunk in self.chunks(ids):
+            deleted += self.db.execute(
+                delete(model)
+                .where(self.match_any(model.id, chunk))
+                .returning(model.id, model.stock, model.price),
+                execution_options={"synchronize_session": False},
+            ).all()
+        self.save()
+        return deleted
+
+    def existing_ids(self, ids: Sequence[str]) -> set[str]:
+        """The ids among `ids` that belong to a product."""
+        model = self.model
+        found = set()
+        for chunk in self.chunks(ids):
+            found.update(self.db.execute(select(model.id).where(self.match_any(model.id, chunk))).scalars())
+        return found
+
+    def get_prices(self, ids: Sequence[str]) -> dict[str, object]:
+        """Product id to price, for the products among `ids`."""
+        model = self.model
+        prices = {}
+        for chunk in self.chunks(ids):
+            prices.update(self.db.execute(select(model.id, model.price).where(self.match_any(model.id, chunk))).all())
+        return prices
@@ -1,6 +1,8 @@
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 from app.core.base.repository import BaseRepository
 from app.api.models.user import User
+from app.db.routing import read_only
 
 
 class UserRepository(BaseRepository[User]):
@@ -15,6 +17,7 @@ class UserRepository(BaseRepository[User]):
     def __init__(self, db: Session):
         super().__init__(User, db)
     
+    @read_only
     def get_by_email(self, email: str) -> User:
         """Get a user by email.
 
@@ -24,4 +27,11 @@ class UserRepository(BaseRepository[User]):
         Returns:
             User: The user object if found, None otherwise.
         """
-        return self.db.query(self.model).filter(self.model.email == email).first()
+        model = self.model
+        return (
+            self.db.execute(
+                lambda_stmt(lambda: select(model).where(model.email == email).limit(1))
+            )
+            .scalars()
+            .first()
+        )
@@ -6,6 +6,8 @@ from app.api.models.cart_item import CartItem
 from app.api.models.user import User
 from app.api.repositories.cart_item import CartItemRepository
 from app.api.repositories.product import ProductRepository
+from app.core import stats
+from app.core.outbox import events as outbox
 from app.utils.logger import logger
 
 
@@ -16,6 +18,7 @@ class CartItemService:
     """
 
     def __init__(self, db: Session):
+        self.db = db
         self.repository = CartItemRepository(db)
         self.product_repository = ProductRepository(db)
 
@@ -35,7 +38,7 @@ class CartItemService:
         # Check if the product exists
         product = self.product_repository.get(schema.product_id)
         if not product:
-            logger.error(f"Product with ID {schema.product_id} not found.")
+            logger.info("Product with ID %s not found.", schema.product_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
             )
@@ -63,12 +66,17 @@ class CartItemService:
                     detail=f"Quantity exceeds available stock. Available: {product.stock}, In cart: {cart_item.quantity}, Requested: {schema.quantity}",
                 )
             
+            before = cart_item.quantity
             cart_item.quantity = new_quantity
             try:
-                logger.info(f"Updating cart item quantity for user {current_user.id}, product {schema.product_id}")
+                logger.info("Updating cart item quantity for user %s, product %s", current_user.id, schema.product_id)
                 self.repository.update(cart_item)
+                outbox.record_event(
+                    self.db, outbox.CART_ITEM_UPDATED, cart_item.id, outbox.cart_item_payload(cart_item)
+                )
+                stats.cart_item_changed(self.db, current_user.id, product.id, before, new_quantity)
             except Exception as e:
-                logger.error(f"Error updating cart item: {e}")
+                logger.error("Error updating cart item: %s", e)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Error updating cart item",
@@ -87,10 +95,14 @@ class CartItemService:
                 quantity=schema.quantity,
             )
             try:
-                logger.info(f"Adding item to cart for user {current_user.id}, product {schema.product_id}")
+                logger.info("Adding item to cart for user %s, product %s", current_user.id, schema.product_id)
                 cart_item = self.repository.create(cart_item)
+                outbox.record_event(
+                    self.db, outbox.CART_ITEM_ADDED, cart_item.id, outbox.cart_item_payload(cart_item)
+                )
+                stats.cart_item_changed(self.db, current_user.id, product.id, 0, cart_item.quantity)
             except Exception as e:
-                logger.error(f"Error creating cart item: {e}")
+                logger.error("Error creating cart item: %s", e)
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Error adding item to cart",
@@ -146,7 +158,7 @@ class CartItemService:
                 )
             )
 
-        logger.info(f"Retrieved cart for user {current_user.id} with {len(cart_items_response)} items")
+        logger.info("Retrieved cart for user %s with %s items", current_user.id, len(cart_items_response))
         return schemas.CartItemListResponseData(
             total_cart_value=total_cart_value, 
             items_count=len(cart_items_response),
@@ -170,7 +182,7 @@ class CartItemService:
         # Verify cart item exists and belongs to user
         cart_item = self.repository.get_user_cart_item(item_id, current_user.id)
         if not cart_item:
-            logger.error(f"Cart item {item_id} not found for user {current_user.id}")
+            logger.info("Cart item %s not found for user %s", item_id, current_user.id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Cart item not found or does not belong to you"
@@ -186,7 +198,7 @@ class CartItemService:
         # Check if product still exists
         product = self.product_repository.get(cart_item.product_id)
         if not product:
-            logger.error(f"Product {cart_item.product_id} not found")
+            logger.info("Product %s not found", cart_item.product_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Product not found"
@@ -200,14 +212,19 @@ class CartItemService:
             )
 
         # Update quantity
+        before = cart_item.quantity
         if schema.quantity is not None:
             cart_item.quantity = schema.quantity
         
         try:
-            logger.info(f"Updating cart item {item_id} for user {current_user.id}")
+            logger.info("Updating cart item %s for user %s", item_id, current_user.id)
             self.repository.update(cart_item)
+            outbox.record_event(
+                self.db, outbox.CART_ITEM_UPDATED, cart_item.id, outbox.cart_item_payload(cart_item)
+            )
+            stats.cart_item_changed(self.db, current_user.id, product.id, before, cart_item.quantity)
         except Exception as e:
-            logger.error(f"Error updating cart item: {e}")
+            logger.error("Error updating cart item: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error updating cart item",
@@ -240,17 +257,21 @@ class CartItemService:
         # Verify cart item exists and belongs to user
         cart_item = self.repository.get_user_cart_item(item_id, current_user.id)
         if not cart_item:
-            logger.error(f"Cart item {item_id} not found for user {current_user.id}")
+            logger.info("Cart item %s not found for user %s", item_id, current_user.id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Cart item not found or does not belong to you"
             )
 
         try:
-            logger.info(f"Removing cart item {item_id} for user {current_user.id}")
+            logger.info("Removing cart item %s for user %s", item_id, current_user.id)
             self.repository.delete(item_id)
+            outbox.record_event(
+                self.db, outbox.CART_ITEM_REMOVED, cart_item.id, outbox.cart_item_payload(cart_item)
+            )
+            stats.cart_item_changed(self.db, current_user.id, cart_item.product_id, cart_item.quantity, 0)
         except Exception as e:
-            logger.error(f"Error removing cart item: {e}")
+            logger.error("Error removing cart item: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error removing cart item",
@@ -264,10 +285,14 @@ class CartItemService:
             current_user (User): The currently authenticated user.
         """
         try:
-            logger.info(f"Clearing cart for user {current_user.id}")
-            self.repository.delete_cart_items_by_user_id(current_user.id)
+            logger.info("Clearing cart for user %s", current_user.id)
+            removed = self.repository.delete_cart_items_by_user_id(current_user.id)
+            outbox.record_event(
+                self.db, outbox.CART_CLEARED, current_user.id, {"user_id": str(current_user.id)}
+            )
+            stats.cart_cleared(self.db, current_user.id, removed)
         except Exception as e:
-            logger.error(f"Error clearing cart: {e}")
+            logger.error("Error clearing cart: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error clearing cart",
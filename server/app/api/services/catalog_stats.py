@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Session
+
+from app.api.repositories.catalog_stats import TOTALS, CatalogStatsRepository
+from app.api.v1.admin import schemas
+from app.utils.logger import logger
+
+
+class CatalogStatsService:
+    """
+    Catalog statistics service class for the admin dashboard.
+    This class reads the incrementally maintained counters (see
+    `app.core.stats`) and checks or rebuilds them against a full scan.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = CatalogStatsRepository(db)
+
+    def get_stats(self, top: int) -> schemas.CatalogStatsData:
+        """Returns the dashboard statistics
+        Args:
+            top (int): How many of the most-carted products to list
+        Returns:
+            schemas.CatalogStatsData: The maintained totals and top products
+        """
+        totals = self.repository.totals()
+        return schemas.CatalogStatsData(
+            **totals,
+            most_carted=[
+                schemas.MostCartedProductData(id=row.product_id, name=row.name, carts=row.carts, units=row.units)
+                for row in self.repository.most_carted(top)
+            ],
+        )
+
+    def find_drift(self) -> tuple[dict[str, tuple], dict[str, tuple]]:
+        """Compares the maintained counters with a full recomputation
+        Returns:
+            tuple[dict[str, tuple], dict[str, tuple]]: (maintained, actual)
+                of every total that differs, and of every product whose
+                (carts, units) differ
+        """
+        maintained, actual = self.repository.totals(), self.repository.compute_totals()
+        totals = {
+            name: (maintained[name], actual[name])
+            for name in TOTALS
+            # to the cent: SQLite keeps the inventory value as a float
+            if round(float(maintained[name]), 2) != round(float(actual[name]), 2)
+        }
+        stored, computed = self.repository.stored_product_carts(), self.repository.compute_product_carts()
+        products = {
+            product_id: (stored.get(product_id, (0, 0)), computed.get(product_id, (0, 0)))
+            for product_id in stored.keys() | computed.keys()
+            if stored.get(product_id, (0, 0)) != computed.get(product_id, (0, 0))
+        }
+        return totals, products
+
+    def rebuild(self) -> None:
+        """Replaces every counter with values recomputed from the products
+        and cart items, holding back concurrent increments meanwhile"""
+        self.repository.lock()
+        totals = self.repository.compute_totals()
+        product_carts = self.repository.compute_product_carts()
+        self.repository.replace(totals, product_carts)
+        logger.info("Rebuilt catalog statistics of %s products", totals["products"])
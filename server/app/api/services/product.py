@@ -1,10 +1,18 @@
+import uuid
+
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.v1.products import schemas
 from app.core.base.schema import PaginatedResponse
 from app.api.models.product import Product
+from app.api.repositories.cart_item import CartItemRepository
 from app.api.repositories.product import ProductRepository
+from app.core import stats
+from app.core.cache.response import response_cache
+from app.core.config import settings
+from app.core.outbox import events as outbox
+from app.core.stream.hub import product_event, stream_hub
 from app.utils.logger import logger
 
 
@@ -15,6 +23,7 @@ class ProductService:
     """
 
     def __init__(self, db: Session):
+        self.db = db
         self.repository = ProductRepository(db)
 
     def create_product(self, schema: schemas.ProductCreateRequest) -> Product:
@@ -34,10 +43,15 @@ class ProductService:
         product = Product(**schema.model_dump())
 
         try:
-            logger.info(f"Creating product with name: {product.name}")
-            return self.repository.create(product)
+            logger.info("Creating product with name: %s", product.name)
+            product = self.repository.create(product)
+            outbox.record_event(self.db, outbox.PRODUCT_CREATED, product.id, outbox.product_payload(product))
+            stats.product_changed(self.db, product.id, None, (product.stock, product.price))
+            # any list page may now include the new product
+            response_cache.invalidate_after_commit(self.db, ["products"])
+            return product
         except Exception as e:
-            logger.error(f"Error creating product: {e}")
+            logger.error("Error creating product: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error creating product",
@@ -84,14 +98,23 @@ class ProductService:
                 )
 
         # update only the fields that are set in the schema
+        before = (product.stock, product.price)
         for field, value in schema.model_dump(exclude_unset=True).items():
             setattr(product, field, value)
 
         try:
-            logger.info(f"Updating product with id: {product.id}")
-            return self.repository.update(product)
+            logger.info("Updating product with id: %s", product.id)
+            product = self.repository.update(product)
+            outbox.record_event(self.db, outbox.PRODUCT_UPDATED, product.id, outbox.product_payload(product))
+            stats.product_changed(self.db, product.id, before, (product.stock, product.price))
+            response_cache.invalidate_after_commit(
+                self.db, ["products", f"product:{product.id}"]
+            )
+            if (product.stock, product.price) != before:
+                stream_hub.publish_after_commit(self.db, [product_event(product)])
+            return product
         except Exception as e:
-            logger.error(f"Error updating product: {e}")
+            logger.error("Error updating product: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error updating product",
@@ -112,15 +135,131 @@ class ProductService:
             )
 
         try:
-            logger.info(f"Deleting product with id: {product.id}")
+            logger.info("Deleting product with id: %s", product.id)
             self.repository.delete(product_id)
+            outbox.record_event(self.db, outbox.PRODUCT_DELETED, product.id, {"id": product.id})
+            stats.product_changed(self.db, product.id, (product.stock, product.price), None)
+            response_cache.invalidate_after_commit(
+                self.db, ["products", f"product:{product.id}"]
+            )
+            stream_hub.publish_after_commit(self.db, [product_event(product, deleted=True)])
         except Exception as e:
-            logger.error(f"Error deleting product: {e}")
+            logger.error("Error deleting product: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Error deleting product",
             )
 
+    def bulk_update_products(
+        self, operations: list[schemas.BulkProductOperation]
+    ) -> schemas.BulkProductData:
+        """Applies stock deltas, price changes and deletions to many products
+        Each kind of change is one set-based statement (per chunk of
+        products) instead of a request per product. A product may appear
+        once per call; stock deltas that would make the stock negative are
+        skipped. Cart items of deleted products are removed in the same
+        transaction.
+        Args:
+            operations (list[schemas.BulkProductOperation]): The changes
+        Returns:
+            schemas.BulkProductData: The outcome for every operation, in order
+        """
+        results = []
+        # results not yet known to have been applied, by action and product id
+        pending: dict[str, dict[str, schemas.BulkProductResult]] = {"stock": {}, "price": {}, "delete": {}}
+        changes: dict[str, list] = {"stock": [], "price": [], "delete": []}
+        for operation in operations:
+            result = schemas.BulkProductResult(id=operation.id, action=operation.action, status="not_found")
+            results.append(result)
+            try:
+                product_id = str(uuid.UUID(operation.id))
+            except ValueError:
+                continue
+            if any(product_id in group for group in pending.values()):
+                result.status = "duplicate"
+                continue
+            pending[operation.action][product_id] = result
+            if operation.delete:
+                changes["delete"].append(product_id)
+            elif operation.stock_delta is not None:
+                changes["stock"].append((product_id, operation.stock_delta))
+            else:
+                changes["price"].append((product_id, operation.price))
+
+        try:
+            logger.info(
+                "Bulk product changes: %s stock, %s price, %s delete",
+                len(changes["stock"]),
+                len(changes["price"]),
+                len(changes["delete"]),
+            )
+            updated = []
+            if changes["stock"]:
+                deltas = dict(changes["stock"])
+                for row in self._apply_updates(self.repository.adjust_stock(changes["stock"]), pending["stock"]):
+                    stats.product_changed(self.db, row.id, (row.stock - deltas[row.id], row.price), (row.stock, row.price))
+                    updated.append(row)
+                # the rest either does not exist or has too little stock
+                for product_id in self.repository.existing_ids(list(pending["stock"])):
+                    pending["stock"][product_id].status = "insufficient_stock"
+            if changes["price"]:
+                # the dashboard statistics need the prices being replaced
+                old_prices = {}
+                if settings.STATS_ENABLED:
+                    old_prices = self.repository.get_prices([product_id for product_id, _ in changes["price"]])
+                repriced = self._apply_updates(self.repository.set_prices(changes["price"]), pending["price"])
+                for row in repriced:
+                    if row.id in old_prices:
+                        stats.product_changed(self.db, row.id, (row.stock, old_prices[row.id]), (row.stock, row.price))
+                updated += repriced
+
+            deleted, removed_cart_items = [], []
+            if changes["delete"]:
+                removed_cart_items = CartItemRepository(self.db).delete_cart_items_by_product_ids(changes["delete"])
+                deleted = self.repository.delete_many(changes["delete"])
+                for row in deleted:
+                    pending["delete"][row.id].status = "deleted"
+                    stats.product_changed(self.db, row.id, (row.stock, row.price), None)
+                for item in removed_cart_items:
+                    stats.cart_item_changed(self.db, item.user_id, item.product_id, item.quantity, 0)
+
+            outbox.record_events(
+                self.db,
+                [(outbox.PRODUCT_UPDATED, row.id, outbox.product_payload(row)) for row in updated]
+                + [(outbox.PRODUCT_DELETED, row.id, {"id": row.id}) for row in deleted]
+                + [
+                    (outbox.CART_ITEM_REMOVED, item.id, outbox.cart_item_payload(item))
+                    for item in removed_cart_items
+                ],
+            )
+        except Exception as e:
+            logger.error("Error applying bulk product changes: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error applying bulk product changes",
+            )
+
+        if updated or deleted:
+            response_cache.invalidate_after_commit(
+                self.db, ["products", *(f"product:{row.id}" for row in updated + deleted)]
+            )
+            stream_hub.publish_after_commit(
+                self.db,
+                [product_event(row) for row in updated] + [product_event(row, deleted=True) for row in deleted],
+            )
+        applied = len(updated) + len(deleted)
+        return schemas.BulkProductData(applied=applied, failed=len(results) - applied, results=results)
+
+    @staticmethod
+    def _apply_updates(rows, pending: dict[str, schemas.BulkProductResult]) -> list:
+        """Record the updated rows in their results and drop them from `pending`."""
+        for row in rows:
+            result = pending.pop(row.id)
+            result.status = "updated"
+            result.stock = row.stock
+            result.price = float(row.price)
+        return rows
+
     def list_products(
         self,
         name: str | None = None,
@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import Annotated
+
+from app.api.models.user import User
+from app.api.services.catalog_stats import CatalogStatsService
+from app.api.v1.admin import schemas
+from app.core.config import settings
+from app.core.dependencies.security import get_current_admin_user
+from app.core.profiling import profile_store
+from app.db.database import engine, get_read_db
+from app.db.instrumentation import statement_cache_stats
+from app.db.slow_query import slow_query_log
+
+admin = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@admin.get(
+    path="/slow-queries",
+    response_model=schemas.SlowQueryListResponse,
+    status_code=status.HTTP_200_OK,
+    summary="List the slowest SQL statement shapes",
+    description="Return the statement shapes with the highest total time recorded by the slow query log of this worker.",
+)
+def list_slow_queries(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    return schemas.SlowQueryListResponse(
+        status_code=status.HTTP_200_OK,
+        message="Slow queries retrieved successfully",
+        data=[
+            schemas.SlowQueryData(**shape.to_dict())
+            for shape in slow_query_log.top(limit)
+        ],
+    )
+
+
+@admin.get(
+    path="/statement-cache",
+    response_model=schemas.StatementCacheResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get compiled statement cache statistics",
+    description="Return the hit rate of SQLAlchemy's compiled statement cache and its current size for this worker.",
+)
+def get_statement_cache_stats(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+):
+    compiled_cache = engine._compiled_cache
+    return schemas.StatementCacheResponse(
+        status_code=status.HTTP_200_OK,
+        message="Statement cache statistics retrieved successfully",
+        data=schemas.StatementCacheData(
+            hits=statement_cache_stats.hits,
+            misses=statement_cache_stats.misses,
+            uncached=statement_cache_stats.uncached,
+            hit_rate=statement_cache_stats.hit_rate,
+            cache_size=len(compiled_cache) if compiled_cache is not None else 0,
+            cache_capacity=compiled_cache.capacity if compiled_cache is not None else 0,
+        ),
+    )
+
+
+@admin.get(
+    path="/profiles",
+    response_model=schemas.ProfileListResponse,
+    status_code=status.HTTP_200_OK,
+    summary="List recent request profiles",
+    description="Return the request profiles recorded by this worker, newest first. Profile a request by sending it with the `X-Profile: 1` header or `?profile=1`.",
+)
+def list_profiles(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+):
+    return schemas.ProfileListResponse(
+        status_code=status.HTTP_200_OK,
+        message="Profiles retrieved successfully",
+        data=[schemas.ProfileData(**profile.to_dict()) for profile in profile_store.recent()],
+    )
+
+
+@admin.get(
+    path="/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get a request profile as collapsed stacks",
+    description="Return one profile in collapsed stack format, ready for flamegraph.pl or speedscope.",
+)
+def get_profile(
+    profile_id: str,
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found!",
+        )
+    return PlainTextResponse(profile.collapsed())
+
+
+@admin.get(
+    path="/stats",
+    response_model=schemas.CatalogStatsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get the catalog and cart statistics",
+    description="Return the inventory value, stock and cart totals and the most-carted products. The counters are maintained by every product and cart write, so the read costs the same for any catalog size.",
+)
+def get_catalog_stats(
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+    db: Annotated[Session, Depends(get_read_db)],
+    top: Annotated[int, Query(ge=1, le=100)] = settings.STATS_TOP_PRODUCTS,
+):
+    return schemas.CatalogStatsResponse(
+        status_code=status.HTTP_200_OK,
+        message="Catalog statistics retrieved successfully",
+        data=CatalogStatsService(db).get_stats(top),
+    )
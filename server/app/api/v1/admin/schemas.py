@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.core.base.schema import BaseResponseModel
+
+
+class SlowQueryData(BaseModel):
+    sql: str
+    params_shape: str
+    origin: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    last_seen: Optional[datetime] = None
+    plan: Optional[str] = None
+
+
+class SlowQueryListResponse(BaseResponseModel):
+    data: list[SlowQueryData]
+
+
+class StatementCacheData(BaseModel):
+    hits: int
+    misses: int
+    uncached: int
+    hit_rate: float
+    cache_size: int
+    cache_capacity: int
+
+
+class StatementCacheResponse(BaseResponseModel):
+    data: StatementCacheData
+
+
+class ProfileData(BaseModel):
+    id: str
+    method: str
+    path: str
+    duration_ms: float
+    samples: int
+    created_at: datetime
+
+
+class ProfileListResponse(BaseResponseModel):
+    data: list[ProfileData]
+
+
+class MostCartedProductData(BaseModel):
+    id: str
+    name: str
+    carts: int
+    units: int
+
+
+class CatalogStatsData(BaseModel):
+    products: int
+    out_of_stock: int
+    stock_units: int
+    inventory_value: float
+    cart_items: int
+    cart_units: int
+    active_carts: int
+    most_carted: list[MostCartedProductData]
+
+
+class CatalogStatsResponse(BaseResponseModel):
+    data: CatalogStatsData
@@ -4,6 +4,7 @@ from typing import Annotated
 
 from app.db.database import get_db
 from app.utils import jwt_helpers
+from app.core.dependencies.rate_limit import rate_limit
 from app.core.dependencies.security import get_current_user
 
 from app.api.v1.auth import schemas
@@ -60,6 +61,8 @@ def register(
     summary="Login a registered user",
     description="This endpoint retrieves the jwt tokens for a registered user",
     tags=["Authentication"],
+    # password hashing makes login the most expensive endpoint to abuse
+    dependencies=[Depends(rate_limit("login"))],
 )
 def login(
     schema: schemas.LoginRequest,
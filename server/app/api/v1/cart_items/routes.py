@@ -6,7 +6,9 @@ from app.api.v1.cart_items import schemas
 from app.api.services.cart_item import CartItemService
 from app.api.models.user import User
 from app.db.database import get_db
+from app.core.dependencies.rate_limit import rate_limit
 from app.core.dependencies.security import get_current_user
+from app.core.idempotency import idempotency_keys
 
 cart = APIRouter(prefix="/cart", tags=["Cart"])
 
@@ -17,7 +19,9 @@ cart = APIRouter(prefix="/cart", tags=["Cart"])
     status_code=status.HTTP_201_CREATED,
     summary="Add item to cart",
     description="Add a product to the user's cart. If the product already exists in the cart, the quantity will be incremented.",
+    dependencies=[Depends(rate_limit("cart_write"))],
 )
+@idempotency_keys.idempotent()
 def add_item_to_cart(
     schema: schemas.CartItemCreateRequest,
     db: Annotated[Session, Depends(get_db)],
@@ -39,6 +43,7 @@ def add_item_to_cart(
     description="Retrieve all items in the user's cart with product details and total cart value.",
 )
 def get_user_cart(
+    # clients read the cart right after changing it, so it stays on the primary
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
@@ -56,7 +61,9 @@ def get_user_cart(
     status_code=status.HTTP_200_OK,
     summary="Update cart item quantity",
     description="Update the quantity of a specific cart item. Validates stock availability.",
+    dependencies=[Depends(rate_limit("cart_write"))],
 )
+@idempotency_keys.idempotent()
 def update_cart_item(
     item_id: str,
     schema: schemas.CartItemUpdateRequest,
@@ -76,7 +83,9 @@ def update_cart_item(
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Remove item from cart",
     description="Remove a specific item from the user's cart.",
+    dependencies=[Depends(rate_limit("cart_write"))],
 )
+@idempotency_keys.idempotent()
 def remove_cart_item(
     item_id: str,
     db: Annotated[Session, Depends(get_db)],
@@ -91,7 +100,9 @@ def remove_cart_item(
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Clear cart",
     description="Remove all items from the user's cart.",
+    dependencies=[Depends(rate_limit("cart_write"))],
 )
+@idempotency_keys.idempotent()
 def clear_user_cart(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
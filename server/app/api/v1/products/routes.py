@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Annotated
 
 from app.api.models.user import User
 from app.api.services.product import ProductService
 from app.api.v1.products import schemas
-from app.core.dependencies.security import get_current_admin_user, get_current_user
-from app.db.database import get_db
+from app.core.cache.response import response_cache
+from app.core.config import settings
+from app.core.dependencies.security import get_current_admin_user, get_current_user, get_current_user_id
+from app.core.idempotency import idempotency_keys
+from app.core.stream.hub import stream_hub
+from app.db.database import get_db, get_read_db
 
 products = APIRouter(prefix="/products")
 
@@ -18,8 +23,9 @@ products = APIRouter(prefix="/products")
     description="Retrieve a list of products with optional filters such as name, price range, and availability.",
     tags=["Products"],
 )
+@response_cache.cached(tags=["products"])
 def list_products(
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[User, Depends(get_current_user)],
     q: str | None = None,
     min_price: float | None = None,
@@ -45,6 +51,36 @@ def list_products(
     )
 
 
+@products.get(
+    path="/stream",
+    response_class=StreamingResponse,
+    summary="Stream live stock and price changes",
+    description=(
+        "Server-sent events: `product` events carry a product's id, stock and price (or `deleted`) "
+        "after every change; `resync` asks the client to refetch the catalog. `ids` limits the "
+        "stream to a comma-separated list of products."
+    ),
+    tags=["Products"],
+)
+async def stream_products(
+    user_id: Annotated[str, Depends(get_current_user_id)],
+    ids: str | None = None,
+):
+    if not settings.STREAM_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if stream_hub.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams, retry later",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        stream_hub.events(ids.split(",") if ids else None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @products.post(
     path="",
     response_model=schemas.ProductResponse,
@@ -53,6 +89,7 @@ def list_products(
     description="This endpoint creates a new product.",
     tags=["Admin"],
 )
+@idempotency_keys.idempotent()
 def create_product(
     schema: schemas.ProductCreateRequest,
     db: Annotated[Session, Depends(get_db)],
@@ -67,6 +104,33 @@ def create_product(
     )
 
 
+@products.post(
+    path="/bulk",
+    response_model=schemas.BulkProductResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Change many products at once",
+    description=(
+        f"Apply up to {schemas.BULK_MAX_OPERATIONS} operations, each setting exactly one of `stock_delta`, "
+        "`price` or `delete` for a product id, in one transaction. Every operation gets an outcome: "
+        "`updated`, `deleted`, `not_found`, `insufficient_stock` (the stock would become negative) or "
+        "`duplicate` (the product already appears earlier in the request)."
+    ),
+    tags=["Admin"],
+)
+@idempotency_keys.idempotent()
+def bulk_update_products(
+    schema: schemas.BulkProductRequest,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_admin_user)],
+):
+    service = ProductService(db=db)
+    return schemas.BulkProductResponse(
+        status_code=status.HTTP_200_OK,
+        message="Bulk product changes applied",
+        data=service.bulk_update_products(schema.operations),
+    )
+
+
 @products.get(
     path="/{product_id}",
     response_model=schemas.ProductResponse,
@@ -75,9 +139,10 @@ def create_product(
     description="Retrieve a single product by its unique ID.",
     tags=["Products"],
 )
+@response_cache.cached(tags=["product:{product_id}"])
 def retrieve_product(
     product_id: str,
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[Session, Depends(get_read_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     service = ProductService(db=db)
@@ -97,6 +162,7 @@ def retrieve_product(
     description="Update an existing product by its ID.",
     tags=["Admin"],
 )
+@idempotency_keys.idempotent()
 def update_product(
     product_id: str,
     schema: schemas.ProductUpdateRequest,
@@ -119,6 +185,7 @@ def update_product(
     description="Delete a product by its ID.",
     tags=["Admin"],
 )
+@idempotency_keys.idempotent()
 def delete_product(
     product_id: str,
     db: Annotated[Session, Depends(get_db)],
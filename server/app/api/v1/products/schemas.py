@@ -1,7 +1,7 @@
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 from decimal import Decimal
 
-from pydantic import BaseModel, StringConstraints
+from pydantic import BaseModel, Field, StringConstraints, model_validator
 from app.core.base.schema import BaseResponseModel, PaginatedResponseModel
 
 
@@ -33,3 +33,49 @@ class ProductResponse(BaseResponseModel):
 
 class ProductListResponse(PaginatedResponseModel):
     pass
+
+
+# bulk changes
+BULK_MAX_OPERATIONS = 50_000
+
+
+class BulkProductOperation(BaseModel):
+    id: str
+    stock_delta: Optional[int] = None
+    price: Optional[Decimal] = Field(default=None, ge=0, max_digits=10, decimal_places=2)
+    delete: bool = False
+
+    @model_validator(mode="after")
+    def check_one_change(self):
+        changes = (self.stock_delta is not None) + (self.price is not None) + self.delete
+        if changes != 1:
+            raise ValueError("Set exactly one of stock_delta, price or delete")
+        return self
+
+    @property
+    def action(self) -> str:
+        if self.delete:
+            return "delete"
+        return "stock" if self.stock_delta is not None else "price"
+
+
+class BulkProductRequest(BaseModel):
+    operations: list[BulkProductOperation] = Field(min_length=1, max_length=BULK_MAX_OPERATIONS)
+
+
+class BulkProductResult(BaseModel):
+    id: str
+    action: Literal["stock", "price", "delete"]
+    status: Literal["updated", "deleted", "not_found", "insufficient_stock", "duplicate"]
+    stock: Optional[int] = None
+    price: Optional[float] = None
+
+
+class BulkProductData(BaseModel):
+    applied: int
+    failed: int
+    results: list[BulkProductResult]
+
+
+class BulkProductResponse(BaseResponseModel):
+    data: BulkProductData
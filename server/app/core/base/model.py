@@ -2,15 +2,20 @@
 
 from uuid_extensions import uuid7
 from app.db.database import Base
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, DateTime, func
+
+from app.core.base.types import UUIDType
 
 
 class BaseTableModel(Base):
     """This model creates helper methods for all models"""
 
     __abstract__ = True
+    # fetch server-generated timestamps in the INSERT/UPDATE itself (RETURNING)
+    # so flushed objects need no refresh before they are serialized
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid7()))
+    id = Column(UUIDType, primary_key=True, index=True, default=lambda: str(uuid7()))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -1,8 +1,12 @@
-from typing import Generic, TypeVar, Type, Optional, List
+from typing import Generic, Iterable, Iterator, TypeVar, Type, Optional, List, Sequence
+from sqlalchemy import ColumnElement, any_, bindparam, column, select, values
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session, Query
+from sqlalchemy.sql import FromClause
 
 from app.core.base.model import BaseTableModel
 from app.core.base.schema import PaginatedResponse
+from app.db.routing import read_only
 
 T = TypeVar("T", bound=BaseTableModel)
 
@@ -12,11 +16,18 @@ class BaseRepository(Generic[T]):
     Base repository class for CRUD operations.
     This class provides a generic interface for performing CRUD operations on SQLAlchemy models.
     It is designed to be inherited by specific repository classes for different models.
+    Writes are flushed, not committed: the unit of work around the session
+    (see `app.db.database.get_db`) commits once, unless the session was opened
+    with `info={"autocommit": True}` for long-running jobs.
     Attributes:
         model (Type[Model]): The SQLAlchemy model class.
         db (Session): The SQLAlchemy session.
     """
 
+    # rows per statement of set-based bulk writes; keeps the bind parameters
+    # of one statement under the SQLite and PostgreSQL limits
+    BULK_CHUNK_SIZE = 5000
+
     def __init__(self, model: Type[T], db: Session):
         self.model = model
         self.db = db
@@ -30,20 +41,35 @@ class BaseRepository(Generic[T]):
         """
 
         self.db.add(obj)
-        self.db.commit()
-        self.db.refresh(obj)
+        self.save()
         return obj
 
+    def save(self) -> None:
+        """Flush pending changes to the database.
+
+        Server-generated columns come back with the flush, so objects need no
+        refresh. Sessions marked for autocommit are committed right away.
+        """
+        self.db.flush()
+        if self.db.info.get("autocommit"):
+            self.db.commit()
+
+    @read_only
     def get(self, id: str) -> Optional[T]:
         """Get an object of the model by id.
+
+        Objects already loaded in the session are returned from its identity
+        map without another round trip to the database.
+
         Args:
             id (str): The id of the object.
         Returns:
             Optional[Model]: The object if found, None otherwise.
         """
 
-        return self.db.query(self.model).filter(self.model.id == id).first()
+        return self.db.get(self.model, id)
 
+    @read_only
     def get_all(self) -> List[T]:
         """Get all objects of the model.
 
@@ -53,7 +79,7 @@ class BaseRepository(Generic[T]):
             List[Model]: A list containing all objects of the model in the database.
         """
 
-        return self.db.query(self.model).all()
+        return self.db.execute(select(self.model)).scalars().all()
 
     def update(self, obj: T) -> Optional[T]:
         """Update an existing object of the model.
@@ -72,8 +98,7 @@ class BaseRepository(Generic[T]):
         if existing_obj:
             for key, value in obj.__dict__.items():
                 setattr(existing_obj, key, value)
-            self.db.commit()
-            self.db.refresh(existing_obj)
+            self.save()
             return existing_obj
         return None
 
@@ -92,11 +117,11 @@ class BaseRepository(Generic[T]):
         obj = self.get(id)
         if obj:
             self.db.delete(obj)
-            self.db.commit()
+            self.save()
             return True
         return False
-    
 
+    @read_only
     def paginate(
         self, query: Query[T], page: int, page_size: int
     ) -> PaginatedResponse:
@@ -111,17 +136,55 @@ class BaseRepository(Generic[T]):
             PaginatedResponse: A PaginatedResponse object containing pagination information and the list of items for the requested page.
         """
 
-        # get total pages
-        total_pages = (query.count() + page_size - 1) // page_size
+        # count once: each count is a query over every matching row
+        total_items = query.count()
+        total_pages = (total_items + page_size - 1) // page_size
 
         # return a dict with pagination info
         if page > total_pages and total_pages != 0:
             page = total_pages
 
         return PaginatedResponse(
-            total_items=query.count(),
+            total_items=total_items,
             total_pages=total_pages,
             current_page=page,
             page_size=page_size,
             items=query.offset((page - 1) * page_size).limit(page_size).all(),
-        )
\ No newline at end of file
+        )
+
+    @classmethod
+    def chunks(cls, rows: Sequence) -> Iterator[Sequence]:
+        """Split the rows of a bulk write into statements of BULK_CHUNK_SIZE rows."""
+        for start in range(0, len(rows), cls.BULK_CHUNK_SIZE):
+            yield rows[start : start + cls.BULK_CHUNK_SIZE]
+
+    def values_table(self, name: str, columns: Sequence, rows: Iterable[tuple]) -> FromClause:
+        """A `VALUES` list usable as a table, e.g. in `UPDATE ... FROM`.
+
+        Args:
+            name (str): Name of the table in the statement.
+            columns (Sequence[Column]): The columns whose names and types the
+                values take, e.g. `(Product.id, Product.price)`.
+            rows (Iterable[tuple]): One tuple per row.
+
+        Returns:
+            FromClause: `(VALUES ...) AS name (col, ...)`.
+        """
+        rows = list(rows)
+        if self.db.get_bind().dialect.name != "sqlite":
+            return values(*(column(col.name, col.type) for col in columns), name=name).data(rows)
+        # SQLite has no column list on the alias; its VALUES columns are
+        # named column1, column2, ...
+        raw = values(*(column(f"column{i}", col.type) for i, col in enumerate(columns, 1))).data(rows)
+        return select(
+            *(raw.c[f"column{i}"].label(col.name) for i, col in enumerate(columns, 1))
+        ).subquery(name)
+
+    def match_any(self, id_column, ids: Sequence[str]) -> ColumnElement[bool]:
+        """`id_column = ANY(:ids)` with one array parameter on PostgreSQL,
+        `id_column IN (...)` elsewhere."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return id_column == any_(
+                bindparam(None, list(ids), type_=postgresql.ARRAY(postgresql.UUID(as_uuid=False)))
+            )
+        return id_column.in_(ids)
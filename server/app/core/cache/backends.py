@@ -0,0 +1,426 @@
+"""Storage backends for the response cache
+
+Every backend stores opaque byte strings under string keys with a TTL, and
+remembers which tags each key was stored with so that `invalidate` can drop
+all entries of a tag at once. `invalidate` also bumps a version counter per
+tag: a writer passes the versions it read before computing a value, and the
+value is only stored if none of them changed in the meantime. Backends also
+hold short-lived locks, so that only one worker at a time fills a missing
+entry.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+from urllib.parse import urlparse
+
+
+class CacheBackend:
+    """Interface of a response cache backend."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(
+        self, key: str, value: bytes, ttl: float, tags: Iterable[str] = (), versions: Optional[Sequence[int]] = None
+    ) -> bool:
+        """Store a value with its tags.
+        Args:
+            versions (Optional[Sequence[int]]): `tag_versions(tags)` as read
+                before the value was computed; the value is not stored if
+                any tag was invalidated since. None stores unconditionally.
+        Returns:
+            bool: Whether the value was stored.
+        """
+        raise NotImplementedError
+
+    def tag_versions(self, tags: Sequence[str]) -> list[int]:
+        """How many times each tag was invalidated, 0 if never (or forgotten)."""
+        raise NotImplementedError
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Delete every entry stored with any of the tags and bump the tags' versions.
+        Returns:
+            int: The number of entries deleted.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def acquire_lock(self, name: str, token: str, ttl: float) -> bool:
+        """Take the lock `name` for `ttl` seconds unless someone else holds it.
+        Returns:
+            bool: Whether the lock was taken.
+        """
+        raise NotImplementedError
+
+    def release_lock(self, name: str, token: str) -> None:
+        """Release the lock `name` if it is still held with `token`."""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU. Fastest, but every worker process has its own copy and
+    invalidations only reach the worker that made the write.
+    Attributes:
+        max_entries (int): Maximum number of entries kept.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, float, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._versions: dict[str, int] = {}
+        self._locks: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, tags=(), versions=None):
+        tags = tuple(tags)
+        with self._lock:
+            if versions is not None and [self._versions.get(tag, 0) for tag in tags] != list(versions):
+                return False
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            return True
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def invalidate(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+            keys = set().union(*(self._tags.pop(tag, set()) for tag in tags))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._versions.clear()
+            self._locks.clear()
+
+    def acquire_lock(self, name, token, ttl):
+        now = time.monotonic()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[1] > now:
+                return False
+            self._locks[name] = (token, now + ttl)
+            return True
+
+    def release_lock(self, name, token):
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[0] == token:
+                del self._locks[name]
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache shared by all worker processes on one host through a SQLite file.
+    Put the file on a memory-backed filesystem such as /dev/shm so reads and
+    writes never touch the disk.
+    Attributes:
+        path (str): Location of the database file.
+        max_entries (int): Entries kept before the soonest-expiring are evicted.
+    """
+
+    # expired and surplus entries are swept every this many writes
+    SWEEP_EVERY = 100
+    INVALIDATE_BATCH = 500
+
+    def __init__(self, path: str, max_entries: int = 10_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags ("
+                "tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tag_versions ("
+                "tag TEXT PRIMARY KEY, version INTEGER NOT NULL) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_locks ("
+                "name TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl, tags=(), versions=None):
+        tags = tuple(tags)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if versions is not None and self._versions(conn, tags) != list(versions):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self._sweep(conn)
+        return True
+
+    def tag_versions(self, tags):
+        return self._versions(self._connection(), tuple(tags))
+
+    def _versions(self, conn: sqlite3.Connection, tags: tuple[str, ...]) -> list[int]:
+        found = {}
+        for start in range(0, len(tags), self.INVALIDATE_BATCH):
+            batch = tags[start : start + self.INVALIDATE_BATCH]
+            placeholders = ", ".join("?" for _ in batch)
+            found.update(
+                conn.execute(
+                    f"SELECT tag, version FROM cache_tag_versions WHERE tag IN ({placeholders})", batch
+                ).fetchall()
+            )
+        return [found.get(tag, 0) for tag in tags]
+
+    def invalidate(self, tags):
+        tags = sorted(set(tags))
+        if not tags:
+            return 0
+        conn = self._connection()
+        deleted = 0
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO cache_tag_versions (tag, version) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+                [(tag,) for tag in tags],
+            )
+            # bulk writes may drop tens of thousands of tags, more than one
+            # statement can bind
+            for start in range(0, len(tags), self.INVALIDATE_BATCH):
+                batch = tags[start : start + self.INVALIDATE_BATCH]
+                placeholders = ", ".join("?" for _ in batch)
+                deleted += conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN ("
+                    f"SELECT key FROM cache_tags WHERE tag IN ({placeholders}))",
+                    batch,
+                ).rowcount
+            conn.execute(
+                "DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)"
+            )
+        return deleted
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_tags")
+            conn.execute("DELETE FROM cache_tag_versions")
+            conn.execute("DELETE FROM cache_locks")
+
+    def acquire_lock(self, name, token, ttl):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_locks WHERE name = ? AND expires_at <= ?", (name, now))
+            return conn.execute(
+                "INSERT OR IGNORE INTO cache_locks (name, token, expires_at) VALUES (?, ?, ?)",
+                (name, token, now + ttl),
+            ).rowcount == 1
+
+    def release_lock(self, name, token):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_locks WHERE name = ? AND token = ?", (name, token))
+
+    def _sweep(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries "
+                "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.execute(
+                "DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)"
+            )
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache on a Redis-compatible server (Redis, Valkey, KeyDB, ...), shared by
+    every worker and host. Needs the optional `redis` package.
+    Tags are Redis sets of the keys stored with them. Every key of the cache
+    starts with "response-cache:", so other users of the database, such as
+    the rate limiter, are left alone by `clear`.
+    """
+
+    PREFIX = "response-cache:"
+    ENTRY_PREFIX = PREFIX + "entry:"
+    TAG_PREFIX = PREFIX + "tag:"
+    VERSION_PREFIX = PREFIX + "version:"
+    LOCK_PREFIX = PREFIX + "lock:"
+    # tag versions outlive any computation that could have read them
+    VERSION_TTL_MS = 24 * 3600 * 1000
+    # delete the lock only if it still holds our token, atomically
+    RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+    # KEYS: the entry, then n version keys, then n tag sets
+    # ARGV: value, ttl in ms, whether to check, then n expected versions
+    SET_SCRIPT = """
+    local n = (#KEYS - 1) / 2
+    if ARGV[3] == '1' then
+        for i = 1, n do
+            if tonumber(redis.call('get', KEYS[1 + i]) or '0') ~= tonumber(ARGV[3 + i]) then
+                return 0
+            end
+        end
+    end
+    redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    for i = 1, n do
+        redis.call('sadd', KEYS[1 + n + i], KEYS[1])
+        -- entries share one TTL, so the tag set can expire with the newest
+        redis.call('pexpire', KEYS[1 + n + i], ARGV[2])
+    end
+    return 1
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "RESPONSE_CACHE_URL points at Redis but the `redis` package is not installed"
+            ) from exc
+        self._client = redis.Redis.from_url(url)
+        self._set = self._client.register_script(self.SET_SCRIPT)
+
+    def get(self, key):
+        return self._client.get(self.ENTRY_PREFIX + key)
+
+    def set(self, key, value, ttl, tags=(), versions=None):
+        tags = tuple(tags)
+        stored = self._set(
+            keys=[
+                self.ENTRY_PREFIX + key,
+                *(self.VERSION_PREFIX + tag for tag in tags),
+                *(self.TAG_PREFIX + tag for tag in tags),
+            ],
+            args=[value, int(ttl * 1000), "0" if versions is None else "1", *(versions or ())],
+        )
+        return bool(stored)
+
+    def tag_versions(self, tags):
+        if not tags:
+            return []
+        return [int(version or 0) for version in self._client.mget([self.VERSION_PREFIX + tag for tag in tags])]
+
+    def invalidate(self, tags):
+        tags = set(tags)
+        tag_keys = [self.TAG_PREFIX + tag for tag in tags]
+        if not tag_keys:
+            return 0
+        keys = self._client.sunion(tag_keys)
+        pipe = self._client.pipeline()
+        for tag in tags:
+            pipe.incr(self.VERSION_PREFIX + tag)
+            pipe.pexpire(self.VERSION_PREFIX + tag, self.VERSION_TTL_MS)
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(*tag_keys)
+        results = pipe.execute()
+        return results[2 * len(tags)] if keys else 0
+
+    def clear(self):
+        # only this cache's keys: the database may be shared with the rate limiter
+        for key in self._client.scan_iter(f"{self.PREFIX}*"):
+            self._client.delete(key)
+
+    def acquire_lock(self, name, token, ttl):
+        return bool(self._client.set(self.LOCK_PREFIX + name, token, nx=True, px=int(ttl * 1000)))
+
+    def release_lock(self, name, token):
+        self._client.eval(self.RELEASE_SCRIPT, 1, self.LOCK_PREFIX + name, token)
+
+
+def create_backend(url: str, max_entries: int) -> CacheBackend:
+    """
+    Build the backend named by a cache URL.
+    Args:
+        url (str): "memory://", "sqlite:///path/to/file.db" or "redis://host:port/db".
+        max_entries (int): Entry limit for the memory and SQLite backends.
+    """
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryBackend(max_entries=max_entries)
+    if scheme == "sqlite":
+        return SQLiteBackend(url[len("sqlite:///"):], max_entries=max_entries)
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported response cache URL: {url}")
@@ -0,0 +1,332 @@
+"""Response cache for GET endpoints with tag-based invalidation"""
+
+import functools
+import inspect
+import math
+import random
+import struct
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+from urllib.parse import urlencode
+from uuid import UUID, uuid4
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache.backends import CacheBackend, create_backend
+from app.core.cache.singleflight import SingleFlight
+from app.core.config import settings
+from app.core.middleware.compression import compressed_body_cache, negotiate_encoding
+from app.utils.logger import logger
+
+# session.info key collecting the tags to purge once the session commits
+PENDING_TAGS = "response_cache_tags"
+
+# stored in front of every body: when the entry expires (wall clock) and how
+# many seconds the endpoint took to compute it
+ENTRY_HEADER = struct.Struct("!dd")
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    encoding: Optional[str]
+    # the entry is close enough to expiry that this request should refresh it
+    refresh: bool
+
+
+class ResponseCache:
+    """
+    Cache of serialized JSON responses.
+
+    Entries are keyed by request path, the endpoint's parsed query parameters
+    and the caller's role, and stored with tags such as "products" or
+    "product:<id>". Writers call `invalidate_after_commit` with the tags they
+    affect; the entries are dropped once the transaction commits, and the
+    tags' versions are bumped. A reader notes the versions of its tags
+    before computing a body and stores it only if they are unchanged, so a
+    body computed before a commit is not cached after its invalidation.
+    Bodies read from a replica may still trail a commit by up to
+    DATABASE_REPLICA_MAX_LAG seconds, and are cached as such.
+
+    The compressed variant negotiated by the first request is stored next to
+    the plain body and served as-is to later requests accepting it.
+
+    Misses do not stampede the database. Concurrent requests for the same
+    missing entry share one endpoint call within a worker (`SingleFlight`),
+    and a lock in the backend lets one worker at a time compute it while the
+    others wait for the stored entry. Entries are also refreshed before they
+    expire, with a probability growing as expiry nears and with the time
+    the entry took to compute ("XFetch", Vattani et al., "Optimal
+    Probabilistic Cache Stampede Prevention"), so a popular entry is
+    usually recomputed by one request while the rest are still served hits.
+    Attributes:
+        backend (CacheBackend): Where entries are stored.
+        ttl (float): Seconds an entry stays valid without an invalidation.
+        lock_timeout (float): Seconds a worker may hold the lock of a missing
+            entry; other workers wait for the entry at most that long.
+        early_refresh (float): XFetch beta; higher values refresh earlier,
+            0 disables early refreshes.
+    """
+
+    # how often a worker waiting for another worker's entry checks for it
+    LOCK_POLL_INTERVAL = 0.02
+
+    def __init__(self, backend: CacheBackend, ttl: float, lock_timeout: float = 5.0, early_refresh: float = 1.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.early_refresh = early_refresh
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.early_refreshes = 0
+        # bodies not stored because a tag was invalidated while computing them
+        self.stale_skips = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @staticmethod
+    def build_key(path: str, params: dict, role: str) -> str:
+        """Normalized cache key, e.g. "/api/v1/products?limit=10&page=1|user"."""
+        query = urlencode(
+            sorted((name, str(value)) for name, value in params.items() if value is not None)
+        )
+        return f"{path.rstrip('/') or '/'}?{query}|{role}"
+
+    def get(self, key: str, encoding: Optional[str]) -> Optional[CachedBody]:
+        """Get a cached body, preferring the variant compressed with `encoding`.
+        Returns:
+            Optional[CachedBody]: The body, its content encoding (None when
+            plain) and whether to refresh it early, or None on a miss.
+        """
+        try:
+            entry = None
+            if encoding is not None:
+                entry = self.backend.get(f"{key}|{encoding}")
+            if entry is None:
+                encoding = None
+                entry = self.backend.get(key)
+        except Exception as e:
+            logger.error("Response cache read failed: %s", e)
+            return None
+        if entry is None:
+            return None
+        expires_at, compute_time = ENTRY_HEADER.unpack_from(entry)
+        # XFetch: refresh when now - compute_time * beta * ln(U) reaches expiry, U in (0, 1]
+        refresh = (
+            self.early_refresh > 0
+            and time.time() - compute_time * self.early_refresh * math.log(1.0 - random.random()) >= expires_at
+        )
+        return CachedBody(entry[ENTRY_HEADER.size:], encoding, refresh)
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        encoding: Optional[str],
+        tags: Iterable[str],
+        compute_time: float = 0.0,
+        versions: Optional[list[int]] = None,
+    ) -> None:
+        """Store a body, plus its variant compressed with `encoding` if worth it.
+        With `versions` (see `tag_versions`), nothing is stored if a tag was
+        invalidated since they were read."""
+        tags = tuple(tags)
+        header = ENTRY_HEADER.pack(time.time() + self.ttl, compute_time)
+        try:
+            if not self.backend.set(key, header + body, self.ttl, tags, versions):
+                self.stale_skips += 1
+                return
+            if (
+                encoding is not None
+                and settings.COMPRESSION_ENABLED
+                and len(body) >= settings.COMPRESSION_MINIMUM_SIZE
+            ):
+                compressed = compressed_body_cache.compress(body, encoding)
+                self.backend.set(f"{key}|{encoding}", header + compressed, self.ttl, tags, versions)
+        except Exception as e:
+            logger.error("Response cache write failed: %s", e)
+
+    def tag_versions(self, tags: Iterable[str]) -> Optional[list[int]]:
+        """Versions of the tags, to pass to `set`; None if the backend fails."""
+        try:
+            return self.backend.tag_versions(tuple(tags))
+        except Exception as e:
+            logger.error("Response cache read failed: %s", e)
+            return None
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """Drop every entry stored with any of the tags, right away."""
+        tags = set(tags)
+        try:
+            deleted = self.backend.invalidate(tags)
+            logger.info("Response cache: dropped %s entries for tags %s", deleted, sorted(tags))
+        except Exception as e:
+            logger.error("Response cache invalidation failed: %s", e)
+
+    def invalidate_after_commit(self, db: Session, tags: Iterable[str]) -> None:
+        """Drop the entries with these tags once `db` commits; a rollback keeps them."""
+        db.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.hits = self.misses = self.coalesced = self.early_refreshes = self.stale_skips = 0
+
+    def acquire_lock(self, key: str, token: str) -> bool:
+        """Take the backend lock of `key`; a failing backend counts as taken."""
+        try:
+            return self.backend.acquire_lock(key, token, self.lock_timeout)
+        except Exception as e:
+            logger.error("Response cache lock failed: %s", e)
+            return True
+
+    def release_lock(self, key: str, token: str) -> None:
+        try:
+            self.backend.release_lock(key, token)
+        except Exception as e:
+            logger.error("Response cache unlock failed: %s", e)
+
+    def wait_for(self, key: str) -> Optional[CachedBody]:
+        """Wait up to `lock_timeout` for another worker to store `key`."""
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            cached = self.get(key, None)
+            if cached is not None or time.monotonic() >= deadline:
+                return cached
+            time.sleep(self.LOCK_POLL_INTERVAL)
+
+    def cached(self, tags: Iterable[str] = ()) -> Callable:
+        """
+        Decorator caching a GET endpoint's 200 response.
+
+        The endpoint must return a pydantic model; responses it builds itself
+        and raised HTTPExceptions are not cached. Tags are formatted with the
+        endpoint's arguments, e.g. `tags=["product:{product_id}"]`; UUID
+        arguments are formatted in canonical form, as writers name them.
+
+        Requests sharing another request's endpoint call are answered with
+        `X-Cache: COALESCED`.
+        """
+
+        def decorator(endpoint: Callable) -> Callable:
+            signature = inspect.signature(endpoint)
+
+            @functools.wraps(endpoint)
+            def wrapper(*args, _cache_request: Request, **kwargs):
+                if not settings.RESPONSE_CACHE_ENABLED:
+                    return endpoint(*args, **kwargs)
+
+                params = {
+                    name: value
+                    for name, value in kwargs.items()
+                    if isinstance(value, (str, int, float)) and name not in _cache_request.path_params
+                }
+                role = getattr(kwargs.get("current_user"), "role", "anonymous")
+                key = self.build_key(_cache_request.url.path, params, role)
+                encoding = negotiate_encoding(_cache_request.headers.get("accept-encoding", ""))
+
+                cached = self.get(key, encoding)
+                if cached is not None:
+                    # while one request refreshes the entry, the others keep hitting it
+                    if not cached.refresh or self.flights.in_flight(key):
+                        self.hits += 1
+                        return _json_response(cached.body, cached.encoding, cache_status="HIT")
+                    self.early_refreshes += 1
+
+                def fill():
+                    token = uuid4().hex
+                    if not self.acquire_lock(key, token):
+                        # another worker is computing the entry, or refreshing it
+                        stored = self.wait_for(key)
+                        if stored is not None:
+                            return stored.body
+                        token = None
+                    try:
+                        entry_tags = [tag.format(**_canonical_ids(kwargs)) for tag in tags]
+                        # read before computing: an invalidation meanwhile must win
+                        versions = self.tag_versions(entry_tags)
+                        started = time.perf_counter()
+                        result = endpoint(*args, **kwargs)
+                        if not isinstance(result, BaseModel):
+                            return result
+                        body = result.model_dump_json().encode()
+                        if versions is not None:
+                            self.set(key, body, encoding, entry_tags, time.perf_counter() - started, versions)
+                        return body
+                    finally:
+                        if token is not None:
+                            self.release_lock(key, token)
+
+                result, shared = self.flights.do(key, fill)
+                if not isinstance(result, bytes):
+                    return result
+                if shared:
+                    self.coalesced += 1
+                else:
+                    self.misses += 1
+                return _json_response(result, None, cache_status="COALESCED" if shared else "MISS")
+
+            # FastAPI injects the request through this extra keyword parameter
+            wrapper.__signature__ = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        "_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+                    ),
+                ]
+            )
+            return wrapper
+
+        return decorator
+
+
+def _canonical_ids(kwargs: dict) -> dict:
+    """The arguments with UUID strings in canonical (lowercase, hyphenated)
+    form, so "/products/<ID>" is tagged like the id writers invalidate."""
+    canonical = dict(kwargs)
+    for name, value in kwargs.items():
+        if isinstance(value, str):
+            try:
+                canonical[name] = str(UUID(value))
+            except ValueError:
+                pass
+    return canonical
+
+
+def _json_response(body: bytes, encoding: Optional[str], cache_status: str) -> Response:
+    headers = {"X-Cache": cache_status}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+    return Response(
+        content=body,
+        status_code=status.HTTP_200_OK,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+response_cache = ResponseCache(
+    backend=create_backend(settings.RESPONSE_CACHE_URL, settings.RESPONSE_CACHE_MAX_ENTRIES),
+    ttl=settings.RESPONSE_CACHE_TTL,
+    lock_timeout=settings.RESPONSE_CACHE_LOCK_TIMEOUT,
+    early_refresh=settings.RESPONSE_CACHE_EARLY_REFRESH,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session: Session) -> None:
+    tags = session.info.pop(PENDING_TAGS, None)
+    if tags:
+        response_cache.invalidate(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tags(session: Session) -> None:
+    session.info.pop(PENDING_TAGS, None)
@@ -0,0 +1,65 @@
+"""Single-flight execution of concurrent identical calls"""
+
+import threading
+from typing import Any, Callable, Optional
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time and hands its outcome to every caller
+    that asked for the same key while it ran.
+
+    The first caller (the leader) runs the function on its own thread; the
+    others block until it finishes and get the same return value, or the
+    same exception raised. A call that starts after the leader finished runs
+    again: results are shared, not cached.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Run `fn` once for all concurrent callers with `key`.
+        Returns:
+            tuple[Any, bool]: The result, and whether it came from another
+            caller's run.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            with self._lock:
+                self.shared += 1
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
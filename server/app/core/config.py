@@ -1,4 +1,6 @@
 import os
+from typing import Literal
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
@@ -7,6 +9,16 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent
 
 
+class RateLimitPolicy(BaseModel):
+    """Token bucket refilled at `rate` ("<count>/<second|minute|hour|day>")
+    and holding up to `burst` tokens (the count of `rate` by default).
+    `key` decides who shares a bucket: the client IP or the signed-in user."""
+
+    rate: str
+    burst: int | None = None
+    key: Literal["ip", "user"] = "ip"
+
+
 class Settings(BaseSettings):
     """Class to hold application's config values."""
 
@@ -23,6 +35,165 @@ class Settings(BaseSettings):
     DATABASE_PASSWORD: str
     DATABASE_NAME: str
     DATABASE_TYPE: str
+    # Full SQLAlchemy URL; overrides the DATABASE_* parts above when set
+    DATABASE_URL: str | None = None
+    # Compiled statements kept per engine by SQLAlchemy's statement cache
+    DATABASE_QUERY_CACHE_SIZE: int = 500
+
+    # Read replicas, given as a JSON list of URLs in the environment.
+    # Replicas lagging more than DATABASE_REPLICA_MAX_LAG seconds behind the
+    # primary are skipped until the next lag check.
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_MAX_LAG: float = 5.0
+    DATABASE_REPLICA_LAG_CHECK_INTERVAL: float = 2.0
+
+    # Query budgets: SQL statements allowed per request, 0 disables the check.
+    # QUERY_BUDGETS overrides it per endpoint, keyed "<METHOD> <route path>",
+    # e.g. {"POST /api/v1/cart": 6}. "warn" logs offenders, "raise" fails them.
+    QUERY_BUDGET: int = 0
+    QUERY_BUDGETS: dict[str, int] = {}
+    QUERY_BUDGET_MODE: Literal["warn", "raise"] = "warn"
+    QUERY_STATS_HEADERS: bool = False
+    # Development aid: make relationship lazy loads raise instead of querying
+    DB_RAISELOAD: bool = False
+
+    # Logging: records are written by a background thread. LOG_FORMAT "json"
+    # writes one JSON object per line. Records below WARNING are sampled to
+    # LOG_INFO_PER_SECOND per call site (0 keeps all); rotated files are gzipped.
+    LOG_DIR: str = "logs"
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_INFO_PER_SECOND: int = 20
+    LOG_MAX_BYTES: int = 10_000_000
+    LOG_BACKUP_COUNT: int = 5
+    LOG_COMPRESS_ROTATED: bool = True
+
+    # Slow query log: statements over the threshold (0 disables) are written
+    # to SLOW_QUERY_LOG_FILE and aggregated per statement shape in memory.
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_LOG_FILE: str = "logs/slow_queries.log"
+    SLOW_QUERY_MAX_SHAPES: int = 500
+
+    # Response compression: gzip levels 1-9, brotli quality 0-11 (brotli is
+    # only offered when the optional `brotli` package is installed).
+    # Compressed bodies are cached by content digest, 0 disables the cache.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 500
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CACHE_SIZE: int = 256
+
+    # Response cache for catalog GET endpoints. RESPONSE_CACHE_URL selects the
+    # backend: "memory://" (per worker), "sqlite:////dev/shm/<file>.db"
+    # (shared by the workers of a host) or "redis://host:port/db". One
+    # request at a time computes a missing entry, holding a lock in the
+    # backend for at most RESPONSE_CACHE_LOCK_TIMEOUT seconds.
+    # RESPONSE_CACHE_EARLY_REFRESH scales how early entries are refreshed
+    # before they expire (0 refreshes them only once expired).
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_URL: str = "memory://"
+    RESPONSE_CACHE_TTL: float = 60.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_LOCK_TIMEOUT: float = 5.0
+    RESPONSE_CACHE_EARLY_REFRESH: float = 1.0
+
+    # Rate limiting. RATE_LIMIT_STORAGE_URL is "memory://" (per worker),
+    # "sqlite:////dev/shm/<file>.db" (shared by the workers of a host) or
+    # "redis://host:port/db". RATE_LIMITS maps policy names used by the routes
+    # to policies, e.g. {"login": {"rate": "10/minute", "key": "ip"}}.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE_URL: str = "memory://"
+    # use the first X-Forwarded-For address as client IP (behind a proxy only)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    RATE_LIMITS: dict[str, RateLimitPolicy] = {
+        "root": RateLimitPolicy(rate="5/minute"),
+        "login": RateLimitPolicy(rate="10/minute"),
+        "cart_write": RateLimitPolicy(rate="60/minute", burst=20, key="user"),
+    }
+
+    # Server-sent events of product stock and price changes at
+    # /api/v1/products/stream. STREAM_BROKER_URL is "memory://" (a change
+    # reaches the clients of the worker that made it) or
+    # "sqlite:////dev/shm/<file>.db" (the clients of every worker of a host).
+    # STREAM_QUEUE_SIZE products may have an update queued per client before
+    # it is told to resync; STREAM_MAX_CONNECTION_SECONDS 0 keeps streams open.
+    STREAM_ENABLED: bool = True
+    STREAM_BROKER_URL: str = "memory://"
+    STREAM_MAX_SUBSCRIBERS: int = 10_000
+    STREAM_QUEUE_SIZE: int = 256
+    STREAM_COALESCE_WINDOW: float = 0.25
+    STREAM_HEARTBEAT: float = 15.0
+    STREAM_POLL_INTERVAL: float = 0.1
+    STREAM_MAX_CONNECTION_SECONDS: float = 0
+
+    # Idempotency-Key support of the cart and product write endpoints. The
+    # response of a keyed request is stored with its write and replayed to
+    # retries for IDEMPOTENCY_KEY_TTL seconds; a retry arriving while the
+    # first request runs waits up to IDEMPOTENCY_WAIT_TIMEOUT seconds for it.
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_KEY_TTL: float = 24 * 3600.0
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0
+
+    # Transactional outbox: product and cart changes are written to the
+    # outbox_events table in the transaction of the change, and a relay
+    # thread in every worker delivers them to OUTBOX_SINKS
+    # ("file:///path/events.jsonl" or "sqlite:///path/events.db") at least
+    # once. Delivered events are deleted, or kept with delivered_at set when
+    # OUTBOX_DELETE_DELIVERED is off.
+    OUTBOX_ENABLED: bool = False
+    OUTBOX_SINKS: list[str] = []
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_DELETE_DELIVERED: bool = True
+
+    # Admin dashboard statistics (GET /api/v1/admin/stats). Product and cart
+    # writes add their changes to the counters in their own transaction,
+    # spread over STATS_SHARDS rows; the dashboard lists the
+    # STATS_TOP_PRODUCTS most-carted products. Check or repair the counters
+    # with scripts/recompute_stats.py.
+    STATS_ENABLED: bool = True
+    STATS_SHARDS: int = 8
+    STATS_TOP_PRODUCTS: int = 10
+
+    # Metrics served at /metrics in the Prometheus text format. With several
+    # workers, point METRICS_MULTIPROC_DIR at a directory shared by them (and
+    # emptied before start); each worker flushes its snapshot there every
+    # METRICS_FLUSH_INTERVAL seconds. The endpoint is served only when
+    # METRICS_TOKEN is set, to scrapers sending it as a bearer token.
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None
+    METRICS_MULTIPROC_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    # On-demand request profiling: admins send "X-Profile: 1" or "?profile=1".
+    # Profiles stay in memory per worker and, with PROFILER_DIR, on disk.
+    PROFILER_ENABLED: bool = True
+    PROFILER_SAMPLE_INTERVAL: float = 0.001
+    PROFILER_MAX_PROFILES: int = 20
+    PROFILER_DIR: str | None = None
+
+    # Production server (python -m app.launcher). SERVER_WORKERS 0 starts one
+    # worker per available CPU. SERVER_THREADPOOL_SIZE threads per worker run
+    # the sync endpoints; SERVER_LIMIT_CONCURRENCY answers 503 above that
+    # many connections per worker.
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 7001
+    SERVER_WORKERS: int = 0
+    SERVER_KEEP_ALIVE: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_THREADPOOL_SIZE: int = 40
+    SERVER_ACCESS_LOG: bool = False
+
+    # Readiness probe (/health/ready): the SELECT 1 result is reused for
+    # READINESS_CACHE_TTL seconds. A worker reports not ready above these
+    # threadpool queue and connection checkout wait limits.
+    READINESS_CACHE_TTL: float = 2.0
+    READINESS_TIMEOUT: float = 2.0
+    READINESS_MAX_THREADPOOL_WAITING: int = 10
+    READINESS_MAX_CHECKOUT_WAIT_MS: float = 500.0
 
     # Directories
     MEDIA_DIR: str = os.path.join(BASE_DIR, "media")
@@ -32,6 +203,8 @@ class Settings(BaseSettings):
     @property
     def database_url(self) -> str:
         """Dynamically construct DATABASE_URL"""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return f"{self.DATABASE_TYPE}://{self.DATABASE_USER}:{self.DATABASE_PASSWORD}@{self.DATABASE_HOST}:{self.DATABASE_PORT}/{self.DATABASE_NAME}"
 
     class Config:
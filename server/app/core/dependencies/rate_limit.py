@@ -0,0 +1,63 @@
+import math
+from typing import Annotated, Callable
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.api.models.user import User
+from app.core import response_messages
+from app.core.config import settings
+from app.core.dependencies.security import get_current_user
+from app.core.rate_limit.limiter import rate_limiter
+from app.utils.logger import logger
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client, honouring X-Forwarded-For only when configured"""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _enforce(name: str, identity: str) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    result = rate_limiter.check(name, identity)
+    if not result.allowed:
+        retry_after = math.ceil(result.retry_after)
+        logger.warning("Rate limit %s exceeded by %s", name, identity)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=response_messages.RATE_LIMIT_EXCEEDED.format(seconds=retry_after),
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def rate_limit(name: str) -> Callable:
+    """Dependency enforcing the `settings.RATE_LIMITS[name]` policy
+    Use it on a route with `dependencies=[Depends(rate_limit("login"))]`.
+    Policies keyed by "user" reuse the request's `get_current_user`, so they
+    add no query; the others count per client IP.
+
+    Args:
+        name (str): Name of the policy in `settings.RATE_LIMITS`
+
+    Returns:
+        Callable: The dependency, raising 429 when the bucket is empty
+    """
+
+    policy = settings.RATE_LIMITS.get(name)
+
+    if policy is not None and policy.key == "user":
+
+        def limit_user(current_user: Annotated[User, Depends(get_current_user)]) -> None:
+            _enforce(name, f"user:{current_user.id}")
+
+        return limit_user
+
+    def limit_ip(request: Request) -> None:
+        _enforce(name, f"ip:{client_ip(request)}")
+
+    return limit_ip
@@ -1,9 +1,13 @@
+import secrets
+
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from typing import Annotated
+from typing import Annotated, Optional
 
 from app.api.models.user import User
+from app.api.repositories.user import UserRepository
+from app.core.config import settings
 from app.db.database import get_db
 from app.utils.jwt_helpers import verify_jwt_token
 from app.core import response_messages
@@ -11,6 +15,7 @@ from app.core import response_messages
 
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+optional_oauth_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
 def get_current_user(
@@ -39,13 +44,43 @@ def get_current_user(
         token=access_token, credentials_exception=credentials_exception
     )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = UserRepository(db).get(user_id)
 
     if not user:
         raise credentials_exception
 
     return user
 
+def get_current_user_id(
+    request: Request,
+    access_token: Annotated[Optional[str], Depends(optional_oauth_scheme)],
+) -> str:
+    """Dependency returning the id in a valid access token, without loading
+    the user. Meant for long-lived streams, which must not hold a database
+    session open. Browsers' EventSource cannot send headers, so the token may
+    also come as the `access_token` query parameter.
+
+    Args:
+        request (Request): The incoming request
+        access_token (Annotated[Optional[str], Depends): JWT access token from the Authorization header
+
+    Returns:
+        str: ID of the logged in user
+    """
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=response_messages.INVALID_CREDENTIALS,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    token = access_token or request.query_params.get("access_token")
+    if not token:
+        raise credentials_exception
+
+    return verify_jwt_token(token=token, credentials_exception=credentials_exception)
+
+
 def get_current_admin_user(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
@@ -66,4 +101,26 @@ def get_current_admin_user(
             detail=response_messages.ADMIN_PRIVILEGES_REQUIRED,
         )
 
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def verify_metrics_token(
+    access_token: Annotated[Optional[str], Depends(optional_oauth_scheme)],
+) -> None:
+    """Dependency guarding the Prometheus scrape endpoint: the scraper sends
+    METRICS_TOKEN as a bearer token. Without a configured token the endpoint
+    is not served at all.
+
+    Args:
+        access_token (Annotated[Optional[str], Depends): Token from the Authorization header
+    """
+
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not access_token or not secrets.compare_digest(access_token, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=response_messages.INVALID_CREDENTIALS,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,123 @@
+"""Readiness check of a worker
+
+A worker is ready when its database answers and neither its connection pool
+nor the threadpool that runs sync endpoints is saturated, so the load
+balancer can drain it before requests start to time out.
+
+The `SELECT 1` runs at most once per `READINESS_CACHE_TTL` seconds however
+often the worker is probed, on the event loop's own executor rather than the
+threadpool the requests use, and is abandoned after `READINESS_TIMEOUT`. The
+pool and threadpool numbers are read on every probe; they cost no I/O.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.threadpool import threadpool_stats
+from app.db.database import engine
+from app.utils.logger import logger
+
+
+def pool_status(engine: Engine) -> dict:
+    """Checked out connections of a `QueuePool` against its capacity;
+    other pool classes have no fixed capacity to exhaust."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__, "exhausted": False}
+    max_overflow = pool._max_overflow
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "exhausted": capacity is not None and checked_out >= capacity,
+    }
+
+
+class ReadinessCheck:
+    """
+    Cached database check plus the current saturation of the worker.
+    Attributes:
+        engine (Engine): Database checked with `SELECT 1`.
+        ttl (float): Seconds a database check result is reused.
+    """
+
+    def __init__(self, engine: Engine, ttl: float):
+        self.engine = engine
+        self.ttl = ttl
+        self._database: Optional[dict] = None
+        self._checked_at = 0.0
+        self._running: Optional[asyncio.Future] = None
+
+    def _query(self) -> dict:
+        started = time.perf_counter()
+        with self.engine.connect() as connection:
+            checked_out = time.perf_counter()
+            connection.execute(text("SELECT 1"))
+        return {
+            "ok": True,
+            "checkout_wait_ms": round((checked_out - started) * 1000, 3),
+            "query_ms": round((time.perf_counter() - checked_out) * 1000, 3),
+        }
+
+    async def _check_database(self) -> dict:
+        if self._running is None or self._running.done():
+            self._running = asyncio.ensure_future(asyncio.to_thread(self._query))
+        try:
+            # shield: a timed out check keeps running and serves later probes
+            result = await asyncio.wait_for(asyncio.shield(self._running), settings.READINESS_TIMEOUT)
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"no answer within {settings.READINESS_TIMEOUT}s"}
+        except Exception as e:
+            # the probe is unauthenticated: driver messages may name hosts,
+            # ports or SQL, so the details only go to the log
+            logger.warning("Readiness database check failed: %s", e)
+            result = {"ok": False, "error": "unavailable"}
+        result["checked_at"] = datetime.now(timezone.utc).isoformat()
+        return result
+
+    async def database(self, pool: dict) -> dict:
+        if pool["exhausted"]:
+            # a checkout would only queue behind the requests
+            return {"ok": None, "skipped": "connection pool exhausted"}
+        if self._database is None or time.monotonic() - self._checked_at >= self.ttl:
+            self._database = await self._check_database()
+            self._checked_at = time.monotonic()
+        return self._database
+
+    async def check(self) -> tuple[bool, dict]:
+        """Whether the worker is ready, and the details of every check."""
+        pool = pool_status(self.engine)
+        threadpool = threadpool_stats()
+        database = await self.database(pool)
+
+        reasons = []
+        if database["ok"] is False:
+            reasons.append(f"database: {database['error']}")
+        if pool["exhausted"]:
+            reasons.append("database connection pool exhausted")
+        if threadpool.get("waiting", 0) > settings.READINESS_MAX_THREADPOOL_WAITING:
+            reasons.append(f"{threadpool['waiting']} requests waiting for the threadpool")
+        checkout_wait = database.get("checkout_wait_ms", 0)
+        if checkout_wait > settings.READINESS_MAX_CHECKOUT_WAIT_MS:
+            reasons.append(f"database checkout took {checkout_wait}ms")
+
+        ready = not reasons
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "reasons": reasons,
+            "checks": {"database": database, "pool": pool, "threadpool": threadpool},
+        }
+
+
+readiness_check = ReadinessCheck(engine, ttl=settings.READINESS_CACHE_TTL)
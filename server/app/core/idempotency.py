@@ -0,0 +1,255 @@
+"""Idempotency-Key support for write endpoints"""
+
+import functools
+import hashlib
+import inspect
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Callable, Iterator, Optional
+
+from fastapi import Header, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.api.models.idempotency_key import IdempotencyKey
+from app.api.repositories.idempotency_key import IdempotencyKeyRepository
+from app.core import response_messages
+from app.core.config import settings
+from app.utils.logger import logger
+
+MAX_KEY_LENGTH = 255
+
+
+class KeyLocks:
+    """Locks by key, kept only while a request holds or waits for them."""
+
+    def __init__(self):
+        self._locks: dict[tuple, list] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: tuple, timeout: float) -> Iterator[bool]:
+        """Hold the lock of `key`; yields False if it was not acquired in time."""
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        acquired = entry[0].acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+class IdempotencyKeys:
+    """
+    Replays the responses of write requests sent with an `Idempotency-Key`.
+
+    The first request with a key claims it by flushing an `IdempotencyKey`
+    row in the request's own session, inside a SAVEPOINT, and stores its
+    response there. The claim is committed together with the write, so the
+    key is recorded exactly when the write is; if the endpoint fails, only
+    the SAVEPOINT is rolled back and the key is released. A retry with the same key
+    gets the stored response back without running the endpoint; a retry
+    with the same key but another method, path or payload is refused.
+
+    Keys are scoped by user. Requests with the same key arriving while the
+    first one runs wait for it: on the same worker behind an in-process
+    lock, across workers on the unique constraint of the claim row.
+    Attributes:
+        ttl (float): Seconds a stored response is replayed.
+        wait_timeout (float): Seconds a request waits for one in flight with
+            the same key before it is answered with 409.
+    """
+
+    # expired rows are deleted every this many stored responses
+    PURGE_EVERY = 100
+
+    def __init__(self, ttl: float, wait_timeout: float):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.locks = KeyLocks()
+        self.stored = 0
+        self.replayed = 0
+        self.mismatched = 0
+        self.conflicts = 0
+
+    @staticmethod
+    def fingerprint(request: Request, arguments: dict) -> str:
+        """Hash of the method, route and the endpoint's parsed parameters."""
+        route = request.scope.get("route")
+        parts = [request.method, getattr(route, "path", request.url.path)]
+        for name, value in sorted(arguments.items()):
+            if isinstance(value, BaseModel):
+                parts.append(f"{name}={value.model_dump_json()}")
+            elif value is None or isinstance(value, (str, int, float)):
+                parts.append(f"{name}={value!r}")
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def idempotent(self) -> Callable:
+        """
+        Decorator adding Idempotency-Key support to a write endpoint.
+
+        The endpoint must take the request's session as `db` and the
+        authenticated user as `current_user`, and return a pydantic model, a
+        Response or None (for 204 endpoints). Only successful responses are
+        stored; a request that fails releases its key for the retry.
+        """
+
+        def decorator(endpoint: Callable) -> Callable:
+            signature = inspect.signature(endpoint)
+
+            @functools.wraps(endpoint)
+            def wrapper(
+                *args, _idempotency_request: Request, _idempotency_key: Optional[str] = None, **kwargs
+            ):
+                if not settings.IDEMPOTENCY_ENABLED or _idempotency_key is None:
+                    return endpoint(*args, **kwargs)
+                if not 0 < len(_idempotency_key) <= MAX_KEY_LENGTH:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=response_messages.INVALID_IDEMPOTENCY_KEY.format(length=MAX_KEY_LENGTH),
+                    )
+
+                user_id = str(kwargs["current_user"].id)
+                fingerprint = self.fingerprint(_idempotency_request, kwargs)
+                with self.locks.hold((user_id, _idempotency_key), self.wait_timeout) as acquired:
+                    if not acquired:
+                        self.conflicts += 1
+                        raise _in_flight()
+                    return self._run(
+                        endpoint, args, kwargs, _idempotency_request, user_id, _idempotency_key, fingerprint
+                    )
+
+            # FastAPI injects the request and the header through these extra
+            # keyword parameters
+            wrapper.__signature__ = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        "_idempotency_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+                    ),
+                    inspect.Parameter(
+                        "_idempotency_key",
+                        inspect.Parameter.KEYWORD_ONLY,
+                        annotation=Annotated[
+                            Optional[str],
+                            Header(
+                                alias="Idempotency-Key",
+                                description="Unique key of this write; retries with the same key "
+                                "get the first response back instead of repeating the write.",
+                            ),
+                        ],
+                        default=None,
+                    ),
+                ]
+            )
+            return wrapper
+
+        return decorator
+
+    def _run(self, endpoint, args, kwargs, request, user_id, key, fingerprint) -> Response:
+        db = kwargs["db"]
+        repository = IdempotencyKeyRepository(db)
+        now = datetime.now(timezone.utc)
+
+        record = repository.get_by_key(user_id, key)
+        if record is not None:
+            if _as_utc(record.expires_at) > now:
+                return self._replay(record, fingerprint)
+            db.delete(record)
+            repository.save()
+
+        claim = IdempotencyKey(
+            user_id=user_id, key=key, fingerprint=fingerprint, expires_at=now + timedelta(seconds=self.ttl)
+        )
+        # the claim and the endpoint's writes, undone together if either fails
+        savepoint = db.begin_nested()
+        try:
+            repository.create(claim)
+        except (IntegrityError, OperationalError) as e:
+            # another worker claimed the key: the insert waited for its commit
+            # (IntegrityError), or gave up waiting on SQLite's write lock
+            savepoint.rollback()
+            logger.info("Idempotency key %s of user %s claimed elsewhere: %s", key, user_id, e.orig)
+            record = repository.get_by_key(user_id, key)
+            if record is None:
+                self.conflicts += 1
+                raise _in_flight()
+            return self._replay(record, fingerprint)
+
+        try:
+            result = endpoint(*args, **kwargs)
+        except Exception:
+            # release the key; the request's unit of work rolls back the rest
+            savepoint.rollback()
+            raise
+        savepoint.commit()
+        status_code, body = _render(result, getattr(request.scope.get("route"), "status_code", None))
+        if status.HTTP_200_OK <= status_code < 300:
+            claim.status_code = status_code
+            claim.response_body = body
+        else:
+            db.delete(claim)
+        repository.save()
+
+        self.stored += 1
+        if self.stored % self.PURGE_EVERY == 0:
+            purged = repository.delete_expired(now)
+            logger.info("Idempotency keys: purged %s expired keys", purged)
+        # commit while holding the key, so requests waiting for it find the record
+        db.commit()
+        return _response(status_code, body)
+
+    def _replay(self, record: IdempotencyKey, fingerprint: str) -> Response:
+        if record.status_code is None:
+            self.conflicts += 1
+            raise _in_flight()
+        if record.fingerprint != fingerprint:
+            self.mismatched += 1
+            logger.warning("Idempotency key %s of user %s reused for another request", record.key, record.user_id)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=response_messages.IDEMPOTENCY_KEY_REUSED,
+            )
+        self.replayed += 1
+        return _response(record.status_code, record.response_body, replayed=True)
+
+
+def _in_flight() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=response_messages.IDEMPOTENCY_KEY_IN_FLIGHT,
+        headers={"Retry-After": "1"},
+    )
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes; every stored time is UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _render(result, route_status_code: Optional[int]) -> tuple[int, bytes]:
+    if isinstance(result, Response):
+        return result.status_code, bytes(result.body)
+    status_code = route_status_code or status.HTTP_200_OK
+    if isinstance(result, BaseModel):
+        return status_code, result.model_dump_json().encode()
+    return status_code, b""
+
+
+def _response(status_code: int, body: bytes, replayed: bool = False) -> Response:
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type="application/json" if body else None,
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
+
+
+idempotency_keys = IdempotencyKeys(ttl=settings.IDEMPOTENCY_KEY_TTL, wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT)
@@ -0,0 +1,443 @@
+"""Prometheus-style metrics
+
+A small registry of counters, gauges and histograms rendered in the
+Prometheus text format at `/metrics`. Recording a sample is a dict update
+under a lock, which keeps the per-request cost to a few microseconds.
+
+With several uvicorn workers every process only sees its own requests, so
+when `METRICS_MULTIPROC_DIR` is set each worker writes a JSON snapshot of its
+metrics there every `METRICS_FLUSH_INTERVAL` seconds (and at exit), and
+`/metrics` merges the snapshots of all workers. Counters and histograms are
+added up, and those of workers that have exited are kept so totals never go
+backwards. Gauges of exited workers are dropped. A gauge of per-worker state,
+such as requests in flight, is added up too (`merge="sum"`); by default a
+gauge describes something all workers share, such as the outbox lag, and the
+largest value of any worker is reported (`merge="max"`).
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from app.core.cache.response import response_cache
+from app.core.config import settings
+from app.core.idempotency import idempotency_keys
+from app.core.middleware.compression import compressed_body_cache
+from app.core.outbox.relay import outbox_relay
+from app.core.stream.hub import stream_hub
+from app.core.threadpool import threadpool_stats
+from app.db.instrumentation import statement_cache_stats
+from app.utils.logger import info_sampler, logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+Labels = tuple[str, ...]
+
+
+class Metric:
+    """
+    Base class of a metric family.
+    Attributes:
+        name (str): Metric name, e.g. "http_requests_total".
+        documentation (str): The HELP text.
+        labelnames (tuple[str, ...]): Names of the labels, in order.
+        merge (str): How the values of several workers combine: "sum", or
+            "max" for gauges of state shared by the workers.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), merge: str = "sum"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.merge = merge
+        self._values: dict[Labels, object] = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> dict[Labels, object]:
+        """Copy of the current value of every label combination."""
+        with self._lock:
+            return {labels: _copy(value) for labels, value in self._values.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down, such as requests in flight."""
+
+    type = "gauge"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed buckets.
+    Each label combination stores the per-bucket counts (the last one for
+    values above every bound), the sum and the count of observations.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: Labels, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose values are read from `callback` when collected."""
+
+    def __init__(self, name, documentation, type: str, callback: Callable[[], dict], labelnames=(), merge="sum"):
+        super().__init__(name, documentation, labelnames, merge)
+        self.type = type
+        self.callback = callback
+
+    def samples(self):
+        try:
+            return dict(self.callback())
+        except Exception as e:
+            logger.error("Metrics callback %s failed: %s", self.name, e)
+            return {}
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+class MetricsRegistry:
+    """Metric families of this process and their multiprocess aggregation."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), merge="max") -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, merge))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, type, callback, labelnames=(), merge=None) -> CallbackMetric:
+        """A counter (summed over workers) or gauge (see `gauge` for `merge`)
+        whose values are read from `callback` when collected."""
+        if merge is None:
+            merge = "max" if type == "gauge" else "sum"
+        return self.register(CallbackMetric(name, documentation, type, callback, labelnames, merge))
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    # multiprocess snapshots
+
+    def snapshot(self) -> dict:
+        """JSON-serializable values of every metric of this process."""
+        return {
+            "pid": os.getpid(),
+            "metrics": {
+                name: [[list(labels), value] for labels, value in metric.samples().items()]
+                for name, metric in self._metrics.items()
+            },
+        }
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return Path(settings.METRICS_MULTIPROC_DIR) / f"metrics-{pid}.json"
+
+    def write_snapshot(self) -> None:
+        """Write this process's snapshot atomically into the multiprocess dir."""
+        if not settings.METRICS_MULTIPROC_DIR:
+            return
+        path = self._snapshot_path(os.getpid())
+        temporary = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error("Could not write metrics snapshot: %s", e)
+
+    def start(self) -> None:
+        """Start flushing snapshots in the background (multiprocess mode only)."""
+        if not settings.METRICS_MULTIPROC_DIR or (self._flusher and self._flusher.is_alive()):
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.write_snapshot)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.write_snapshot()
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(settings.METRICS_FLUSH_INTERVAL):
+            self.write_snapshot()
+
+    def _other_snapshots(self) -> list[dict]:
+        directory = Path(settings.METRICS_MULTIPROC_DIR)
+        snapshots = []
+        for path in directory.glob("metrics-*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("pid") != os.getpid():
+                snapshots.append(snapshot)
+        return snapshots
+
+    def collect(self) -> dict[str, dict[Labels, object]]:
+        """Samples of every metric, merged over all workers in multiprocess
+        mode: summed, or the largest value for gauges with `merge="max"`."""
+        merged = {name: metric.samples() for name, metric in self._metrics.items()}
+        if not settings.METRICS_MULTIPROC_DIR:
+            return merged
+
+        for snapshot in self._other_snapshots():
+            alive = _pid_alive(snapshot["pid"])
+            for name, samples in snapshot["metrics"].items():
+                metric = self._metrics.get(name)
+                if metric is None or (metric.type == "gauge" and not alive):
+                    continue
+                values = merged[name]
+                for labels, value in samples:
+                    labels = tuple(labels)
+                    current = values.get(labels)
+                    if current is None:
+                        values[labels] = value
+                    elif isinstance(value, list):
+                        values[labels] = [a + b for a, b in zip(current, value)]
+                    elif metric.merge == "max":
+                        values[labels] = max(current, value)
+                    else:
+                        values[labels] = current + value
+        return merged
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, samples in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, value in sorted(samples.items()):
+                pairs = list(zip(metric.labelnames, labels))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip((*metric.buckets, "+Inf"), value[:-2]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(pairs + [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(pairs)} {value[-2]}")
+                    lines.append(f"{name}_count{_labels(pairs)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_labels(pairs)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: list[tuple[str, object]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def route_label(scope: dict) -> str:
+    """Route template of a request, e.g. "/api/v1/products/{product_id}".
+    Unmatched paths share one label so that scanners cannot blow up the
+    number of time series."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+registry = MetricsRegistry()
+
+# Metrics of this app
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")
+)
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("method", "route")
+)
+REQUESTS_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ("method",), merge="sum"
+)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes",
+    "Size of HTTP response bodies as sent, after compression.",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+DB_STATEMENTS = registry.counter(
+    "db_statements_total", "SQL statements run while handling requests.", ("method", "route")
+)
+DB_DURATION = registry.counter(
+    "db_statement_duration_seconds_total",
+    "Time spent in SQL statements while handling requests.",
+    ("method", "route"),
+)
+
+
+def _cache_lookups() -> dict:
+    return {
+        ("response", "hit"): response_cache.hits,
+        ("response", "miss"): response_cache.misses,
+        ("response", "coalesced"): response_cache.coalesced,
+        ("response", "early_refresh"): response_cache.early_refreshes,
+        ("response", "stale_skip"): response_cache.stale_skips,
+        ("compressed_body", "hit"): compressed_body_cache.hits,
+        ("compressed_body", "miss"): compressed_body_cache.misses,
+        ("sql_statement", "hit"): statement_cache_stats.hits,
+        ("sql_statement", "miss"): statement_cache_stats.misses,
+    }
+
+
+registry.callback(
+    "cache_lookups_total",
+    "Cache lookups by cache and result; hit rate = hit / (hit + miss). Response "
+    "cache misses served by another request's computation count as coalesced; "
+    "hits that refreshed the entry before it expired, as early_refresh and miss; "
+    "misses not stored because a write invalidated them meanwhile, also as stale_skip.",
+    "counter",
+    _cache_lookups,
+    ("cache", "result"),
+)
+
+
+registry.callback(
+    "log_records_sampled_out_total",
+    "Log records below WARNING dropped by per call site sampling.",
+    "counter",
+    lambda: {(): info_sampler.dropped},
+)
+
+
+def _threadpool(key: str) -> Callable[[], dict]:
+    def read() -> dict:
+        stats = threadpool_stats()
+        return {(): stats[key]} if stats else {}
+
+    return read
+
+
+registry.callback(
+    "threadpool_size", "Threads available to sync endpoints.", "gauge", _threadpool("size"), merge="sum"
+)
+registry.callback(
+    "threadpool_busy_threads",
+    "Threads currently running sync endpoints.",
+    "gauge",
+    _threadpool("busy"),
+    merge="sum",
+)
+registry.callback(
+    "threadpool_waiting_tasks",
+    "Sync endpoint calls waiting for a free thread; above 0 the pool is saturated.",
+    "gauge",
+    _threadpool("waiting"),
+    merge="sum",
+)
+
+
+registry.callback(
+    "stream_subscribers",
+    "Clients connected to the product event stream.",
+    "gauge",
+    lambda: {(): len(stream_hub.subscribers)},
+    merge="sum",
+)
+registry.callback(
+    "stream_events_total",
+    "Product stream events: published by this worker, coalesced into a queued "
+    "update for the same product, or replaced by a resync after a queue overflow.",
+    "counter",
+    lambda: {
+        ("published",): stream_hub.published,
+        ("coalesced",): stream_hub.coalesced,
+        ("resync",): stream_hub.resyncs,
+    },
+    ("result",),
+)
+registry.callback(
+    "idempotency_requests_total",
+    "Write requests sent with an Idempotency-Key: stored, replayed from a stored "
+    "response, refused for reusing a key on another request, or refused while "
+    "another request with the key was in flight.",
+    "counter",
+    lambda: {
+        ("stored",): idempotency_keys.stored,
+        ("replayed",): idempotency_keys.replayed,
+        ("mismatched",): idempotency_keys.mismatched,
+        ("conflict",): idempotency_keys.conflicts,
+    },
+    ("result",),
+)
+
+
+registry.callback(
+    "outbox_events_total",
+    "Outbox events handed to the sinks by this worker's relay: delivered, or "
+    "failed and kept for a retry.",
+    "counter",
+    lambda: {("delivered",): outbox_relay.delivered, ("failed",): outbox_relay.failed},
+    ("result",),
+)
+registry.callback(
+    "outbox_lag_seconds",
+    "Age of the oldest undelivered outbox event, the largest seen by any "
+    "worker's relay; keeps growing while deliveries fail.",
+    "gauge",
+    lambda: {(): outbox_relay.lag},
+)
@@ -0,0 +1,238 @@
+"""Response compression negotiated by Accept-Encoding"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# Content types worth compressing; images and archives are already compressed
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "image/svg+xml",
+)
+# Streams must reach the client as they are written, not when a buffer fills
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Encodings this server can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header.
+    Args:
+        accept_encoding (str): The raw header value, e.g. "gzip, br;q=0.5".
+    Returns:
+        Optional[str]: "br", "gzip" or None if the response should not be encoded.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def _level(encoding: str) -> int:
+    return settings.COMPRESSION_BROTLI_QUALITY if encoding == "br" else settings.COMPRESSION_GZIP_LEVEL
+
+
+def _compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    encoder = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    return encoder.compress(body) + encoder.flush()
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by the digest of the uncompressed body.
+
+    Hashing a body is far cheaper than compressing it, so identical payloads
+    (the same product list served to many clients) are only compressed once
+    per encoding and level.
+    Attributes:
+        max_entries (int): Maximum number of compressed bodies kept.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compress(self, body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+        """Compress a body, reusing a previous result for identical input."""
+        level = _level(encoding) if level is None else level
+        if self.max_entries <= 0:
+            return _compress(body, encoding, level)
+
+        # not security sensitive; sha1 is the cheapest digest here
+        key = (hashlib.sha1(body, usedforsecurity=False).digest(), encoding, level)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = _compress(body, encoding, level)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+compressed_body_cache = CompressedBodyCache(max_entries=settings.COMPRESSION_CACHE_SIZE)
+
+
+class _StreamEncoder:
+    """Incremental encoder for responses sent in several body messages."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._encoder = brotli.Compressor(quality=_level(encoding))
+            self._compress, self._flush = self._encoder.process, self._encoder.finish
+        else:
+            self._encoder = zlib.compressobj(_level(encoding), zlib.DEFLATED, 31)
+            self._compress, self._flush = self._encoder.compress, self._encoder.flush
+
+    def encode(self, data: bytes, last: bool) -> bytes:
+        encoded = self._compress(data)
+        return encoded + self._flush() if last else encoded
+
+
+def is_compressible(headers: Headers) -> bool:
+    """Whether a response with these headers should be compressed."""
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(UNCOMPRESSED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with brotli (when installed) or gzip, as
+    negotiated by the request's Accept-Encoding header.
+
+    Bodies smaller than `COMPRESSION_MINIMUM_SIZE` bytes, event streams and
+    responses that already carry a Content-Encoding are sent unchanged.
+    Single-message bodies go through `compressed_body_cache`; streamed bodies
+    are compressed incrementally.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+        stream: Optional[_StreamEncoder] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough, stream
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if is_compressible(headers):
+                    # hold the headers until the body shows whether to compress
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": stream.encode(body, last=not more_body),
+                        "more_body": more_body,
+                    }
+                )
+                return
+
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                if len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+                    body = compressed_body_cache.compress(body, encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            stream = _StreamEncoder(encoding)
+            headers["Content-Encoding"] = encoding
+            del headers["Content-Length"]
+            await send(start)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": stream.encode(body, last=False),
+                    "more_body": True,
+                }
+            )
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,55 @@
+"""Request metrics middleware"""
+
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import (
+    REQUEST_DURATION,
+    REQUESTS,
+    REQUESTS_IN_PROGRESS,
+    RESPONSE_SIZE,
+    route_label,
+)
+
+
+class MetricsMiddleware:
+    """
+    Record the count, latency and response size of every request per route,
+    and the number of requests in flight.
+
+    Registered outermost so that response sizes are the bytes actually sent,
+    after compression, and the latency covers every other middleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started_at = perf_counter()
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc((method,))
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            REQUESTS_IN_PROGRESS.dec((method,))
+            labels = (method, route_label(scope))
+            REQUESTS.inc((*labels, str(status_code)))
+            REQUEST_DURATION.observe(labels, perf_counter() - started_at)
+            RESPONSE_SIZE.observe(labels, size)
@@ -0,0 +1,103 @@
+"""On-demand request profiling middleware"""
+
+from time import perf_counter
+from urllib.parse import parse_qsl
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.dependencies.security import get_current_admin_user, get_current_user
+from app.core.profiling import RequestProfile, SamplingProfiler, profile_store
+from app.db.database import get_db
+from app.utils.logger import logger
+
+
+def _wants_profile(scope: Scope) -> bool:
+    query = scope.get("query_string", b"")
+    if b"profile=" in query and ("profile", "1") in parse_qsl(query.decode("latin-1")):
+        return True
+    return any(name == b"x-profile" and value == b"1" for name, value in scope["headers"])
+
+
+def _is_admin(app, authorization: str) -> bool:
+    """Run the `get_current_admin_user` dependency chain by hand.
+    The session comes from `dependency_overrides` when set, like any route."""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+
+    provider = app.dependency_overrides.get(get_db, get_db)
+    sessions = provider()
+    db = next(sessions)
+    try:
+        get_current_admin_user(get_current_user(db, token))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        # finish the unit of work the way FastAPI does after a request
+        next(sessions, None)
+
+
+class ProfilerMiddleware:
+    """
+    Profile a single request when an admin sends `X-Profile: 1` or adds
+    `?profile=1`, returning the profile id in the `X-Profile-Id` response
+    header. The collapsed stacks are then available at
+    `GET /api/v1/admin/profiles/{id}`.
+
+    Requests without the flag only pay for the flag lookup. Flagged requests
+    from non-admins are served normally, without a profile.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PROFILER_ENABLED or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = Headers(scope=scope).get("authorization", "")
+        if not await run_in_threadpool(_is_admin, scope["app"], authorization):
+            logger.warning("Ignoring profile request from a non-admin for %s", scope["path"])
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(interval=settings.PROFILER_SAMPLE_INTERVAL)
+        profile_id = None
+        started_at = perf_counter()
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal profile_id
+            if message["type"] == "http.response.start":
+                # the id is fixed up front; the stacks are stored when the request ends
+                profile_id = RequestProfile.new_id()
+                MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            stacks = profiler.stop()
+            profile = RequestProfile(
+                method=scope["method"],
+                path=scope["path"],
+                duration_ms=(perf_counter() - started_at) * 1000,
+                samples=profiler.samples,
+                stacks=stacks,
+                id=profile_id,
+            )
+            profile_store.add(profile)
+            logger.info(
+                "Profiled %s %s in %.1fms (%s samples), profile id %s",
+                profile.method,
+                profile.path,
+                profile.duration_ms,
+                profile.samples,
+                profile.id,
+            )
@@ -0,0 +1,48 @@
+"""Per-request SQL statement tracking middleware"""
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import DB_DURATION, DB_STATEMENTS, route_label
+from app.db.instrumentation import check_budget, track_queries
+
+
+class QueryStatsMiddleware:
+    """
+    Track the SQL statements run by each request and check them against the
+    configured query budget once the request is done.
+
+    When `QUERY_STATS_HEADERS` is enabled the counts are also returned in the
+    `X-DB-Query-Count` and `X-DB-Time-Ms` response headers. Statements run after
+    the response has started (e.g. streaming bodies) are not in the headers.
+    The totals also feed the per-route `db_statements_total` and
+    `db_statement_duration_seconds_total` metrics.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(scope) as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and settings.QUERY_STATS_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Query-Count"] = str(stats.count)
+                    headers["X-DB-Time-Ms"] = f"{stats.duration * 1000:.2f}"
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        if settings.METRICS_ENABLED:
+            labels = (scope["method"], route_label(scope))
+            DB_STATEMENTS.inc(labels, stats.count)
+            DB_DURATION.inc(labels, stats.duration)
+
+        if settings.QUERY_BUDGET_MODE == "warn":
+            check_budget(stats)
@@ -0,0 +1,61 @@
+"""Writing product and cart changes to the transactional outbox"""
+
+import json
+from typing import Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.api.models.outbox_event import OutboxEvent
+from app.core.config import settings
+
+PRODUCT_CREATED = "product.created"
+PRODUCT_UPDATED = "product.updated"
+PRODUCT_DELETED = "product.deleted"
+CART_ITEM_ADDED = "cart_item.added"
+CART_ITEM_UPDATED = "cart_item.updated"
+CART_ITEM_REMOVED = "cart_item.removed"
+CART_CLEARED = "cart.cleared"
+
+
+def product_payload(product) -> dict:
+    """Id, name, price and stock of a product or of a row with those columns."""
+    return {
+        "id": str(product.id),
+        "name": product.name,
+        "price": float(product.price),
+        "stock": product.stock,
+    }
+
+
+def cart_item_payload(cart_item) -> dict:
+    return {
+        "id": str(cart_item.id),
+        "user_id": str(cart_item.user_id),
+        "product_id": str(cart_item.product_id),
+        "quantity": cart_item.quantity,
+    }
+
+
+def record_events(db: Session, events: Iterable[tuple[str, str, dict]]) -> None:
+    """
+    Add events to the outbox in the session's transaction; they are only
+    delivered if it commits. Nothing is written when OUTBOX_ENABLED is off.
+    Args:
+        db (Session): The session making the change.
+        events (Iterable[tuple[str, str, dict]]): (topic, key, payload) of
+            each event, with the id of the changed object as key.
+    """
+    if not settings.OUTBOX_ENABLED:
+        return
+    rows = [
+        {"topic": topic, "key": key, "payload": json.dumps(payload, separators=(",", ":"))}
+        for topic, key, payload in events
+    ]
+    if rows:
+        # one executemany INSERT, also for the tens of thousands of a bulk change
+        db.execute(insert(OutboxEvent), rows)
+
+
+def record_event(db: Session, topic: str, key: str, payload: dict) -> None:
+    record_events(db, [(topic, key, payload)])
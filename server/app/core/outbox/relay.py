@@ -0,0 +1,186 @@
+"""Background delivery of outbox events to the sinks"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.api.models.outbox_event import OutboxEvent
+from app.core.config import settings
+from app.core.outbox.sinks import Sink, create_sink
+from app.db.database import SessionLocal
+from app.utils.logger import logger
+
+
+class OutboxRelay:
+    """
+    Reads undelivered outbox events in batches, in the order they were
+    written, hands each batch to every sink and then deletes the events, or
+    marks them delivered. Every worker runs a relay thread; on PostgreSQL
+    they split the backlog with `FOR UPDATE SKIP LOCKED`.
+
+    A batch a sink refuses stays in the outbox with its `attempts` raised and
+    is retried after a growing pause, so delivery is at least once and
+    events are never lost, but may be delivered twice.
+    Attributes:
+        session_factory (Callable[[], Session]): Opens the relay's sessions.
+        sinks (list[Sink]): Where events are delivered.
+        batch_size (int): Events per batch.
+        poll_interval (float): Seconds between polls when the outbox is drained.
+        delete_delivered (bool): Delete delivered events instead of marking them.
+        max_backoff (float): Longest pause after failed deliveries.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sinks: Iterable[Sink] = (),
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+        delete_delivered: bool = True,
+        max_backoff: float = 30.0,
+    ):
+        self.session_factory = session_factory
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.delete_delivered = delete_delivered
+        self.max_backoff = max_backoff
+        self.delivered = 0
+        self.failed = 0
+        # write time of the oldest undelivered event seen by the last poll
+        self.oldest_pending_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def lag(self) -> float:
+        """Seconds the oldest undelivered event has been waiting, 0 when drained."""
+        if self.oldest_pending_at is None:
+            return 0.0
+        return max(0.0, time.time() - self.oldest_pending_at)
+
+    def run_once(self) -> int:
+        """
+        Deliver one batch.
+        Returns:
+            int: The number of events delivered.
+        Raises:
+            Exception: What the failing sink raised; the batch is kept.
+        """
+        db = self.session_factory()
+        try:
+            query = (
+                select(OutboxEvent)
+                .where(OutboxEvent.delivered_at.is_(None))
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+            )
+            if db.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+            rows = db.execute(query).scalars().all()
+            if not rows:
+                db.commit()
+                self.oldest_pending_at = None
+                return 0
+            self.oldest_pending_at = min(_timestamp(row.created_at) for row in rows)
+
+            ids = [row.id for row in rows]
+            try:
+                events = [_event(row) for row in rows]
+                for sink in self.sinks:
+                    sink.deliver(events)
+            except Exception:
+                db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .values(attempts=OutboxEvent.attempts + 1),
+                    execution_options={"synchronize_session": False},
+                )
+                db.commit()
+                self.failed += len(rows)
+                raise
+
+            if self.delete_delivered:
+                done = delete(OutboxEvent).where(OutboxEvent.id.in_(ids))
+            else:
+                done = (
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .values(delivered_at=datetime.now(timezone.utc))
+                )
+            db.execute(done, execution_options={"synchronize_session": False})
+            db.commit()
+            self.delivered += len(rows)
+            if len(rows) < self.batch_size:
+                self.oldest_pending_at = None
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Start the relay thread, unless it runs already or has no sinks."""
+        if self._thread and self._thread.is_alive():
+            return
+        if not self.sinks:
+            logger.warning("Outbox relay not started: no sinks configured; events stay in the outbox")
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while not self._stop.is_set():
+            try:
+                delivered = self.run_once()
+            except Exception as e:
+                backoff = min(max(backoff * 2, self.poll_interval), self.max_backoff)
+                logger.error("Outbox delivery failed, retrying in %.1fs: %s", backoff, e)
+                self._stop.wait(backoff)
+                continue
+            backoff = 0.0
+            # a full batch means there is more waiting
+            if delivered < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    # SQLite returns naive datetimes; the server clock writes them in UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _event(row: OutboxEvent) -> dict:
+    return {
+        "id": str(row.id),
+        "topic": row.topic,
+        "key": row.key,
+        "payload": json.loads(row.payload),
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+outbox_relay = OutboxRelay(
+    SessionLocal,
+    [create_sink(url) for url in settings.OUTBOX_SINKS],
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+    delete_delivered=settings.OUTBOX_DELETE_DELIVERED,
+)
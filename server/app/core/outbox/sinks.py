@@ -0,0 +1,119 @@
+"""Destinations of the events delivered by the outbox relay
+
+A sink receives batches of events as dicts with `id`, `topic`, `key`,
+`payload` and `created_at`, and raises if it could not store them all. The
+relay delivers at least once: after a failure, or a crash between delivery
+and bookkeeping, a batch is delivered again, so consumers deduplicate by
+event id.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
+
+
+class Sink:
+    """Interface of an outbox sink."""
+
+    def deliver(self, events: list[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink(Sink):
+    """
+    Appends events as JSON lines, synced to disk before the relay counts
+    them as delivered.
+    Attributes:
+        path (str): Location of the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def deliver(self, events):
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(json.dumps(event, separators=(",", ":")) + "\n" for event in events)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class SQLiteSink(Sink):
+    """
+    Stores events in the `events` table of a SQLite file, ignoring events it
+    already has, so redelivered batches are deduplicated.
+    Attributes:
+        path (str): Location of the database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id TEXT PRIMARY KEY, topic TEXT NOT NULL, key TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created_at TEXT)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def deliver(self, events):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO events (id, topic, key, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (event["id"], event["topic"], event["key"], json.dumps(event["payload"]), event["created_at"])
+                    for event in events
+                ],
+            )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class CallbackSink(Sink):
+    """
+    Hands each batch to an in-process function, e.g. to update a local
+    search index. The function runs on the relay thread and must be
+    idempotent.
+    """
+
+    def __init__(self, callback: Callable[[list[dict]], None]):
+        self.callback = callback
+
+    def deliver(self, events):
+        self.callback(events)
+
+
+def create_sink(url: str) -> Sink:
+    """
+    Build the sink named by a URL.
+    Args:
+        url (str): "file:///path/to/events.jsonl" or "sqlite:///path/to/events.db".
+    """
+    scheme = urlparse(url).scheme
+    if scheme == "file":
+        return FileSink(url[len("file://"):])
+    if scheme == "sqlite":
+        return SQLiteSink(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported outbox sink URL: {url}")
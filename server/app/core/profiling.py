@@ -0,0 +1,200 @@
+"""Sampling profiler for single requests
+
+`SamplingProfiler` runs a background thread that periodically records the
+Python stack of every busy thread with `sys._current_frames()`. Sampling,
+unlike cProfile, also sees the threadpool threads in which FastAPI runs sync
+endpoints and dependencies, and costs nothing while no profile is running.
+
+Profiles are kept as collapsed stacks ("root;caller;callee <count>" lines),
+the input format of flamegraph.pl, speedscope and most flame graph viewers.
+"""
+
+import re
+import sys
+import threading
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+# (module, function) of leaf frames where a thread is waiting, not working
+IDLE_FRAMES = {
+    ("threading", "wait"),
+    ("threading", "_wait_for_tstate_lock"),
+    ("selectors", "select"),
+    ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+}
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame) -> str:
+    """A frame's stack as "root;...;leaf" function names."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all busy threads until stopped.
+
+    Other requests served concurrently by the same worker appear in the
+    samples too; profile on a quiet worker for clean results.
+    Attributes:
+        interval (float): Seconds between samples.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                self.stacks[collapse_stack(frame)] += 1
+
+
+class RequestProfile:
+    """
+    A finished profile of one request.
+    Attributes:
+        id (str): Identifier returned in the X-Profile-Id response header.
+        method (str): HTTP method of the request.
+        path (str): Path of the request.
+        duration_ms (float): Wall time of the request.
+        samples (int): Number of sampling rounds taken.
+        stacks (Counter): Sample count per collapsed stack.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        duration_ms: float,
+        samples: int,
+        stacks: Counter,
+        id: Optional[str] = None,
+    ):
+        self.id = id or self.new_id()
+        self.method = method
+        self.path = path
+        self.duration_ms = duration_ms
+        self.samples = samples
+        self.stacks = stacks
+        self.created_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def collapsed(self) -> str:
+        """The profile in collapsed stack format, heaviest stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "created_at": self.created_at,
+        }
+
+
+class ProfileStore:
+    """
+    The most recent request profiles of this worker, optionally also written
+    to `PROFILER_DIR` as `<id>.collapsed` files.
+    Attributes:
+        max_profiles (int): Profiles kept in memory.
+    """
+
+    def __init__(self, max_profiles: int):
+        self._profiles: deque[RequestProfile] = deque(maxlen=max_profiles)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+        if settings.PROFILER_DIR:
+            path = Path(settings.PROFILER_DIR) / f"{profile.id}.collapsed"
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(profile.collapsed())
+            except OSError as e:
+                logger.error("Could not write profile %s: %s", profile.id, e)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        """A profile by id: from memory, or else from `PROFILER_DIR`, where
+        it outlives the in-memory window and can be read by any worker."""
+        with self._lock:
+            profile = next((p for p in self._profiles if p.id == profile_id), None)
+        if profile is None and settings.PROFILER_DIR:
+            profile = self._load(profile_id)
+        return profile
+
+    def _load(self, profile_id: str) -> Optional[RequestProfile]:
+        # ids are uuid4 hex; anything else could escape the directory
+        if not PROFILE_ID.fullmatch(profile_id):
+            return None
+        path = Path(settings.PROFILER_DIR) / f"{profile_id}.collapsed"
+        try:
+            text = path.read_text()
+            modified = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.error("Could not read profile %s: %s", profile_id, e)
+            return None
+        stacks: Counter[str] = Counter()
+        for line in text.splitlines():
+            stack, _, count = line.rpartition(" ")
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+        # the file holds only the stacks; the request details are not kept
+        profile = RequestProfile("", "", 0.0, 0, stacks, id=profile_id)
+        profile.created_at = datetime.fromtimestamp(modified, timezone.utc)
+        return profile
+
+    def recent(self) -> list[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(max_profiles=settings.PROFILER_MAX_PROFILES)
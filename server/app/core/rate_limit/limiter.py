@@ -0,0 +1,73 @@
+"""Token bucket rate limiter with policies from Settings"""
+
+from typing import Mapping, NamedTuple
+
+from app.core.config import RateLimitPolicy, settings
+from app.core.rate_limit.stores import BucketStore, create_store
+from app.utils.logger import logger
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> tuple[int, float]:
+    """
+    Parse a rate such as "10/minute".
+    Returns:
+        tuple[int, float]: The request count and the period in seconds.
+    """
+    count, _, period = rate.partition("/")
+    try:
+        return int(count), PERIODS[period.strip().rstrip("s")]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit {rate!r}, expected e.g. '10/minute'")
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # seconds until the request would be allowed, 0 when it was
+    retry_after: float
+
+
+class RateLimiter:
+    """
+    Applies named token bucket policies to identities such as "ip:1.2.3.4".
+    Attributes:
+        store (BucketStore): Where the buckets live.
+        policies (Mapping[str, RateLimitPolicy]): Policies by name.
+    """
+
+    def __init__(self, store: BucketStore, policies: Mapping[str, RateLimitPolicy]):
+        self.store = store
+        self.policies = policies
+        self._buckets: dict[str, tuple[int, float]] = {}
+        for name, policy in policies.items():
+            count, period = parse_rate(policy.rate)
+            self._buckets[name] = (policy.burst or count, count / period)
+
+    def check(self, name: str, identity: str, cost: int = 1) -> RateLimitResult:
+        """Spend `cost` tokens of `identity`'s bucket for policy `name`.
+        Unknown policies allow everything; so does an unreachable store, since
+        refusing all traffic would be worse than not limiting it for a while.
+        """
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            return RateLimitResult(True, 0, 0, 0.0)
+        capacity, rate = bucket
+        try:
+            state = self.store.take(f"{name}:{identity}", capacity, rate, cost)
+        except Exception as e:
+            logger.error("Rate limit store failed, allowing request: %s", e)
+            return RateLimitResult(True, capacity, capacity, 0.0)
+
+        retry_after = 0.0 if state.allowed else (cost - state.tokens) / rate
+        return RateLimitResult(state.allowed, capacity, int(state.tokens), retry_after)
+
+    def reset(self) -> None:
+        self.store.reset()
+
+
+rate_limiter = RateLimiter(
+    store=create_store(settings.RATE_LIMIT_STORAGE_URL), policies=settings.RATE_LIMITS
+)
@@ -0,0 +1,205 @@
+"""Token bucket storage for the rate limiter
+
+Each store keeps one bucket per key and takes tokens from it in a single
+atomic operation: a locked dict update in memory, one UPSERT statement on
+SQLite and one Lua script call on Redis. Buckets refill continuously at
+`rate` tokens per second up to `capacity`.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+
+class BucketState(NamedTuple):
+    allowed: bool
+    # tokens left after this request (or before it, when it was refused)
+    tokens: float
+
+
+class BucketStore:
+    """Interface of a token bucket store."""
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> BucketState:
+        """Take `cost` tokens from the bucket of `key` if it has enough."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget every bucket."""
+        raise NotImplementedError
+
+
+def _refill(tokens: float, elapsed: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(elapsed, 0.0) * rate)
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Buckets in a dict of this process. Every worker counts on its own, so the
+    effective limit is multiplied by the number of workers.
+    Attributes:
+        max_keys (int): Buckets kept before the least recently used are dropped.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = _refill(tokens, now - updated_at, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # re-inserting keeps the dict in least recently used order
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                del self._buckets[next(iter(self._buckets))]
+        return BucketState(allowed, tokens)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore(BucketStore):
+    """
+    Buckets in a SQLite file shared by the workers of one host; put it on a
+    memory-backed filesystem such as /dev/shm.
+
+    A check is a single `INSERT ... ON CONFLICT DO UPDATE ... RETURNING`
+    statement, which SQLite runs atomically under its write lock.
+    """
+
+    # buckets that have refilled completely are swept every this many checks
+    SWEEP_EVERY = 1000
+
+    # the refilled token count of the existing row, before taking anything
+    _REFILLED = "min(:capacity, tokens + max(:now - updated_at, 0) * :rate)"
+    _TAKE = f"""
+        INSERT INTO rate_limit_buckets (key, tokens, updated_at, full_at, allowed)
+        VALUES (
+            :key,
+            CASE WHEN :capacity >= :cost THEN :capacity - :cost ELSE :capacity END,
+            :now,
+            :now + CASE WHEN :capacity >= :cost THEN :cost ELSE 0 END / :rate,
+            :capacity >= :cost
+        )
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN {_REFILLED} >= :cost
+                THEN {_REFILLED} - :cost ELSE {_REFILLED} END,
+            updated_at = :now,
+            full_at = :now + (:capacity - CASE WHEN {_REFILLED} >= :cost
+                THEN {_REFILLED} - :cost ELSE {_REFILLED} END) / :rate,
+            allowed = {_REFILLED} >= :cost
+        RETURNING allowed, tokens
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._checks = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "full_at REAL NOT NULL, allowed INTEGER NOT NULL) WITHOUT ROWID"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, rate, cost=1):
+        conn = self._connection()
+        now = time.time()
+        allowed, tokens = conn.execute(
+            self._TAKE,
+            {"key": key, "capacity": capacity, "rate": rate, "cost": cost, "now": now},
+        ).fetchone()
+        self._checks += 1
+        if self._checks % self.SWEEP_EVERY == 0:
+            conn.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+        return BucketState(bool(allowed), tokens)
+
+    def reset(self):
+        self._connection().execute("DELETE FROM rate_limit_buckets")
+
+
+class RedisBucketStore(BucketStore):
+    """
+    Buckets on a Redis-compatible server, shared by every worker and host.
+    Needs the optional `redis` package. The check is one Lua script call
+    that uses the server clock, so hosts with skewed clocks agree.
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    -- a bucket that would be full again is the same as no bucket
+    redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+    return {allowed, tostring(tokens)}
+    """
+
+    KEY_PREFIX = "rate-limit:"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError(
+                "RATE_LIMIT_STORAGE_URL points at Redis but the `redis` package is not installed"
+            ) from exc
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate, cost=1):
+        allowed, tokens = self._take(keys=[self.KEY_PREFIX + key], args=[capacity, rate, cost])
+        return BucketState(bool(allowed), float(tokens))
+
+    def reset(self):
+        for key in self._client.scan_iter(f"{self.KEY_PREFIX}*"):
+            self._client.delete(key)
+
+
+def create_store(url: str) -> BucketStore:
+    """
+    Build the store named by a storage URL.
+    Args:
+        url (str): "memory://", "sqlite:///path/to/file.db" or "redis://host:port/db".
+    """
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryBucketStore()
+    if scheme == "sqlite":
+        return SQLiteBucketStore(url[len("sqlite:///"):])
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisBucketStore(url)
+    raise ValueError(f"Unsupported rate limit storage URL: {url}")
@@ -7,3 +7,8 @@ INVALID_CREDENTIALS = "Could not validate credentials"
 EXPIRED_REFRESH_TOKEN = "Refresh token expired"
 TOKEN_REFRESH_SUCCESSFUL = "Tokens refreshed succesfully"
 ADMIN_PRIVILEGES_REQUIRED = "Admin privileges required to perform this action"
+RATE_LIMIT_EXCEEDED = "Too many requests. Please try again in {seconds} seconds."
+
+INVALID_IDEMPOTENCY_KEY = "Idempotency-Key must be 1 to {length} characters long"
+IDEMPOTENCY_KEY_REUSED = "Idempotency-Key was already used for a different request"
+IDEMPOTENCY_KEY_IN_FLIGHT = "A request with this Idempotency-Key is still being processed"
@@ -0,0 +1,149 @@
+"""Incrementally maintained catalog statistics
+
+Product and cart writes describe what they changed with `product_changed`,
+`cart_item_changed` and `cart_cleared`. The changes of a transaction add up
+in its session and are written just before it commits: one increment of a
+random catalog_stats shard, one executemany upsert of the touched products'
+product_cart_stats rows and, when carts gained or lost items, one grouped
+count of those users' cart items to tell which carts became (non-)empty.
+That count is the only source of the active_carts change, however the items
+were removed. The counters therefore move exactly when the rows they count do, and the
+admin dashboard sums at most STATS_SHARDS rows instead of scanning the
+catalog and every cart.
+
+Writes that bypass the services (seeding, manual SQL) are not counted, and
+two transactions filling the same empty cart at once may both count it as
+new. `scripts/recompute_stats.py` reports such drift and rebuilds the tables.
+"""
+
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.repositories.catalog_stats import TOTALS, CatalogStatsRepository
+from app.core.config import settings
+
+PENDING_STATS = "pending_catalog_stats"
+
+
+@dataclass
+class StatsDelta:
+    """
+    Changes of one transaction to the catalog statistics.
+    Attributes:
+        totals (dict[str, object]): Delta of each catalog_stats column.
+        product_carts (dict[str, list[int]]): Product id to [carts, units] deltas.
+        cart_rows (dict[str, int]): User id to cart items added minus removed.
+        deleted_products (set[str]): Products whose counters are dropped.
+    """
+
+    totals: dict = field(default_factory=lambda: dict.fromkeys(TOTALS, 0))
+    product_carts: dict = field(default_factory=dict)
+    cart_rows: dict = field(default_factory=dict)
+    deleted_products: set = field(default_factory=set)
+
+
+def _pending(db: Session) -> Optional[StatsDelta]:
+    if not settings.STATS_ENABLED:
+        return None
+    return db.info.setdefault(PENDING_STATS, StatsDelta())
+
+
+def product_changed(
+    db: Session, product_id: str, before: Optional[tuple], after: Optional[tuple]
+) -> None:
+    """
+    Count a product created, updated or deleted in the session's transaction.
+    Args:
+        db (Session): The session making the change.
+        product_id (str): The product.
+        before (Optional[tuple[int, Decimal]]): (stock, price) before the
+            change, None for a new product.
+        after (Optional[tuple[int, Decimal]]): (stock, price) after the
+            change, None for a deleted product.
+    """
+    delta = _pending(db)
+    if delta is None:
+        return
+    totals = delta.totals
+    for sign, state in ((-1, before), (1, after)):
+        if state is None:
+            continue
+        stock, price = state
+        totals["products"] += sign
+        totals["out_of_stock"] += sign * (stock <= 0)
+        totals["stock_units"] += sign * stock
+        totals["inventory_value"] += sign * stock * Decimal(str(price))
+    if after is None:
+        delta.deleted_products.add(str(product_id))
+
+
+def cart_item_changed(db: Session, user_id: str, product_id: str, before: int, after: int) -> None:
+    """
+    Count a cart item added, updated or removed in the session's transaction.
+    Args:
+        db (Session): The session making the change.
+        user_id (str): Owner of the cart.
+        product_id (str): The product in the cart item.
+        before (int): Quantity before the change, 0 for a new item.
+        after (int): Quantity after the change, 0 for a removed item.
+    """
+    delta = _pending(db)
+    if delta is None:
+        return
+    rows = (after > 0) - (before > 0)
+    delta.totals["cart_items"] += rows
+    delta.totals["cart_units"] += after - before
+    counters = delta.product_carts.setdefault(str(product_id), [0, 0])
+    counters[0] += rows
+    counters[1] += after - before
+    if rows:
+        user_id = str(user_id)
+        delta.cart_rows[user_id] = delta.cart_rows.get(user_id, 0) + rows
+
+
+def cart_cleared(db: Session, user_id: str, items) -> None:
+    """
+    Count a user's cart emptied in the session's transaction, like removing
+    each of its items.
+    Args:
+        db (Session): The session making the change.
+        user_id (str): Owner of the cart.
+        items (Iterable[Row]): (product_id, quantity) of the removed items.
+    """
+    for item in items:
+        cart_item_changed(db, user_id, item.product_id, item.quantity, 0)
+
+
+def write(db: Session, delta: StatsDelta) -> None:
+    """Apply the changes of a transaction to the counters, in that transaction."""
+    repository = CatalogStatsRepository(db)
+    totals = dict(delta.totals)
+    if delta.cart_rows:
+        totals["active_carts"] += repository.active_cart_change(delta.cart_rows)
+    if any(totals.values()):
+        repository.add_totals(random.randrange(max(settings.STATS_SHARDS, 1)), totals)
+    product_carts = {
+        product_id: counters
+        for product_id, counters in delta.product_carts.items()
+        if product_id not in delta.deleted_products
+    }
+    repository.add_product_carts(product_carts)
+    if delta.deleted_products:
+        repository.delete_product_carts(sorted(delta.deleted_products))
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_stats(session: Session) -> None:
+    delta = session.info.pop(PENDING_STATS, None)
+    if delta is not None:
+        write(session, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_stats(session: Session) -> None:
+    session.info.pop(PENDING_STATS, None)
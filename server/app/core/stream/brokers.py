@@ -0,0 +1,123 @@
+"""Brokers carrying stream events between worker processes
+
+A broker only moves events from the worker where a change was committed to
+the other workers; each worker's hub then fans them out to its own clients.
+`MemoryBroker` keeps events inside the process, `SQLiteBroker` shares them
+through a SQLite file that every worker of a host polls, a stand-in for a
+real message broker.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+
+class Broker:
+    """Interface of a stream event broker."""
+
+    # whether other processes can publish to this broker, i.e. whether the
+    # hub has to poll it
+    shared = False
+
+    def publish(self, events: list[dict]) -> None:
+        """Make `events` visible to the other workers."""
+        raise NotImplementedError
+
+    def read(self, after: Optional[int]) -> tuple[int, list[dict]]:
+        """Events published by other processes after position `after`, and the
+        position to read from next. `None` starts at the current end."""
+        raise NotImplementedError
+
+
+class MemoryBroker(Broker):
+    """No fan-out: events reach the clients of the worker that made the change."""
+
+    def publish(self, events):
+        pass
+
+    def read(self, after):
+        return after or 0, []
+
+
+class SQLiteBroker(Broker):
+    """
+    Event log in a SQLite file shared by the workers of one host. Put it on a
+    memory-backed filesystem such as /dev/shm. Rows older than `retention`
+    seconds are pruned as new events are written.
+    Attributes:
+        path (str): Location of the database file.
+        retention (float): Seconds events are kept for slow pollers.
+    """
+
+    shared = True
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, retention: float = 60.0):
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+        self._writes = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stream_events ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, origin INTEGER NOT NULL, "
+                "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # a forked worker must not reuse its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def publish(self, events):
+        if not events:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO stream_events (origin, payload, created_at) VALUES (?, ?, ?)",
+                [(os.getpid(), json.dumps(event), now) for event in events],
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM stream_events WHERE created_at < ?", (now - self.retention,))
+
+    def read(self, after):
+        conn = self._connection()
+        if after is None:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM stream_events").fetchone()[0], []
+        rows = conn.execute(
+            "SELECT seq, origin, payload FROM stream_events WHERE seq > ? ORDER BY seq", (after,)
+        ).fetchall()
+        if not rows:
+            return after, []
+        pid = os.getpid()
+        return rows[-1][0], [json.loads(payload) for _, origin, payload in rows if origin != pid]
+
+
+def create_broker(url: str) -> Broker:
+    """
+    Build the broker named by a URL.
+    Args:
+        url (str): "memory://" or "sqlite:///path/to/file.db".
+    """
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryBroker()
+    if scheme == "sqlite":
+        return SQLiteBroker(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported stream broker URL: {url}")
@@ -0,0 +1,249 @@
+"""Live product updates for server-sent event streams
+
+Writers queue an event per changed product with `publish_after_commit`; once
+the transaction commits, the hub hands the events to every connected client
+of this worker and to the broker, which carries them to the other workers.
+
+Each client has a bounded queue holding at most one pending event per
+product: a newer update replaces the queued one, and events are sent in
+batches at most every `STREAM_COALESCE_WINDOW` seconds, so a burst of stock
+changes costs a slow client one message per product. A client whose queue
+overflows gets a `resync` event instead, telling it to refetch the catalog.
+An idle client costs a small object and a suspended generator, no thread
+and no database connection.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.stream.brokers import Broker, create_broker
+from app.utils.logger import logger
+
+# session.info key collecting the events to publish once the session commits
+PENDING_EVENTS = "stream_events"
+
+READY = "retry: 3000\nevent: ready\ndata: {}\n\n"
+HEARTBEAT = ": ping\n\n"
+RESYNC = {"type": "resync"}
+
+
+class StreamFull(Exception):
+    """Raised when a worker already serves `STREAM_MAX_SUBSCRIBERS` streams."""
+
+
+def product_event(product, deleted: bool = False) -> dict:
+    """The stock and price of a product as a stream event."""
+    return {
+        "type": "product",
+        "id": str(product.id),
+        "stock": None if deleted else product.stock,
+        "price": None if deleted else float(product.price),
+        "deleted": deleted,
+    }
+
+
+def format_event(payload: dict) -> str:
+    return f"event: {payload['type']}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    """
+    One connected client.
+    Attributes:
+        product_ids (Optional[frozenset[str]]): Products the client watches;
+            None for all of them.
+        max_pending (int): Products that may have an event queued at once.
+    """
+
+    __slots__ = ("product_ids", "max_pending", "pending", "overflowed", "_waiter")
+
+    def __init__(self, product_ids: Optional[frozenset], max_pending: int):
+        self.product_ids = product_ids
+        self.max_pending = max_pending
+        self.pending: dict[str, dict] = {}
+        self.overflowed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def push(self, payload: dict) -> bool:
+        """Queue an event; returns whether it replaced a queued one."""
+        key = payload["id"]
+        if self.product_ids is not None and key not in self.product_ids:
+            return False
+        coalesced = key in self.pending
+        if coalesced or len(self.pending) < self.max_pending:
+            self.pending[key] = payload
+        elif not self.overflowed:
+            self.overflowed = True
+            self.pending.clear()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+        return coalesced
+
+    async def get(self, timeout: float, window: float) -> list[dict]:
+        """The queued events, waiting up to `timeout` seconds for the first
+        one and then `window` seconds for more; empty on timeout."""
+        if not self.pending and not self.overflowed:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                self._waiter = None
+            if window:
+                await asyncio.sleep(window)
+        if self.overflowed:
+            self.overflowed = False
+            self.pending.clear()
+            return [RESYNC]
+        events = list(self.pending.values())
+        self.pending.clear()
+        return events
+
+
+class StreamHub:
+    """
+    Fans product events out to the connected clients of this worker.
+    Attributes:
+        broker (Broker): Carries events to and from the other workers.
+        max_subscribers (int): Streams this worker serves at once.
+        max_pending (int): Size of each client's queue, in products.
+    """
+
+    def __init__(self, broker: Broker, max_subscribers: int, max_pending: int):
+        self.broker = broker
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self.subscribers: set[Subscriber] = set()
+        self.published = 0
+        self.coalesced = 0
+        self.resyncs = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._relay: Optional[asyncio.Task] = None
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self, product_ids: Optional[Iterable[str]] = None) -> Subscriber:
+        """Register a client; must be called on the event loop."""
+        if self.full:
+            raise StreamFull()
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(frozenset(product_ids) if product_ids else None, self.max_pending)
+        self.subscribers.add(subscriber)
+        if self.broker.shared and (self._relay is None or self._relay.done()):
+            self._relay = self._loop.create_task(self._poll_broker())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def publish(self, events: list[dict]) -> None:
+        """Send events to the clients of every worker; callable from any thread."""
+        if not events:
+            return
+        self.published += len(events)
+        try:
+            self.broker.publish(events)
+        except Exception as e:
+            logger.error("Stream broker publish failed: %s", e)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # nobody has subscribed in this worker yet
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(events)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events: list[dict]) -> None:
+        for subscriber in list(self.subscribers):
+            was_overflowed = subscriber.overflowed
+            for payload in events:
+                if subscriber.push(payload):
+                    self.coalesced += 1
+            if subscriber.overflowed and not was_overflowed:
+                self.resyncs += 1
+
+    async def _poll_broker(self) -> None:
+        """Relay the other workers' events while this worker has clients."""
+        position = None
+        while self.subscribers:
+            try:
+                position, events = await asyncio.to_thread(self.broker.read, position)
+                if events:
+                    self._dispatch(events)
+            except Exception as e:
+                logger.warning("Stream broker read failed: %s", e)
+            await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
+
+    async def events(self, product_ids: Optional[Iterable[str]] = None) -> AsyncIterator[str]:
+        """The text/event-stream body of one client. Comments keep idle
+        connections open; after `STREAM_MAX_CONNECTION_SECONDS` the stream
+        ends and the client reconnects, possibly to another worker.
+
+        The client is subscribed when the body starts and unsubscribed when it
+        ends, so a client gone before the first chunk never holds a queue."""
+        try:
+            subscriber = self.subscribe(product_ids)
+        except StreamFull:
+            # filled up since the endpoint checked; an empty body makes the client retry
+            return
+        loop = asyncio.get_running_loop()
+        deadline = (
+            loop.time() + settings.STREAM_MAX_CONNECTION_SECONDS
+            if settings.STREAM_MAX_CONNECTION_SECONDS
+            else None
+        )
+        try:
+            yield READY
+            while True:
+                timeout = settings.STREAM_HEARTBEAT
+                if deadline is not None:
+                    timeout = min(timeout, deadline - loop.time())
+                    if timeout <= 0:
+                        return
+                batch = await subscriber.get(timeout, settings.STREAM_COALESCE_WINDOW)
+                yield "".join(format_event(payload) for payload in batch) if batch else HEARTBEAT
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def close(self) -> None:
+        if self._relay is not None:
+            self._relay.cancel()
+            self._relay = None
+
+    def publish_after_commit(self, db: Session, events: Iterable[dict]) -> None:
+        """Publish the events once `db` commits; a rollback drops them. Later
+        events for the same product replace earlier ones."""
+        pending = db.info.setdefault(PENDING_EVENTS, {})
+        for payload in events:
+            pending[payload["id"]] = payload
+
+
+stream_hub = StreamHub(
+    broker=create_broker(settings.STREAM_BROKER_URL),
+    max_subscribers=settings.STREAM_MAX_SUBSCRIBERS,
+    max_pending=settings.STREAM_QUEUE_SIZE,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_events(session: Session) -> None:
+    events = session.info.pop(PENDING_EVENTS, None)
+    if events and settings.STREAM_ENABLED:
+        stream_hub.publish(list(events.values()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session: Session) -> None:
+    session.info.pop(PENDING_EVENTS, None)
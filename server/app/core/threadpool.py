@@ -0,0 +1,35 @@
+"""Threadpool of sync endpoints and dependencies
+
+FastAPI runs `def` endpoints and dependencies on AnyIO's default thread
+limiter, 40 threads per worker unless resized. Once every thread is busy,
+further requests wait for one even if the event loop is idle, so the pool
+size bounds the concurrency of sync routes. `configure_threadpool` sizes it
+at startup and keeps a handle on it for the saturation metrics.
+"""
+
+from typing import Optional
+
+from anyio import CapacityLimiter, to_thread
+
+_limiter: Optional[CapacityLimiter] = None
+
+
+def configure_threadpool(size: int) -> None:
+    """Resize the default thread limiter of the running event loop.
+    Must be called from inside the loop, e.g. in the app's lifespan."""
+    global _limiter
+    _limiter = to_thread.current_default_thread_limiter()
+    if size:
+        _limiter.total_tokens = size
+
+
+def threadpool_stats() -> dict[str, int]:
+    """Size, busy threads and tasks waiting for a thread; empty before startup."""
+    if _limiter is None:
+        return {}
+    statistics = _limiter.statistics()
+    return {
+        "size": int(statistics.total_tokens),
+        "busy": statistics.borrowed_tokens,
+        "waiting": statistics.tasks_waiting,
+    }
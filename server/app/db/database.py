@@ -1,32 +1,124 @@
 """The database module"""
 
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from contextlib import contextmanager
+from typing import Annotated, Iterator
+
+from fastapi import Depends
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, declarative_base
 from sqlalchemy import create_engine
 
 from app.core.config import settings
+from app.db import slow_query  # noqa: F401  registers the slow query hooks
+from app.db.instrumentation import enable_raiseload
+from app.db.routing import ReplicaPool, RoutingSession
 from app.utils.logger import logger
 
 DATABASE_URL = settings.database_url
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _create_engine(url: str):
+    """Create an engine, allowing SQLite connections to be shared across threads."""
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+    )
+
+
+engine = _create_engine(DATABASE_URL)
+
+replicas = (
+    ReplicaPool(
+        [_create_engine(url) for url in settings.DATABASE_REPLICA_URLS],
+        max_lag=settings.DATABASE_REPLICA_MAX_LAG,
+        check_interval=settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL,
+    )
+    if settings.DATABASE_REPLICA_URLS
+    else None
+)
+
+# Repositories only flush; the unit of work commits once per request, and
+# objects keep their loaded state after that commit instead of being re-read.
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    replicas=replicas,
+)
 db_session = scoped_session(SessionLocal)
 
 Base = declarative_base()
 
+if settings.DB_RAISELOAD:
+    enable_raiseload()
+
 
 def init_db():
     """Initialize the database by creating all tables defined by Base metadata."""
     return Base.metadata.create_all(bind=engine)
 
 
-def get_db():
-    """Yield a new database session and ensure it's closed after use."""
-    db = db_session()
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """Commit everything done with the session in a single transaction.
+
+    The transaction is rolled back if the block raises, so a multi-step
+    service operation is applied either completely or not at all.
+    """
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+@contextmanager
+def session_scope(autocommit: bool = False) -> Iterator[Session]:
+    """Open a session for scripts and background jobs outside a request.
+
+    Args:
+        autocommit (bool): Commit after every repository write instead of once
+            at the end. Long-running jobs use this to keep transactions short.
+    """
+    db = SessionLocal(info={"autocommit": autocommit})
+    try:
+        with unit_of_work(db):
+            yield db
+    finally:
+        db.close()
+
+
+def get_db():
+    """Yield the request's database session as a unit of work.
+
+    Changes are committed once after the endpoint returns and rolled back if
+    it raises; the session is closed in both cases. Every request gets its
+    own session: FastAPI runs dependencies on any threadpool thread, so a
+    thread-local session would be shared by concurrent requests.
+    """
+    db = SessionLocal()
+    try:
+        with unit_of_work(db):
+            yield db
     except Exception as e:
-        logger.error(f"Database Error: {e}")
+        logger.error("Database Error: %s", e)
         raise
     finally:
         db.close()
+
+
+def get_read_db(db: Annotated[Session, Depends(get_db)]):
+    """Yield the request's database session with read-replica routing enabled.
+
+    Meant for GET endpoints: reads made through `read_only` repository
+    methods may be served by a replica, everything else stays on the primary.
+    """
+    db.info["use_replicas"] = True
+    try:
+        yield db
+    finally:
+        db.info.pop("use_replicas", None)
@@ -0,0 +1,178 @@
+"""SQL statement instrumentation
+
+Counts the statements and database time spent per request, enforces the
+per-endpoint query budgets from `Settings`, tracks how often SQLAlchemy's
+compiled statement cache is hit and optionally turns relationship lazy loads
+into errors so N+1 patterns surface during development.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+from app.core.config import settings
+from app.utils.logger import logger
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a request runs more statements than its budget allows."""
+
+
+class QueryStats:
+    """
+    Statement count and database time collected for one unit of work.
+    Attributes:
+        count (int): Number of statements executed.
+        duration (float): Total time spent executing them, in seconds.
+        scope (dict | None): ASGI scope of the request being tracked, if any.
+    """
+
+    __slots__ = ("count", "duration", "scope", "warned")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.scope = scope
+        self.warned = False
+
+    @property
+    def endpoint(self) -> str:
+        """The "<METHOD> <route path>" label of the tracked request."""
+        if not self.scope:
+            return "<untracked>"
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "")
+        return f"{self.scope.get('method', '')} {path}"
+
+    @property
+    def budget(self) -> int:
+        """Statements allowed for the tracked endpoint (0 means unlimited)."""
+        return settings.QUERY_BUDGETS.get(self.endpoint, settings.QUERY_BUDGET)
+
+
+class StatementCacheStats:
+    """
+    Process-wide counters of compiled statement cache lookups.
+    Attributes:
+        hits (int): Statements whose compiled form came from the cache.
+        misses (int): Statements compiled and then stored in the cache.
+        uncached (int): Statements that cannot be cached (DDL, raw SQL).
+    """
+
+    __slots__ = ("hits", "misses", "uncached")
+
+    def __init__(self):
+        self.reset()
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of cacheable statements served from the cache."""
+        cacheable = self.hits + self.misses
+        return self.hits / cacheable if cacheable else 0.0
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Get the statistics of the unit of work currently being tracked."""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(scope: Optional[dict] = None) -> Iterator[QueryStats]:
+    """Collect statement statistics for everything run inside the block.
+
+    Args:
+        scope (dict | None): ASGI scope used to resolve the endpoint budget.
+
+    Yields:
+        QueryStats: The statistics, updated as statements execute.
+    """
+    stats = QueryStats(scope)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def check_budget(stats: QueryStats) -> None:
+    """Warn about (or reject) a request that went over its query budget."""
+    budget = stats.budget
+    if not budget or stats.count <= budget:
+        return
+
+    message = (
+        f"{stats.endpoint} ran {stats.count} SQL statements "
+        f"(budget {budget}, {stats.duration * 1000:.1f}ms in the database)"
+    )
+    if settings.QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    if not stats.warned:
+        stats.warned = True
+        logger.warning("Query budget exceeded: %s", message)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+
+    stats.count += 1
+    if settings.QUERY_BUDGET_MODE == "raise":
+        check_budget(stats)
+    if context is not None:
+        context._query_started_at = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    cache_hit = getattr(context, "cache_hit", None)
+    if cache_hit is CACHE_HIT:
+        statement_cache_stats.hits += 1
+    elif cache_hit is CACHE_MISS:
+        statement_cache_stats.misses += 1
+    else:
+        statement_cache_stats.uncached += 1
+
+    stats = _current_stats.get()
+    if stats is None:
+        return
+
+    started = getattr(context, "_query_started_at", None)
+    if started is not None:
+        stats.duration += perf_counter() - started
+
+
+def raiseload_relationships(state: ORMExecuteState) -> None:
+    """Apply `raiseload("*")` to every top-level ORM select.
+
+    Any relationship that is not explicitly eager-loaded then raises on
+    access instead of silently issuing another query.
+    """
+    if state.is_select and not state.is_column_load and not state.is_relationship_load:
+        state.statement = state.statement.options(raiseload("*"))
+
+
+def enable_raiseload() -> None:
+    """Make relationship lazy loads raise for all sessions (development aid)."""
+    if not event.contains(Session, "do_orm_execute", raiseload_relationships):
+        event.listen(Session, "do_orm_execute", raiseload_relationships)
@@ -0,0 +1,162 @@
+"""Read-replica routing for database sessions"""
+
+import itertools
+import math
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.utils.logger import logger
+
+# set while a repository method marked with `read_only` is running
+_replica_read: ContextVar[bool] = ContextVar("replica_read", default=False)
+
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+
+def read_only(func: Callable) -> Callable:
+    """Mark a repository method as safe to serve from a read replica.
+
+    The mark only takes effect in sessions that opted into replica routing
+    (see `app.db.database.get_read_db`) and have not written anything yet.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_read.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_read.reset(token)
+
+    return wrapper
+
+
+def replication_lag(engine: Engine) -> float:
+    """Return how many seconds a replica is behind its primary.
+
+    Only PostgreSQL exposes replication state; other backends (e.g. two local
+    SQLite files used for testing) are reported as fully caught up.
+    """
+    if engine.dialect.name != "postgresql":
+        return 0.0
+
+    with engine.connect() as conn:
+        lag = conn.execute(POSTGRES_LAG_QUERY).scalar()
+    return float(lag or 0)
+
+
+class ReplicaPool:
+    """
+    Round-robin selection over replica engines with lag-aware fallback.
+    Lag is probed at most once per `check_interval` seconds per replica.
+    Attributes:
+        engines (List[Engine]): The replica engines.
+        max_lag (float): Replicas lagging more than this many seconds are skipped.
+        check_interval (float): How long a lag measurement is trusted.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        max_lag: float,
+        check_interval: float,
+        lag_probe: Callable[[Engine], float] = replication_lag,
+    ):
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self._lags: dict[Engine, tuple[float, float]] = {}
+        self._cycle = itertools.cycle(range(len(self.engines)))
+        self._lock = threading.Lock()
+
+    def lag(self, engine: Engine) -> float:
+        """Get the (cached) replication lag of a replica in seconds.
+
+        A replica whose probe fails is treated as infinitely behind.
+        """
+        now = time.monotonic()
+        cached = self._lags.get(engine)
+        if cached and now - cached[1] < self.check_interval:
+            return cached[0]
+
+        try:
+            lag = self.lag_probe(engine)
+        except Exception as e:
+            logger.warning("Replica lag check failed for %r: %s", engine.url, e)
+            lag = math.inf
+
+        self._lags[engine] = (lag, now)
+        return lag
+
+    def choose(self) -> Optional[Engine]:
+        """Pick the next replica that is within the lag budget.
+
+        Returns:
+            Optional[Engine]: A replica engine, or None if the primary should be used.
+        """
+        for _ in range(len(self.engines)):
+            with self._lock:
+                engine = self.engines[next(self._cycle)]
+            if self.lag(engine) <= self.max_lag:
+                return engine
+        return None
+
+    def dispose(self) -> None:
+        """Dispose the connection pools of all replicas."""
+        for engine in self.engines:
+            engine.dispose()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends replica-safe reads to a read replica.
+
+    A read is routed to a replica only when all of the following hold:
+    the session opted in through `info["use_replicas"]`, the query runs inside
+    a `read_only` repository method, and the session has not flushed any
+    writes (so a request always reads its own writes from the primary).
+    Everything else goes to the primary engine the session is bound to.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaPool] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if (
+            self.replicas is not None
+            and self.info.get("use_replicas")
+            and _replica_read.get()
+            and not self._flushing
+            and not self.info.get("has_writes")
+            and getattr(clause, "is_select", False)
+        ):
+            replica = self.replicas.choose()
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def close(self) -> None:
+        super().close()
+        self.info.pop("has_writes", None)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary(session: Session, flush_context) -> None:
+    """Keep the rest of the session on the primary once it has written."""
+    session.info["has_writes"] = True
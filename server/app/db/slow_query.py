@@ -0,0 +1,256 @@
+"""Slow query log
+
+Statements slower than `SLOW_QUERY_THRESHOLD_MS` are written as JSON lines to
+a dedicated rotating log and aggregated per normalized statement shape, so the
+worst offenders can be listed through the admin API. When `SLOW_QUERY_EXPLAIN`
+is on, the plan of each shape is captured once by a background thread on its
+own connection, keeping EXPLAIN off the request path and out of its
+transaction.
+"""
+
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.utils.logger import file_handler, log_pipeline, logger
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN (ANALYZE off) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape: literals and placeholder lists collapsed."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(?, ...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def parameters_shape(parameters: Any, executemany: bool = False) -> str:
+    """Describe bound parameters by type only, never by value."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return f"{len(parameters)} x {parameters_shape(first)}"
+    if isinstance(parameters, dict):
+        return ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items())
+    if isinstance(parameters, (list, tuple)):
+        return ", ".join(type(value).__name__ for value in parameters)
+    return type(parameters).__name__
+
+
+def calling_method() -> str:
+    """Find the application method that issued the current statement.
+
+    Repository methods are reported with their concrete class, e.g.
+    `ProductRepository.get` even though `get` lives on `BaseRepository`.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and not module.startswith("app.db"):
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class SlowQueryShape:
+    """
+    Aggregated timings of one normalized statement shape.
+    Attributes:
+        sql (str): The normalized statement.
+        params_shape (str): Types of the bound parameters.
+        origin (str): The application method that issued it.
+        count (int): How many slow executions were recorded.
+        total_ms (float): Summed duration of those executions.
+        max_ms (float): The slowest execution.
+        plan (str | None): Captured EXPLAIN output, if enabled.
+    """
+
+    def __init__(self, sql: str, params_shape: str, origin: str):
+        self.sql = sql
+        self.params_shape = params_shape
+        self.origin = origin
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen: Optional[datetime] = None
+        self.plan: Optional[str] = None
+
+    def to_dict(self):
+        return {
+            "sql": self.sql,
+            "params_shape": self.params_shape,
+            "origin": self.origin,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_seen": self.last_seen,
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    """
+    Collector for slow statements.
+    Attributes:
+        max_shapes (int): Maximum number of statement shapes kept in memory.
+    """
+
+    def __init__(self, max_shapes: int):
+        self.max_shapes = max_shapes
+        self._shapes: dict[str, SlowQueryShape] = {}
+        self._lock = threading.Lock()
+        self._file_logger: Optional[logging.Logger] = None
+        self._explain_queue: Optional[queue.Queue] = None
+
+    def record(
+        self,
+        engine: Engine,
+        statement: str,
+        parameters: Any,
+        duration_ms: float,
+        executemany: bool = False,
+    ) -> SlowQueryShape:
+        """Record one slow execution and log it."""
+        sql = normalize_sql(statement)
+        shape_of_params = parameters_shape(parameters, executemany)
+        origin = calling_method()
+
+        with self._lock:
+            shape = self._shapes.get(sql)
+            is_new = shape is None
+            if is_new:
+                if len(self._shapes) >= self.max_shapes:
+                    cheapest = min(self._shapes, key=lambda key: self._shapes[key].total_ms)
+                    del self._shapes[cheapest]
+                shape = self._shapes[sql] = SlowQueryShape(sql, shape_of_params, origin)
+            shape.count += 1
+            shape.total_ms += duration_ms
+            shape.max_ms = max(shape.max_ms, duration_ms)
+            shape.last_seen = datetime.now(timezone.utc)
+
+        self._log(
+            {
+                "sql": sql,
+                "params_shape": shape_of_params,
+                "origin": origin,
+                "duration_ms": round(duration_ms, 3),
+            }
+        )
+
+        if is_new and settings.SLOW_QUERY_EXPLAIN and not executemany:
+            self._enqueue_explain(engine, shape, statement, parameters)
+
+        return shape
+
+    def top(self, limit: int = 10) -> List[SlowQueryShape]:
+        """Get the statement shapes with the highest total time."""
+        with self._lock:
+            shapes = list(self._shapes.values())
+        return sorted(shapes, key=lambda shape: shape.total_ms, reverse=True)[:limit]
+
+    def clear(self) -> None:
+        """Forget all recorded statement shapes."""
+        with self._lock:
+            self._shapes.clear()
+
+    def explain(self, engine: Engine, shape: SlowQueryShape, statement: str, parameters: Any) -> None:
+        """Capture the plan of a statement on a separate connection."""
+        prefix = EXPLAIN_PREFIXES.get(engine.dialect.name)
+        if prefix is None:
+            return
+
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+                conn.rollback()
+        except Exception as e:
+            logger.warning("Could not EXPLAIN slow query from %s: %s", shape.origin, e)
+            return
+
+        shape.plan = "\n".join(" | ".join(str(column) for column in row) for row in rows)
+        self._log({"sql": shape.sql, "origin": shape.origin, "plan": shape.plan})
+
+    def wait_for_explains(self) -> None:
+        """Block until queued EXPLAIN captures are done."""
+        if self._explain_queue is not None:
+            self._explain_queue.join()
+
+    def _enqueue_explain(self, engine, shape, statement, parameters) -> None:
+        if self._explain_queue is None:
+            with self._lock:
+                if self._explain_queue is None:
+                    self._explain_queue = queue.Queue(maxsize=100)
+                    threading.Thread(
+                        target=self._explain_worker, name="slow-query-explain", daemon=True
+                    ).start()
+        try:
+            self._explain_queue.put_nowait((engine, shape, statement, parameters))
+        except queue.Full:
+            pass
+
+    def _explain_worker(self) -> None:
+        while True:
+            engine, shape, statement, parameters = self._explain_queue.get()
+            try:
+                self.explain(engine, shape, statement, parameters)
+            finally:
+                self._explain_queue.task_done()
+
+    def _log(self, entry: dict) -> None:
+        if self._file_logger is None:
+            self._file_logger = _create_file_logger(settings.SLOW_QUERY_LOG_FILE)
+        entry["time"] = datetime.now(timezone.utc).isoformat()
+        self._file_logger.warning(json.dumps(entry, default=str))
+
+
+def _create_file_logger(path: str) -> logging.Logger:
+    """Create the logger writing slow queries to their own rotating file,
+    through the background log writer."""
+    file_logger = logging.getLogger("app.slow_queries")
+    file_logger.propagate = False
+    file_logger.setLevel(logging.WARNING)
+    log_pipeline.attach(file_logger, file_handler(path, formatter=logging.Formatter("%(message)s")))
+    return file_logger
+
+
+slow_query_log = SlowQueryLog(max_shapes=settings.SLOW_QUERY_MAX_SHAPES)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_started_at = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started_at", None)
+    if started is None:
+        return
+
+    duration_ms = (perf_counter() - started) * 1000
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold > 0 and duration_ms >= threshold and not statement.startswith("EXPLAIN"):
+        slow_query_log.record(conn.engine, statement, parameters, duration_ms, executemany)
@@ -0,0 +1,346 @@
+"""Preforking production launcher
+
+The parent process imports and warms the app once, then forks the workers,
+which share the parent's listening socket. Workers start in milliseconds
+because they inherit the imported modules, the configured mappers and the
+prebuilt OpenAPI schema. `gc.freeze()` keeps the collector from touching
+(and so copying) the inherited objects. Dead workers are replaced by a fresh
+fork, and `kill -TTIN`/`-TTOU <parent pid>` adds or removes one worker.
+
+    python -m app.launcher --port 7001 --workers 4
+
+Every option defaults to the matching SERVER_* setting; `--workers 0` (the
+default) starts one worker per available CPU. uvloop and httptools are used
+when installed.
+
+Development should keep using `uvicorn app.main:app --reload`.
+"""
+
+import argparse
+import gc
+import importlib
+import importlib.util
+import math
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Optional
+
+import uvicorn
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server that reports how long a forked worker took to be ready."""
+
+    def __init__(self, config: uvicorn.Config, forked_at: float):
+        super().__init__(config)
+        self.forked_at = forked_at
+
+    async def startup(self, sockets: Optional[list[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        from app.utils.logger import logger
+
+        logger.info(
+            "Worker %s ready %.1fms after fork", os.getpid(), (time.perf_counter() - self.forked_at) * 1000
+        )
+
+
+def load_app(target: str):
+    """Import the ASGI app given as "module:attribute" and time the import."""
+    started = time.perf_counter()
+    module_name, _, attribute = target.partition(":")
+    app = getattr(importlib.import_module(module_name), attribute)
+    return app, (time.perf_counter() - started) * 1000
+
+
+def warm_up(app) -> float:
+    """Do the one-off work every worker would otherwise repeat: build the
+    OpenAPI schema and configure the SQLAlchemy mappers."""
+    from sqlalchemy.orm import configure_mappers
+
+    started = time.perf_counter()
+    configure_mappers()
+    app.openapi()
+    return (time.perf_counter() - started) * 1000
+
+
+def before_fork() -> None:
+    """Release what must not be shared with children: pooled database
+    connections, the threads of the log writer and buffered output."""
+    from app.db.database import engine, replicas
+    from app.utils.logger import log_pipeline
+
+    engine.dispose()
+    if replicas is not None:
+        replicas.dispose()
+    log_pipeline.stop()
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+
+def after_fork() -> None:
+    from app.utils.logger import log_pipeline
+
+    log_pipeline.restart()
+
+
+def clear_metrics_snapshots() -> None:
+    """Remove the snapshots of a previous run, whose pids may be reused."""
+    from app.core.config import settings
+
+    if not settings.METRICS_MULTIPROC_DIR or not os.path.isdir(settings.METRICS_MULTIPROC_DIR):
+        return
+    for name in os.listdir(settings.METRICS_MULTIPROC_DIR):
+        if name.startswith("metrics-") and name.endswith(".json"):
+            os.remove(os.path.join(settings.METRICS_MULTIPROC_DIR, name))
+
+
+class Launcher:
+    """
+    Forks and supervises the workers of one warmed-up app.
+    Attributes:
+        config (uvicorn.Config): Server settings shared by every worker.
+        workers (int): Number of workers to keep running.
+    """
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.children: set[int] = set()
+        self.socket: Optional[socket.socket] = None
+        self._retiring: set[int] = set()
+        self._stopping = False
+        self._wakeup: Optional[tuple[int, int]] = None
+
+    def spawn(self) -> None:
+        before_fork()
+        forked_at = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(forked_at)
+        after_fork()
+        self.children.add(pid)
+
+    def _run_worker(self, forked_at: float) -> None:
+        """Serve in the forked child until told to stop; never returns."""
+        from app.utils.logger import log_pipeline, logger
+
+        code = 0
+        try:
+            # the parent's signal plumbing is not the worker's
+            signal.set_wakeup_fd(-1)
+            for fd in self._wakeup:
+                os.close(fd)
+            # uvicorn installs its own SIGINT/SIGTERM handlers once serving
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            for signum in (signal.SIGTTIN, signal.SIGTTOU):
+                signal.signal(signum, signal.SIG_IGN)
+            after_fork()
+            WorkerServer(self.config, forked_at).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %s failed", os.getpid())
+            code = 1
+        finally:
+            log_pipeline.stop()
+            os._exit(code)
+
+    def run(self) -> None:
+        from app.utils.logger import logger
+
+        self.socket = self.config.bind_socket()
+        clear_metrics_snapshots()
+        # everything allocated so far is shared with the workers; keep the
+        # collector from writing to those pages in every child
+        gc.collect()
+        gc.freeze()
+
+        # signal handlers only record what to do; every signal, SIGCHLD
+        # included, also writes to the wakeup pipe so the loop below acts on it
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTTIN, self._scale)
+        signal.signal(signal.SIGTTOU, self._scale)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+        started = time.perf_counter()
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info("Forked %s workers in %.1fms", self.workers, (time.perf_counter() - started) * 1000)
+
+        terminated = False
+        while True:
+            self._reap()
+            if self._stopping:
+                if not terminated:
+                    self._terminate(self.children)
+                    terminated = True
+                if not self.children:
+                    break
+            else:
+                self._adjust()
+            self._sleep()
+        logger.info("All workers stopped")
+
+    def _reap(self) -> None:
+        """Collect every exited worker without blocking."""
+        from app.utils.logger import logger
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.children.discard(pid)
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+            elif not self._stopping:
+                logger.warning("Worker %s exited with status %s, starting a new one", pid, status)
+
+    def _adjust(self) -> None:
+        """Fork or retire workers until `workers` of them are serving."""
+        serving = self.children - self._retiring
+        for _ in range(self.workers - len(serving)):
+            self.spawn()
+        surplus = sorted(serving)[: max(len(serving) - self.workers, 0)]
+        self._retiring.update(surplus)
+        self._terminate(surplus)
+
+    def _terminate(self, pids) -> None:
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _sleep(self, timeout: float = 1.0) -> None:
+        """Wait for a signal, or at most `timeout` seconds."""
+        try:
+            select.select([self._wakeup[0]], [], [], timeout)
+            while os.read(self._wakeup[0], 64):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _scale(self, signum, frame) -> None:
+        if signum == signal.SIGTTIN:
+            self.workers += 1
+        elif self.workers > 1:
+            self.workers -= 1
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: its affinity mask, capped by a cgroup v2
+    CPU quota when running in a container."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_config(app, args: argparse.Namespace) -> uvicorn.Config:
+    """uvicorn settings of every worker: uvloop and httptools when they are
+    installed, and the timeouts and limits given on the command line."""
+    return uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        lifespan="on",
+        timeout_keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        limit_concurrency=args.limit_concurrency,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+    )
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="app.main:app", help="ASGI app as module:attribute")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS, help="0 starts one per available CPU"
+    )
+    parser.add_argument(
+        "--keep-alive", type=int, default=settings.SERVER_KEEP_ALIVE, help="Seconds idle connections stay open"
+    )
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG, help="Listen queue length")
+    parser.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=settings.SERVER_LIMIT_CONCURRENCY,
+        help="Connections per worker before answering 503",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=settings.SERVER_GRACEFUL_TIMEOUT,
+        help="Seconds in-flight requests get to finish on shutdown",
+    )
+    parser.add_argument(
+        "--threadpool-size",
+        type=int,
+        default=settings.SERVER_THREADPOOL_SIZE,
+        help="Threads per worker for sync endpoints",
+    )
+    parser.add_argument(
+        "--access-log", action=argparse.BooleanOptionalAction, default=settings.SERVER_ACCESS_LOG
+    )
+    args = parser.parse_args(argv)
+    if args.workers <= 0:
+        args.workers = available_cpus()
+    # read by the app's lifespan in every worker
+    settings.SERVER_THREADPOOL_SIZE = args.threadpool_size
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = parse_args(argv)
+    app, import_ms = load_app(args.app)
+    warm_up_ms = warm_up(app)
+    from app.utils.logger import logger
+
+    config = server_config(app, args)
+    logger.info("Imported %s in %.1fms, warmed up in %.1fms", args.app, import_ms, warm_up_ms)
+    logger.info(
+        "Serving on %s:%s with %s workers (%s, %s), %s threads each",
+        args.host,
+        args.port,
+        args.workers,
+        config.loop,
+        config.http,
+        args.threadpool_size,
+    )
+    Launcher(config, workers=args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,25 @@
-import uvicorn
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, status
+from fastapi import Depends, FastAPI, status
 from fastapi import HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import IntegrityError
 from starlette.middleware.sessions import SessionMiddleware
 
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-
 from app.core.config import settings
+from app.core.dependencies.rate_limit import rate_limit
+from app.core.dependencies.security import verify_metrics_token
+from app.core.health import readiness_check
+from app.core.metrics import registry as metrics_registry
+from app.core.middleware.compression import CompressionMiddleware
+from app.core.middleware.metrics import MetricsMiddleware
+from app.core.middleware.profiler import ProfilerMiddleware
+from app.core.middleware.query_stats import QueryStatsMiddleware
+from app.core.outbox.relay import outbox_relay
+from app.core.stream.hub import stream_hub
+from app.core.threadpool import configure_threadpool
 from app.utils.logger import logger
 from app.api.v1 import main_router
 
@@ -20,12 +27,17 @@ from app.api.v1 import main_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Application started")
+    configure_threadpool(settings.SERVER_THREADPOOL_SIZE)
+    metrics_registry.start()
+    if settings.OUTBOX_ENABLED:
+        outbox_relay.start()
     yield
+    outbox_relay.stop()
+    await stream_hub.close()
+    metrics_registry.stop()
     logger.info("Application shutdown")
 
 
-limiter = Limiter(key_func=get_remote_address)
-
 app = FastAPI(
     title="Kenkeputa Micro-Commerce Backend",
     description="The backend server powering the Kenkeputa Micro-Commerce App",
@@ -37,9 +49,6 @@ app = FastAPI(
 
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 app.add_middleware(
     CORSMiddleware,
@@ -48,12 +57,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilerMiddleware)
+# added last, so outermost: it sees the compressed bytes and every middleware's time
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(main_router)
 
 
-@app.get("/", tags=["Home"])
-@limiter.limit("5/minute")
+@app.get("/", tags=["Home"], dependencies=[Depends(rate_limit("root"))])
 async def get_root(request: Request) -> dict:
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -66,12 +79,40 @@ async def probe():
     return {"message": "I am the Kenkeputa Micro-Commerce API responding"}
 
 
+@app.get("/health/live", tags=["Home"])
+async def liveness():
+    """Liveness probe: the worker's event loop answers. Never touches the
+    database, so a database outage does not get healthy workers restarted."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Home"])
+async def readiness():
+    """Readiness probe: 503 while the database is unreachable or the worker's
+    connection pool or threadpool is saturated, so traffic is routed elsewhere."""
+    ready, report = await readiness_check.check()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=report,
+    )
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+def metrics():
+    """Prometheus scrape endpoint, for scrapers holding METRICS_TOKEN."""
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 # REGISTER EXCEPTION HANDLERS
 @app.exception_handler(HTTPException)
 async def http_exception(request: Request, exc: HTTPException):
     """HTTP exception handler"""
 
-    logger.error(f"HTTP Exception occured; {exc}")
+    # client errors are routine (bad tokens, missing items); only 5xx are errors
+    level = logging.ERROR if exc.status_code >= 500 else logging.INFO
+    logger.log(level, "HTTP Exception occured; %s %s: %s", request.method, request.url.path, exc)
 
     return JSONResponse(
         status_code=exc.status_code,
@@ -80,6 +121,7 @@ async def http_exception(request: Request, exc: HTTPException):
             "status_code": exc.status_code,
             "message": exc.detail,
         },
+        headers=exc.headers,
     )
 
 
@@ -92,7 +134,7 @@ async def validation_exception(request: Request, exc: RequestValidationError):
         for error in exc.errors()
     ]
 
-    logger.error(f"Validation Exception occured; {errors}")
+    logger.info("Validation Exception occured; %s %s: %s", request.method, request.url.path, errors)
 
     return JSONResponse(
         status_code=422,
@@ -109,7 +151,7 @@ async def validation_exception(request: Request, exc: RequestValidationError):
 async def integrity_exception(request: Request, exc: IntegrityError):
     """Integrity error exception handlers"""
 
-    logger.error(f"Integrity Exception occured; {exc}")
+    logger.warning("Integrity Exception occured; %s", exc)
 
     return JSONResponse(
         status_code=400,
@@ -125,7 +167,7 @@ async def integrity_exception(request: Request, exc: IntegrityError):
 async def exception(request: Request, exc: Exception):
     """Other exception handlers"""
 
-    logger.error(f"Exception occured; {exc}")
+    logger.error("Exception occured; %s", exc, exc_info=exc)
 
     return JSONResponse(
         status_code=500,
@@ -137,26 +179,9 @@ async def exception(request: Request, exc: Exception):
     )
 
 
-@app.exception_handler(RateLimitExceeded)
-async def custom_rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    """Rate limit exceeded exception handler"""
-
-    logger.error(f"Rate limit exceeded! {exc}")
-
-    return JSONResponse(
-        status_code=429,
-        content={
-            "status": False,
-            "status_code": exc.status_code,
-            "message": "Too many requests. Please try again in 60 seconds.",
-        },
-    )
-
-
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        port=7001,
-        reload=True,
-        workers=4,
-    )
+    # Development server with auto-reload (reload cannot be combined with
+    # workers); production runs the preforking launcher: python -m app.launcher
+    import uvicorn
+
+    uvicorn.run("app.main:app", port=7001, reload=True)
@@ -1,56 +1,225 @@
+"""Application logging
+
+Request threads only put records on a queue (`QueueHandler`); a single
+`QueueListener` thread formats them and does the file and console I/O,
+including compressing rotated files. Records below WARNING are sampled per
+call site (`LOG_INFO_PER_SECOND`), so a hot endpoint cannot flood the logs.
+"""
+
+import atexit
+import copy
+import gzip
+import json
 import logging
+import os
+import queue
+import shutil
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
-def setup_logger(log_dir: str = "logs") -> logging.Logger:
-    # Create logs directory if it doesn't exist
-    Path(log_dir).mkdir(exist_ok=True)
-    
-    # Configure the logger
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
-    
-    # Log format
-    log_format = logging.Formatter(
-        "[%(asctime)s] - %(levelname)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    
-    # File handler with rotation (10MB max size, keep 5 backup files)
-    file_handler = RotatingFileHandler(
-        f"{log_dir}/app.log",
-        maxBytes=10_000_000,
-        backupCount=5
-    )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(log_format)
-    
-    # Error file handler
-    error_handler = RotatingFileHandler(
-        f"{log_dir}/error.log",
-        maxBytes=10_000_000,
-        backupCount=5
+from app.core.config import settings
+
+TEXT_FORMAT = "[%(asctime)s] - %(levelname)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# attributes every LogRecord has; anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the time, level, logger, message and
+    any fields passed with `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as plain, gzip.open(dest, "wb") as compressed:
+        shutil.copyfileobj(plain, compressed)
+    os.remove(source)
+
+
+class CompressedRotatingFileHandler(RotatingFileHandler):
+    """`RotatingFileHandler` that gzips rotated files (`app.log.1.gz`, ...).
+    It runs on the listener thread, so compressing never blocks a request."""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, compress=True):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, delay=True)
+        if compress:
+            self.namer = lambda name: f"{name}.gz"
+            self.rotator = _gzip_rotator
+
+
+class InfoSampler(logging.Filter):
+    """
+    Pass at most `per_second` records below WARNING per call site each
+    second; WARNING and above always pass. 0 disables sampling.
+    Attributes:
+        dropped (int): Records dropped so far.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self.dropped = 0
+        self._second = 0
+        self._counts: dict[tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.per_second:
+            return True
+        second = int(record.created)
+        if second != self._second:
+            self._second = second
+            self._counts = {}
+        site = (record.pathname, record.lineno)
+        count = self._counts[site] = self._counts.get(site, 0) + 1
+        if count > self.per_second:
+            self.dropped += 1
+            return False
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    """Merges the arguments into the message before queueing, so the listener
+    never sees objects a request may still change, and keeps the traceback
+    as text for the listener's formatters."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class LogPipeline:
+    """The queue listeners of this process, by logger name, so they can be
+    flushed, stopped at exit and restarted in forked workers, where threads
+    do not survive."""
+
+    def __init__(self):
+        self._listeners: dict[str, QueueListener] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, target: logging.Logger, *handlers: logging.Handler, filters=()) -> QueueListener:
+        """Route `target`'s records through a queue to `handlers`."""
+        records = queue.Queue()
+        queue_handler = _QueueHandler(records)
+        for record_filter in filters:
+            queue_handler.addFilter(record_filter)
+
+        listener = QueueListener(records, *handlers, respect_handler_level=True)
+        with self._lock:
+            previous = self._listeners.pop(target.name, None)
+            for handler in list(target.handlers):
+                target.removeHandler(handler)
+            if previous is not None:
+                _stop(previous)
+            target.addHandler(queue_handler)
+            listener.start()
+            self._listeners[target.name] = listener
+        return listener
+
+    def flush(self) -> None:
+        """Wait until every queued record has been written."""
+        with self._lock:
+            listeners = list(self._listeners.values())
+        for listener in listeners:
+            listener.queue.join()
+
+    def stop(self) -> None:
+        """Write out everything queued and stop the listener threads."""
+        with self._lock:
+            for listener in self._listeners.values():
+                _stop(listener)
+
+    def restart(self) -> None:
+        """Start the listener threads again, e.g. after a fork."""
+        with self._lock:
+            for listener in self._listeners.values():
+                listener._thread = None
+                listener.start()
+
+
+def _stop(listener: QueueListener) -> None:
+    if listener._thread is not None:
+        listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+log_pipeline = LogPipeline()
+atexit.register(log_pipeline.stop)
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JSONFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
+
+def file_handler(path: str, level: int = logging.NOTSET, formatter=None) -> logging.Handler:
+    """Rotating (and compressing) file handler using the LOG_* settings."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    handler = CompressedRotatingFileHandler(
+        path,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        compress=settings.LOG_COMPRESS_ROTATED,
     )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(log_format)
-    
-    # Console handler
+    handler.setLevel(level)
+    handler.setFormatter(formatter or _formatter())
+    return handler
+
+
+info_sampler = InfoSampler(per_second=settings.LOG_INFO_PER_SECOND)
+
+
+def setup_logger(log_dir: str = settings.LOG_DIR) -> logging.Logger:
+    logger = logging.getLogger(__name__)
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
+
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(log_format)
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(error_handler)
-    logger.addHandler(console_handler)
-    
+    console_handler.setFormatter(_formatter())
+
+    log_pipeline.attach(
+        logger,
+        file_handler(f"{log_dir}/app.log"),
+        file_handler(f"{log_dir}/error.log", level=logging.ERROR),
+        console_handler,
+        filters=[info_sampler],
+    )
     return logger
 
+
 logger = setup_logger()
 
-# Usage example:
-# logger.debug("Debug message")
-# logger.info("Info message")
-# logger.warning("Warning message")
-# logger.error("Error message")
-# logger.critical("Critical message")
\ No newline at end of file
+# Usage: pass arguments instead of formatting, so messages that are filtered
+# out or sampled away are never formatted.
+# logger.info("Creating product with name: %s", name)
+# logger.error("Error creating product: %s", e)
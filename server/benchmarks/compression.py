@@ -0,0 +1,80 @@
+"""CPU time versus response size for each compression level
+
+Compresses a product list page as the API serializes it and reports, per
+encoding and level, the time per response, the compressed size and the
+ratio. The last line shows what a `compressed_body_cache` hit costs instead.
+
+    poetry run python -m benchmarks.compression --page-size 100
+"""
+
+import argparse
+from decimal import Decimal
+
+from benchmarks.common import configure_environment, time_per_call
+
+configure_environment()
+
+from uuid_extensions import uuid7  # noqa: E402
+
+from app.api.v1.products.schemas import ProductListResponse, ProductResponseData  # noqa: E402
+from app.core.middleware.compression import (  # noqa: E402
+    CompressedBodyCache,
+    _compress,
+    brotli,
+)
+
+
+def product_page(page_size: int) -> bytes:
+    items = [
+        ProductResponseData(
+            id=str(uuid7()),
+            name=f"Product {i}",
+            description=f"A sturdy everyday item, model {i}, in several colours.",
+            price=Decimal("19.99") + i,
+            stock=i % 40,
+        )
+        for i in range(page_size)
+    ]
+    return ProductListResponse(
+        status_code=200,
+        message="Products retrieved successfully",
+        data={
+            "total_items": page_size * 10,
+            "total_pages": 10,
+            "current_page": 1,
+            "page_size": page_size,
+            "items": items,
+        },
+    ).model_dump_json().encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=100, help="Products in the list page")
+    parser.add_argument("--number", type=int, default=200, help="Compressions per timing run")
+    args = parser.parse_args()
+
+    body = product_page(args.page_size)
+    levels = [("gzip", level) for level in range(1, 10)]
+    if brotli is not None:
+        levels += [("br", quality) for quality in range(0, 12)]
+    else:
+        print("brotli is not installed; only gzip is measured\n")
+
+    print(f"uncompressed body: {len(body)} bytes\n")
+    print(f"{'encoding':<10}{'level':>6}{'µs':>10}{'bytes':>9}{'ratio':>8}")
+    for encoding, level in levels:
+        # the slowest brotli qualities are far too slow to repeat as often
+        number = max(1, args.number // 20) if encoding == "br" and level >= 10 else args.number
+        elapsed = time_per_call(lambda: _compress(body, encoding, level), number=number)
+        size = len(_compress(body, encoding, level))
+        print(f"{encoding:<10}{level:>6}{elapsed:>10.1f}{size:>9}{len(body) / size:>7.1f}x")
+
+    cache = CompressedBodyCache(max_entries=16)
+    cache.compress(body, "gzip", 6)
+    hit = time_per_call(lambda: cache.compress(body, "gzip", 6), number=args.number)
+    print(f"\ncached gzip body (digest lookup): {hit:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""End-to-end HTTP load harness
+
+Boots the app against a local database, seeds it, and replays a weighted mix
+of shopper actions (browse, search, product page, add to cart, update the
+cart, view the cart, log in) from concurrent async clients. Prints RPS and
+p50/p95/p99 latency per endpoint as JSON, and compares them against a stored
+baseline to catch regressions.
+
+    poetry run python -m benchmarks.load --duration 30 --users 50 --save-baseline baseline.json
+    poetry run python -m benchmarks.load --duration 30 --users 50 --baseline baseline.json
+"""
@@ -0,0 +1,215 @@
+"""Run the load harness; see `benchmarks.load` for an overview.
+
+By default the harness seeds a fresh SQLite file and starts the app on it
+with `app.launcher`, with rate limits disabled. `--database-url` points it at
+Postgres instead; `--url` loads a server that is already running and was
+seeded with the same shopper accounts (see `--password`).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import BASE_DIR, configure_environment
+
+SHOPPER_EMAIL = "shopper{}@example.com"
+NOUNS = ("lamp", "chair", "mug", "desk", "shelf", "rug", "clock", "vase", "stool", "frame")
+ADJECTIVES = ("oak", "steel", "linen", "pro", "mini", "classic", "nordic", "studio", "travel", "set")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end HTTP load harness")
+    parser.add_argument("--url", help="Load this running server instead of starting one")
+    parser.add_argument("--database-url", help="Database of the started server (default: a temporary SQLite file)")
+    parser.add_argument("--server", choices=("launcher", "uvicorn"), default="launcher")
+    parser.add_argument("--workers", type=int, default=0, help="Launcher workers, 0 for one per CPU")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of unmeasured load first")
+    parser.add_argument("--products", type=int, default=1000, help="Products to seed")
+    parser.add_argument("--password", default="LoadTest123!", help="Password of the shopper accounts")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the seeding and the mix")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--baseline", help="Compare with this baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    return parser.parse_args()
+
+
+def seed(products: int, shoppers: int, password: str, rng: random.Random) -> None:
+    """Create the tables, `products` products with plenty of stock and the
+    shopper accounts, all sharing one password hashed once."""
+    import app.api.models  # noqa: F401
+    from app.api.models.product import Product
+    from app.api.models.user import User
+    from app.core.base.model import BaseTableModel
+    from app.db.database import engine, session_scope
+    from app.utils.password_utils import hash_password
+
+    BaseTableModel.metadata.create_all(bind=engine)
+    hashed = hash_password(password)
+    with session_scope() as db:
+        db.add_all(
+            Product(
+                name=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index}",
+                description="Seeded by the load harness",
+                price=round(rng.uniform(2, 250), 2),
+                stock=1_000_000,
+            )
+            for index in range(products)
+        )
+        db.add_all(User(email=SHOPPER_EMAIL.format(index), password=hashed) for index in range(shoppers))
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(args: argparse.Namespace, env: dict) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    if args.server == "launcher":
+        command = [sys.executable, "-m", "app.launcher", "--port", str(port), "--workers", str(args.workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--no-access-log"]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL)
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(url: str, timeout: float = 60) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+async def product_ids(client, email: str, password: str, limit: int) -> list[str]:
+    """Product ids in catalog order, fetched through the API."""
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    ids: list[str] = []
+    page = 1
+    while len(ids) < limit:
+        response = await client.get("/api/v1/products", params={"page": page, "limit": 100}, headers=headers)
+        items = response.json()["data"]["items"]
+        if not items:
+            break
+        ids.extend(item["id"] for item in items)
+        page += 1
+    return ids[:limit]
+
+
+async def run_load(url: str, args: argparse.Namespace) -> tuple[list, float]:
+    import httpx
+
+    from benchmarks.load.scenarios import VirtualUser, login, run_user
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        ids = await product_ids(client, SHOPPER_EMAIL.format(0), args.password, args.products)
+        if not ids:
+            raise RuntimeError("the catalog is empty; seed it first")
+
+        users = [
+            VirtualUser(
+                client=client,
+                email=SHOPPER_EMAIL.format(index),
+                password=args.password,
+                product_ids=ids,
+                rng=random.Random(args.seed * 1_000_003 + index),
+                samples=[],
+            )
+            for index in range(args.users)
+        ]
+        # logging in hashes a password; do it once, outside the measurement
+        await asyncio.gather(*(login(user) for user in users))
+
+        async def phase(seconds: float) -> list:
+            samples: list = []
+            for user in users:
+                user.samples = samples
+            stop_at = time.perf_counter() + seconds
+            await asyncio.gather(*(run_user(user, stop_at) for user in users))
+            return samples
+
+        if args.warmup:
+            await phase(args.warmup)
+        started = time.perf_counter()
+        samples = await phase(args.duration)
+        return samples, time.perf_counter() - started
+
+
+def main() -> None:
+    args = parse_args()
+    directory = tempfile.mkdtemp(prefix="load-")
+    if not args.url:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{directory}/load.db"
+    configure_environment()
+    env = {**os.environ, "RATE_LIMIT_ENABLED": "false", "LOG_DIR": f"{directory}/logs"}
+
+    from benchmarks.load.report import build_report, compare
+    from benchmarks.load.scenarios import MIX
+
+    process = None
+    try:
+        url = args.url
+        if not url:
+            if not args.skip_seed:
+                seed(args.products, args.users, args.password, random.Random(args.seed))
+            process, url = start_server(args, env)
+        asyncio.run(wait_until_ready(url))
+        samples, duration = asyncio.run(run_load(url, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=60)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = build_report(
+        samples,
+        duration,
+        settings={
+            "server": args.url or args.server,
+            "workers": args.workers,
+            "users": args.users,
+            "duration": args.duration,
+            "products": args.products,
+            "mix": {name: weight for name, (_, weight) in MIX.items()},
+        },
+    )
+    output = json.dumps(report, indent=2)
+    print(output)
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(output + "\n")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Latency reports of the load harness and their comparison with a baseline"""
+
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from benchmarks.load.scenarios import Sample
+
+# below this many requests a p95/p99 is mostly noise and is not compared
+MIN_REQUESTS_FOR_PERCENTILES = 100
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _summary(samples: list[Sample], duration: float) -> dict:
+    latencies = sorted(sample.seconds for sample in samples if 200 <= sample.status < 400)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if not 200 <= sample.status < 400),
+        "rps": round(len(samples) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statuses": dict(sorted(Counter(str(sample.status) for sample in samples).items())),
+    }
+
+
+def build_report(samples: Iterable[Sample], duration: float, settings: dict) -> dict:
+    """Per-endpoint and overall numbers of one run."""
+    samples = list(samples)
+    by_endpoint: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+    return {
+        "settings": settings,
+        "total": _summary(samples, duration),
+        "endpoints": {name: _summary(group, duration) for name, group in sorted(by_endpoint.items())},
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of `report` against `baseline`: a p95 or p99 more than
+    `tolerance` (a fraction) above the baseline, throughput more than
+    `tolerance` below it, or a higher error rate. Percentiles are only
+    compared for endpoints with enough requests in both runs."""
+    regressions = []
+    current = {"total": report["total"], **report["endpoints"]}
+    previous = {"total": baseline["total"], **baseline["endpoints"]}
+    for name, before in previous.items():
+        after = current.get(name)
+        if after is None:
+            continue
+        enough = min(before["requests"], after["requests"]) >= MIN_REQUESTS_FOR_PERCENTILES
+        for key in ("p95_ms", "p99_ms"):
+            if enough and before[key] and after[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]} -> {after[key]}")
+        if before["rps"] and after["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {after['rps']}")
+        error_rate = after["errors"] / after["requests"] if after["requests"] else 0
+        baseline_rate = before["errors"] / before["requests"] if before["requests"] else 0
+        if error_rate > baseline_rate + 0.01:
+            regressions.append(f"{name}: error rate {baseline_rate:.1%} -> {error_rate:.1%}")
+    return regressions
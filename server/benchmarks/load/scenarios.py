@@ -0,0 +1,130 @@
+"""Shopper actions replayed by the load harness
+
+Every virtual user logs in once, then picks actions at random by weight until
+the run ends. Each action reports the endpoint it hit as "<METHOD> <route>",
+so results are grouped by route template, not by concrete URL.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+API = "/api/v1"
+SEARCH_TERMS = ("lamp", "chair", "mug", "desk", "shelf", "pro", "mini", "set")
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    seconds: float
+
+
+@dataclass
+class VirtualUser:
+    client: httpx.AsyncClient
+    email: str
+    password: str
+    product_ids: list[str]
+    rng: random.Random
+    samples: list[Sample]
+    headers: dict[str, str] = field(default_factory=dict)
+    cart_item_ids: list[str] = field(default_factory=list)
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        self.samples.append(Sample(endpoint, response.status_code, time.perf_counter() - started))
+        return response
+
+    def product_id(self) -> str:
+        # a few best sellers get most of the traffic, as in a real catalog
+        index = min(int(self.rng.paretovariate(1.2)) - 1, len(self.product_ids) - 1)
+        return self.product_ids[index]
+
+
+async def login(user: VirtualUser) -> None:
+    response = await user.request(
+        f"POST {API}/auth/login",
+        "POST",
+        f"{API}/auth/login",
+        json={"email": user.email, "password": user.password},
+    )
+    if response.status_code == 200:
+        user.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def browse(user: VirtualUser) -> None:
+    page = min(int(user.rng.expovariate(0.5)) + 1, 20)
+    await user.request(f"GET {API}/products", "GET", f"{API}/products", params={"page": page, "limit": 20})
+
+
+async def search(user: VirtualUser) -> None:
+    params = {"q": user.rng.choice(SEARCH_TERMS), "limit": 20}
+    if user.rng.random() < 0.3:
+        params["max_price"] = user.rng.choice((20, 50, 100))
+    await user.request(f"GET {API}/products?q", "GET", f"{API}/products", params=params)
+
+
+async def view_product(user: VirtualUser) -> None:
+    await user.request(
+        f"GET {API}/products/{{product_id}}", "GET", f"{API}/products/{user.product_id()}"
+    )
+
+
+async def add_to_cart(user: VirtualUser) -> None:
+    response = await user.request(
+        f"POST {API}/cart",
+        "POST",
+        f"{API}/cart",
+        json={"product_id": user.product_id(), "quantity": user.rng.randint(1, 3)},
+    )
+    if response.status_code == 201:
+        item_id = response.json()["data"]["id"]
+        if item_id not in user.cart_item_ids:
+            user.cart_item_ids.append(item_id)
+
+
+async def update_cart(user: VirtualUser) -> None:
+    if not user.cart_item_ids:
+        return await add_to_cart(user)
+    item_id = user.rng.choice(user.cart_item_ids)
+    await user.request(
+        f"PUT {API}/cart/{{item_id}}",
+        "PUT",
+        f"{API}/cart/{item_id}",
+        json={"quantity": user.rng.randint(1, 5)},
+    )
+
+
+async def view_cart(user: VirtualUser) -> None:
+    await user.request(f"GET {API}/cart", "GET", f"{API}/cart")
+
+
+Action = Callable[[VirtualUser], Awaitable[None]]
+
+# relative frequency of each action in the mix
+MIX: dict[str, tuple[Action, int]] = {
+    "browse": (browse, 35),
+    "search": (search, 20),
+    "view_product": (view_product, 20),
+    "add_to_cart": (add_to_cart, 10),
+    "update_cart": (update_cart, 5),
+    "view_cart": (view_cart, 7),
+    "login": (login, 3),
+}
+
+
+async def run_user(user: VirtualUser, stop_at: float, mix: dict[str, tuple[Action, int]] = MIX) -> None:
+    """Replay random actions until `stop_at`; the user must be logged in."""
+    actions = [action for action, _ in mix.values()]
+    weights = [weight for _, weight in mix.values()]
+    while time.perf_counter() < stop_at:
+        action = user.rng.choices(actions, weights)[0]
+        try:
+            await action(user)
+        except httpx.HTTPError as e:
+            user.samples.append(Sample(f"{action.__name__} ({type(e).__name__})", 0, 0.0))
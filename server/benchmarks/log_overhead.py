@@ -0,0 +1,104 @@
+"""Cost of a log call on the request thread
+
+Compares the previous synchronous setup (two rotating files and stdout,
+written by the calling thread) with the queue pipeline of `app.utils.logger`,
+plus eager f-string formatting against lazy %-style arguments for a record
+below the logger's level, and a hot call site over its sampling budget.
+
+    poetry run python -m benchmarks.log_overhead --number 20000
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+from logging.handlers import RotatingFileHandler
+
+from benchmarks.common import configure_environment, time_per_call
+
+configure_environment()
+
+from app.utils.logger import (  # noqa: E402
+    DATE_FORMAT,
+    TEXT_FORMAT,
+    InfoSampler,
+    LogPipeline,
+    file_handler,
+)
+
+
+def synchronous_logger(directory: str, stream) -> logging.Logger:
+    target = logging.getLogger("benchmark.synchronous")
+    target.propagate = False
+    formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    for path, level in (("app.log", logging.INFO), ("error.log", logging.ERROR)):
+        handler = RotatingFileHandler(f"{directory}/{path}", maxBytes=10_000_000, backupCount=5)
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+        target.addHandler(handler)
+    console = logging.StreamHandler(stream)
+    console.setFormatter(formatter)
+    target.addHandler(console)
+    target.setLevel(logging.INFO)
+    return target
+
+
+def queued_logger(pipeline: LogPipeline, directory: str, stream, sampler=None) -> logging.Logger:
+    target = logging.getLogger(f"benchmark.queued.{id(sampler)}")
+    target.propagate = False
+    target.setLevel(logging.INFO)
+    console = logging.StreamHandler(stream)
+    pipeline.attach(
+        target,
+        file_handler(f"{directory}/{id(sampler)}-app.log"),
+        file_handler(f"{directory}/{id(sampler)}-error.log", level=logging.ERROR),
+        console,
+        filters=[sampler] if sampler else [],
+    )
+    return target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20_000, help="Log calls per timing run")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    pipeline = LogPipeline()
+    user_id, product_id = 42, "5b1f2c9d7a4e4b0e9d3f6a2c1e7b8d90"
+    with open(os.devnull, "w") as devnull:
+        try:
+            sync = synchronous_logger(directory, devnull)
+            queued = queued_logger(pipeline, directory, devnull)
+            sampled = queued_logger(pipeline, directory, devnull, InfoSampler(per_second=20))
+
+            results = {
+                "synchronous handlers": lambda: sync.info(
+                    "Adding item to cart for user %s, product %s", user_id, product_id
+                ),
+                "queue pipeline": lambda: queued.info(
+                    "Adding item to cart for user %s, product %s", user_id, product_id
+                ),
+                "queue pipeline, sampled": lambda: sampled.info(
+                    "Adding item to cart for user %s, product %s", user_id, product_id
+                ),
+                "debug, f-string": lambda: queued.debug(
+                    f"Adding item to cart for user {user_id}, product {product_id}"
+                ),
+                "debug, %-style": lambda: queued.debug(
+                    "Adding item to cart for user %s, product %s", user_id, product_id
+                ),
+            }
+            print(f"{'log call':<28}{'µs per call':>12}")
+            for name, call in results.items():
+                elapsed = time_per_call(call, number=args.number)
+                print(f"{name:<28}{elapsed:>12.2f}")
+                pipeline.flush()
+        finally:
+            pipeline.stop()
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
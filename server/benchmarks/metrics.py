@@ -0,0 +1,67 @@
+"""Per-request overhead of the metrics middleware
+
+Drives a bare ASGI app directly (no HTTP server, no TestClient) with and
+without `MetricsMiddleware`, so the difference is the cost of recording one
+request: a gauge pair, a counter and two histogram observations.
+
+    poetry run python -m benchmarks.metrics --number 50000
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment
+
+configure_environment()
+
+from app.core.metrics import registry  # noqa: E402
+from app.core.middleware.metrics import MetricsMiddleware  # noqa: E402
+
+
+class _Route:
+    path = "/api/v1/products/{product_id}"
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}" * 100})
+
+
+async def per_request(app, number: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/products/1"}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(number):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / number * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50_000, help="Requests per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs; the best is reported")
+    args = parser.parse_args()
+
+    instrumented = MetricsMiddleware(bare_app)
+    bare = min(asyncio.run(per_request(bare_app, args.number)) for _ in range(args.repeat))
+    measured = min(asyncio.run(per_request(instrumented, args.number)) for _ in range(args.repeat))
+    render_started = time.perf_counter()
+    registry.render()
+    render_ms = (time.perf_counter() - render_started) * 1000
+
+    print(f"bare app:            {bare:.2f} µs per request")
+    print(f"with metrics:        {measured:.2f} µs per request")
+    print(f"metrics overhead:    {measured - bare:.2f} µs per request")
+    print(f"rendering /metrics:  {render_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
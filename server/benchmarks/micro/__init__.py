@@ -0,0 +1,15 @@
+"""Microbenchmarks of the service and serialization hot paths
+
+pytest-style cases (`bench_*.py`) that call one function through the
+`benchmark` fixture on an in-memory SQLite database. Each case records the
+time per call (best and median of several rounds) and, with `tracemalloc`,
+the peak memory allocated during a call and what a call leaves allocated.
+The run can be saved as a baseline and later runs compared with it; a time
+or allocation peak more than `--tolerance` above the baseline fails the run.
+
+    poetry run python -m benchmarks.micro --save-baseline micro.json
+    poetry run python -m benchmarks.micro --baseline micro.json -k cart
+
+Timings only compare well on the same machine; keep baselines local or per
+CI runner.
+"""
@@ -0,0 +1,55 @@
+"""Run the microbenchmarks; see `benchmarks.micro` for an overview."""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.micro.plugin import BenchmarkPlugin, compare
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Service and serialization microbenchmarks")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks matching this pytest expression")
+    parser.add_argument("--rounds", type=int, default=5, help="Timing rounds per benchmark")
+    parser.add_argument("--min-round-time", type=float, default=0.05, help="Seconds each round runs at least")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--save-baseline", help="Write the report as the new baseline")
+    parser.add_argument("--baseline", help="Compare with this baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    plugin = BenchmarkPlugin(rounds=args.rounds, min_round_time=args.min_round_time)
+    pytest_args = [
+        str(Path(__file__).parent),
+        "-q",
+        "-o", "python_files=bench_*.py",
+        "-o", "python_functions=bench_*",
+        "-p", "no:cacheprovider",
+        "-p", "no:benchmark",
+        "-p", "benchmarks.micro.fixtures",
+    ]  # fmt: skip
+    if args.keyword:
+        pytest_args += ["-k", args.keyword]
+    code = pytest.main(pytest_args, plugins=[plugin])
+    if code != pytest.ExitCode.OK:
+        sys.exit(code)
+
+    report = plugin.report()
+    output = json.dumps(report, indent=2)
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(output + "\n")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+from fastapi import HTTPException
+
+from app.utils.jwt_helpers import create_jwt_token, verify_jwt_token
+
+
+def bench_verify_jwt_token(benchmark):
+    token = create_jwt_token("access", "0192b3a4-5c6d-7e8f-9a0b-1c2d3e4f5a6b")
+    user_id = benchmark(verify_jwt_token, token, HTTPException(status_code=401))
+    assert user_id == "0192b3a4-5c6d-7e8f-9a0b-1c2d3e4f5a6b"
@@ -0,0 +1,36 @@
+from fastapi import status
+
+from app.api.services.cart_item import CartItemService
+from app.api.v1.cart_items import schemas as cart_schemas
+from app.api.v1.products import schemas
+from app.core.base.schema import PaginatedResponse
+
+
+def bench_product_to_dict(benchmark, page_of_products):
+    rows = benchmark(lambda: [product.to_dict() for product in page_of_products])
+    assert len(rows) == len(page_of_products)
+
+
+def bench_product_list_response(benchmark, page_of_products):
+    """A page of products the way `GET /products` builds and serializes it."""
+
+    def build() -> bytes:
+        page = PaginatedResponse(
+            total_items=1000, total_pages=50, current_page=1, page_size=20, items=page_of_products
+        )
+        page.items = [schemas.ProductResponseData(**item.to_dict()) for item in page.items]
+        return schemas.ProductListResponse(
+            status_code=status.HTTP_200_OK, message="Products retrieved successfully", data=page
+        ).model_dump_json()
+
+    assert benchmark(build)
+
+
+def bench_cart_response(benchmark, db, shopper):
+    cart = CartItemService(db).get_user_cart(shopper)
+    body = benchmark(
+        lambda: cart_schemas.CartItemListResponse(
+            status_code=status.HTTP_200_OK, message="Cart retrieved successfully", data=cart
+        ).model_dump_json()
+    )
+    assert body
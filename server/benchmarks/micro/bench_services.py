@@ -0,0 +1,27 @@
+from app.api.repositories.product import ProductRepository
+from app.api.services.cart_item import CartItemService
+from app.api.services.product import ProductService
+from benchmarks.micro.fixtures import CART_ITEMS
+
+
+def bench_get_user_cart(benchmark, db, shopper):
+    cart = benchmark(CartItemService(db).get_user_cart, shopper)
+    assert cart.items_count == CART_ITEMS
+
+
+def bench_list_products(benchmark, db):
+    page = benchmark(ProductService(db).list_products, page=5, page_size=20)
+    assert len(page.items) == 20
+
+
+def bench_list_products_filtered(benchmark, db):
+    page = benchmark(
+        ProductService(db).list_products, name="product 1", in_stock=True, min_price=10, max_price=150
+    )
+    assert page.items
+
+
+def bench_paginate(benchmark, db):
+    repository = ProductRepository(db)
+    page = benchmark(lambda: repository.paginate(repository.base_query(), 10, 50))
+    assert page.current_page == 10
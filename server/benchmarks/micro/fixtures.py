@@ -0,0 +1,61 @@
+"""Database fixtures of the microbenchmarks, loaded as a pytest plugin"""
+
+from benchmarks.common import configure_environment
+
+configure_environment()
+
+from decimal import Decimal  # noqa: E402
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.api.models  # noqa: F401 E402
+import app.api.v1  # noqa: F401 E402  (the services import their schemas through the routers)
+from app.api.models.cart_item import CartItem  # noqa: E402
+from app.api.models.product import Product  # noqa: E402
+from app.api.models.user import User  # noqa: E402
+from app.core.base.model import BaseTableModel  # noqa: E402
+
+PRODUCTS = 1000
+CART_ITEMS = 20
+
+
+@pytest.fixture(scope="session")
+def db():
+    """An in-memory database with `PRODUCTS` products and a shopper with
+    `CART_ITEMS` items in the cart, shared by every benchmark."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    BaseTableModel.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    products = [
+        Product(
+            name=f"product {index}",
+            description=f"Description of product {index}",
+            price=Decimal(index % 200) + Decimal("0.99"),
+            stock=index % 7,
+        )
+        for index in range(PRODUCTS)
+    ]
+    shopper = User(email="shopper@example.com", password="x")
+    session.add_all([shopper, *products])
+    session.flush()
+    session.add_all(
+        CartItem(user_id=shopper.id, product_id=product.id, quantity=1 + index % 3)
+        for index, product in enumerate(products[:CART_ITEMS])
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def shopper(db) -> User:
+    return db.query(User).filter_by(email="shopper@example.com").one()
+
+
+@pytest.fixture
+def page_of_products(db) -> list[Product]:
+    return db.query(Product).limit(20).all()
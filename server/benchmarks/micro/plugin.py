@@ -0,0 +1,124 @@
+"""The `benchmark` fixture and the baseline comparison of the microbenchmarks"""
+
+import functools
+import statistics
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+import pytest
+
+
+@dataclass
+class Result:
+    """
+    Numbers of one benchmark.
+    Attributes:
+        calls (int): Calls per timing round.
+        min_us (float): Best time per call over the rounds, in microseconds.
+        median_us (float): Median time per call over the rounds.
+        peak_bytes (int): Median peak of memory allocated during one call.
+        retained_bytes (int): Memory still allocated after a call, on average;
+            steadily above zero means the code path keeps references.
+    """
+
+    calls: int
+    min_us: float
+    median_us: float
+    peak_bytes: int
+    retained_bytes: int
+
+
+def measure_allocations(call: Callable[[], object], calls: int) -> tuple[int, int]:
+    """Median peak and average retained bytes of `calls` calls."""
+    tracemalloc.start()
+    try:
+        started = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = (tracemalloc.get_traced_memory()[0] - started) // calls
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks)), max(retained, 0)
+
+
+class Benchmark:
+    """
+    Times a function and traces its allocations; tests call it as
+    `benchmark(func, *args)` and get the function's result back.
+    Attributes:
+        name (str): Name of the benchmark in the report.
+        results (dict[str, Result]): Where the numbers are stored.
+    """
+
+    def __init__(self, name: str, results: dict, rounds: int, min_round_time: float):
+        self.name = name
+        self.results = results
+        self.rounds = rounds
+        self.min_round_time = min_round_time
+
+    def __call__(self, func: Callable, *args, **kwargs):
+        call = functools.partial(func, *args, **kwargs)
+        value = call()  # warm-up, and the value the test checks
+        timer = timeit.Timer(call)
+        number = 1
+        while timer.timeit(number) < self.min_round_time and number < 1_000_000:
+            number *= 2
+        per_call = sorted(seconds / number * 1_000_000 for seconds in timer.repeat(self.rounds, number))
+        peak, retained = measure_allocations(call, calls=min(number, 50))
+        self.results[self.name] = Result(
+            calls=number,
+            min_us=round(per_call[0], 2),
+            median_us=round(statistics.median(per_call), 2),
+            peak_bytes=peak,
+            retained_bytes=retained,
+        )
+        return value
+
+
+class BenchmarkPlugin:
+    """Provides the `benchmark` fixture and prints the results."""
+
+    def __init__(self, rounds: int = 5, min_round_time: float = 0.05):
+        self.rounds = rounds
+        self.min_round_time = min_round_time
+        self.results: dict[str, Result] = {}
+
+    @pytest.fixture
+    def benchmark(self, request) -> Benchmark:
+        return Benchmark(request.node.name, self.results, self.rounds, self.min_round_time)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.results:
+            return
+        terminalreporter.section("benchmarks")
+        terminalreporter.write_line(
+            f"{'benchmark':<44}{'min µs':>10}{'median µs':>11}{'peak KiB':>10}{'retained B':>12}"
+        )
+        for name, result in sorted(self.results.items()):
+            terminalreporter.write_line(
+                f"{name:<44}{result.min_us:>10.1f}{result.median_us:>11.1f}"
+                f"{result.peak_bytes / 1024:>10.1f}{result.retained_bytes:>12}"
+            )
+
+    def report(self) -> dict:
+        return {name: asdict(result) for name, result in sorted(self.results.items())}
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Benchmarks whose best time or allocation peak is more than
+    `tolerance` (a fraction) above the baseline."""
+    regressions = []
+    for name, before in baseline.items():
+        after = report.get(name)
+        if after is None:
+            continue
+        for key in ("min_us", "peak_bytes"):
+            if before[key] and after[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]} -> {after[key]}")
+    return regressions
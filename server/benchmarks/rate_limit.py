@@ -0,0 +1,81 @@
+"""Overhead of a rate limit check per request, per storage backend
+
+Times one token bucket check on every available store, then a request to a
+minimal FastAPI route with and without the `rate_limit` dependency to show
+the cost end to end (including FastAPI's threadpool hop).
+
+    poetry run python -m benchmarks.rate_limit
+    poetry run python -m benchmarks.rate_limit --redis redis://localhost:6379/0
+"""
+
+import argparse
+import itertools
+import shutil
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import configure_environment, time_per_call
+
+configure_environment()
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.dependencies.rate_limit import rate_limit  # noqa: E402
+from app.core.rate_limit.limiter import rate_limiter  # noqa: E402
+from app.core.rate_limit.stores import (  # noqa: E402
+    MemoryBucketStore,
+    RedisBucketStore,
+    SQLiteBucketStore,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=5000, help="Checks per timing run")
+    parser.add_argument("--keys", type=int, default=1000, help="Distinct clients")
+    parser.add_argument("--redis", help="Also measure a Redis-compatible server at this URL")
+    args = parser.parse_args()
+
+    shm = Path("/dev/shm")
+    directory = tempfile.mkdtemp(dir=shm if shm.is_dir() else None)
+    stores = {
+        "memory": MemoryBucketStore(),
+        "sqlite": SQLiteBucketStore(f"{directory}/buckets.db"),
+    }
+    if args.redis:
+        stores["redis"] = RedisBucketStore(args.redis)
+
+    print(f"{'store':<10}{'µs per check':>14}")
+    try:
+        for name, store in stores.items():
+            keys = itertools.cycle([f"ip:10.0.{i // 256}.{i % 256}" for i in range(args.keys)])
+            elapsed = time_per_call(
+                lambda: store.take(next(keys), capacity=1_000_000, rate=1_000_000),
+                number=args.number,
+            )
+            print(f"{name:<10}{elapsed:>14.1f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    app = FastAPI()
+
+    @app.get("/plain")
+    def plain():
+        return {}
+
+    @app.get("/limited", dependencies=[Depends(rate_limit("root"))])
+    def limited():
+        return {}
+
+    # keep the benchmark itself from being limited
+    rate_limiter._buckets["root"] = (1_000_000, 1_000_000)
+    client = TestClient(app)
+    number = max(1, args.number // 10)
+    before = time_per_call(lambda: client.get("/plain"), number=number)
+    after = time_per_call(lambda: client.get("/limited"), number=number)
+    print(f"\nrequest without limit: {before:.1f} µs, with memory limit: {after:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Throughput of the production launcher against the previous defaults
+
+Starts the app twice, each time as a separate server process: first the way
+`app/main.py` used to run it (a single uvicorn process with default
+settings and access logging), then through `python -m app.launcher` with its
+defaults (one worker per CPU, uvloop and httptools when installed, no access
+log). Each server gets the same closed-loop load over keep-alive connections.
+
+    poetry run python -m benchmarks.server_throughput --duration 10 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BASE_DIR, configure_environment
+
+configure_environment()
+
+import httpx  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def _connection(host: str, port: int, path: str, stop_at: float, latencies: list[float]) -> None:
+    """One keep-alive client sending requests back to back. A bare HTTP/1.1
+    client keeps the load generator's own CPU use far below the server's."""
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()
+    try:
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            if head.startswith(b"HTTP/1.1 200"):
+                latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def drive(port: int, path: str, duration: float, concurrency: int) -> list[float]:
+    """Send requests over `concurrency` connections for `duration` seconds and
+    return the latency of every successful request in seconds."""
+    latencies: list[float] = []
+    stop_at = time.perf_counter() + duration
+    await asyncio.gather(
+        *(_connection("127.0.0.1", port, path, stop_at, latencies) for _ in range(concurrency))
+    )
+    return latencies
+
+
+def measure(name: str, command: list[str], path: str, duration: float, concurrency: int) -> None:
+    port = _free_port()
+    process = subprocess.Popen(
+        [*command, "--port", str(port)],
+        cwd=BASE_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}{path}"
+        _wait_until_ready(url, process)
+        asyncio.run(drive(port, path, 1, concurrency))  # warm-up
+        latencies = asyncio.run(drive(port, path, duration, concurrency))
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float("nan")
+    median = statistics.median(latencies) if latencies else float("nan")
+    print(f"{name:<22}{len(latencies) / duration:>10.0f}{median * 1000:>10.1f}{p99 * 1000:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default="/probe", help="Endpoint to load")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per server")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--workers", type=int, default=0, help="Launcher workers, 0 for one per CPU")
+    args = parser.parse_args()
+
+    print(f"{'server':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    measure(
+        "uvicorn defaults",
+        [sys.executable, "-m", "uvicorn", "app.main:app"],
+        args.path,
+        args.duration,
+        args.concurrency,
+    )
+    measure(
+        "app.launcher",
+        [sys.executable, "-m", "app.launcher", "--workers", str(args.workers)],
+        args.path,
+        args.duration,
+        args.concurrency,
+    )
+    print(f"\n{os.cpu_count()} CPUs; the load generator shares them with the server.")
+
+
+if __name__ == "__main__":
+    main()
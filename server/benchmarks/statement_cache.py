@@ -0,0 +1,124 @@
+"""Per-call overhead of legacy Query lookups versus cached select() statements
+
+Compares the repository lookups as they used to be written
+(`db.query(...).filter(...).first()`) with the current `select()` /
+`lambda_stmt` versions on an in-memory SQLite database, so the numbers are
+dominated by ORM statement construction and compilation rather than I/O.
+
+    poetry run python -m benchmarks.statement_cache --rows 1000 --number 2000
+"""
+
+import argparse
+
+from benchmarks.common import configure_environment, time_per_call
+
+configure_environment()
+
+from decimal import Decimal  # noqa: E402
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import app.api.models  # noqa: F401 E402
+from app.api.models.cart_item import CartItem  # noqa: E402
+from app.api.models.product import Product  # noqa: E402
+from app.api.models.user import User  # noqa: E402
+from app.api.repositories.cart_item import CartItemRepository  # noqa: E402
+from app.api.repositories.product import ProductRepository  # noqa: E402
+from app.api.repositories.user import UserRepository  # noqa: E402
+from app.core.base.model import BaseTableModel  # noqa: E402
+from app.db.instrumentation import statement_cache_stats  # noqa: E402
+
+
+def seed(session, rows: int) -> tuple[User, Product, CartItem]:
+    users = [User(email=f"user{i}@example.com", password="x") for i in range(rows)]
+    products = [
+        Product(name=f"product {i}", price=Decimal("9.99"), stock=10) for i in range(rows)
+    ]
+    session.add_all(users + products)
+    session.flush()
+    cart_item = CartItem(user_id=users[0].id, product_id=products[0].id, quantity=1)
+    session.add(cart_item)
+    session.commit()
+    return users[-1], products[-1], cart_item
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Users and products to seed")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing run")
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    BaseTableModel.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    user, product, cart_item = seed(session, args.rows)
+    user_id, email, product_id, name = user.id, user.email, product.id, product.name
+    item_id, item_user_id = cart_item.id, cart_item.user_id
+
+    users = UserRepository(session)
+    products = ProductRepository(session)
+    cart_items = CartItemRepository(session)
+
+    def cold(lookup):
+        # drop the identity map so every call really goes to the database
+        def call():
+            session.expunge_all()
+            return lookup()
+
+        return call
+
+    cases = [
+        (
+            "get (by primary key)",
+            lambda: session.query(User).filter(User.id == user_id).first(),
+            lambda: users.get(user_id),
+        ),
+        (
+            "get_by_email",
+            lambda: session.query(User).filter(User.email == email).first(),
+            lambda: users.get_by_email(email),
+        ),
+        (
+            "get_by_name",
+            lambda: session.query(Product).filter(Product.name == name).first(),
+            lambda: products.get_by_name(name),
+        ),
+        (
+            "get_product_from_user_cart",
+            lambda: session.query(CartItem)
+            .filter(CartItem.user_id == item_user_id, CartItem.product_id == product_id)
+            .first(),
+            lambda: cart_items.get_product_from_user_cart(item_user_id, product_id),
+        ),
+        (
+            "get_user_cart_item",
+            lambda: session.query(CartItem)
+            .filter(CartItem.id == item_id, CartItem.user_id == item_user_id)
+            .first(),
+            lambda: cart_items.get_user_cart_item(item_id, item_user_id),
+        ),
+    ]
+
+    print(f"{'lookup':<30}{'legacy µs':>12}{'cached µs':>12}{'speedup':>10}")
+    statement_cache_stats.reset()
+    for label, legacy, current in cases:
+        before = time_per_call(cold(legacy), number=args.number)
+        after = time_per_call(cold(current), number=args.number)
+        print(f"{label:<30}{before:>12.1f}{after:>12.1f}{before / after:>9.2f}x")
+
+    # the identity map holds weak references, so keep the loaded user alive
+    loaded = users.get(user_id)  # noqa: F841
+    warm = time_per_call(lambda: users.get(user_id), number=args.number)
+    print(f"\nget() served from the identity map: {warm:.1f} µs")
+    print(
+        f"statement cache hit rate: {statement_cache_stats.hit_rate:.1%} "
+        f"({statement_cache_stats.hits} hits, {statement_cache_stats.misses} misses)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Index size and point-lookup latency of text versus native UUID keys
+
+Builds two otherwise identical tables, one keyed by the 36-character text ids
+the app used to store and one by `UUIDType`, fills them with the same uuid7
+values and reports the primary key index size and the time of a random
+primary key lookup.
+
+    poetry run python -m benchmarks.uuid_keys --rows 100000
+    poetry run python -m benchmarks.uuid_keys --url postgresql://...
+
+On SQLite the index size comes from the `dbstat` virtual table; on PostgreSQL
+from `pg_relation_size`.
+"""
+
+import argparse
+import itertools
+import random
+
+from benchmarks.common import configure_environment, time_per_call
+
+configure_environment()
+
+from sqlalchemy import (  # noqa: E402
+    Column,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    create_engine,
+    select,
+    text,
+)
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from uuid_extensions import uuid7  # noqa: E402
+
+from app.core.base.types import UUIDType  # noqa: E402
+
+metadata = MetaData()
+tables = {
+    "text": Table("bench_text_keys", metadata, Column("id", String, primary_key=True)),
+    "uuid": Table("bench_uuid_keys", metadata, Column("id", UUIDType, primary_key=True)),
+}
+
+
+def index_bytes(conn, table: Table) -> int:
+    if conn.dialect.name == "postgresql":
+        return conn.execute(
+            text("SELECT pg_relation_size(:name)"), {"name": f"{table.name}_pkey"}
+        ).scalar()
+    index = conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+        {"table": table.name},
+    ).scalar()
+    return conn.execute(
+        text("SELECT SUM(pgsize) FROM dbstat WHERE name = :name"), {"name": index}
+    ).scalar()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="Database to benchmark against")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per table")
+    parser.add_argument("--number", type=int, default=5000, help="Lookups per timing run")
+    args = parser.parse_args()
+
+    options = {"poolclass": StaticPool} if args.url.startswith("sqlite") else {}
+    engine = create_engine(args.url, **options)
+    ids = [str(uuid7()) for _ in range(args.rows)]
+    probes = random.Random(0).choices(ids, k=args.number)
+
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    try:
+        with engine.begin() as conn:
+            for table in tables.values():
+                conn.execute(table.insert(), [{"id": id} for id in ids])
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("ANALYZE"))
+
+        print(f"{'key type':<10}{'index KiB':>12}{'lookup µs':>12}")
+        with engine.connect() as conn:
+            for label, table in tables.items():
+                size = index_bytes(conn, table)
+                stmt = select(table.c.id).where(table.c.id == bindparam("id"))
+                lookups = itertools.cycle(probes)
+
+                def lookup():
+                    return conn.execute(stmt, {"id": next(lookups)}).scalar_one()
+
+                elapsed = time_per_call(lookup, number=args.number)
+                print(f"{label:<10}{size / 1024:>12.1f}{elapsed:>12.1f}")
+    finally:
+        metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,7 @@ def main() -> None:
             hashed_password = password_utils.hash_password(args.password)
             admin_user = User(email=args.email, password=hashed_password, role="admin")
             repo.create(admin_user)
+            session.commit()
             logger.info("Created admin user %s.", args.email)
     finally:
         session.close()
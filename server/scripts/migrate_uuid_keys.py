@@ -0,0 +1,134 @@
+"""Online preparation for the native UUID key migration (PostgreSQL only).
+
+Converting the text keys in place (`ALTER COLUMN ... TYPE uuid`) rewrites
+every table under an exclusive lock. This script does the slow part while the
+application keeps running:
+
+1. adds nullable `<column>_uuid` shadow columns and a trigger that fills them
+   for rows written from now on,
+2. backfills existing rows in small batches,
+3. validates NOT NULL checks and builds the unique/lookup indexes concurrently.
+
+Afterwards `alembic upgrade 5b1f2c9d7a4e` only swaps the shadow columns in,
+which needs brief locks regardless of table size.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = {
+    "users": ["id"],
+    "products": ["id"],
+    "cart_items": ["id", "user_id", "product_id"],
+}
+
+SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION sync_uuid_shadow_columns() RETURNS trigger AS $$
+BEGIN
+    NEW.id_uuid := NEW.id::uuid;
+    IF TG_TABLE_NAME = 'cart_items' THEN
+        NEW.user_id_uuid := NEW.user_id::uuid;
+        NEW.product_id_uuid := NEW.product_id::uuid;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def prepare(conn) -> None:
+    """Add the shadow columns and keep them in sync for new writes."""
+    conn.execute(text(SYNC_FUNCTION))
+    for table, columns in KEY_COLUMNS.items():
+        for column in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}_uuid uuid"))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_uuid_sync ON {table}"))
+        conn.execute(
+            text(
+                f"CREATE TRIGGER {table}_uuid_sync BEFORE INSERT OR UPDATE ON {table} "
+                "FOR EACH ROW EXECUTE FUNCTION sync_uuid_shadow_columns()"
+            )
+        )
+        logger.info("Prepared shadow columns on %s.", table)
+
+
+def backfill(conn, batch_size: int, pause: float) -> None:
+    """Fill the shadow columns of existing rows, one short transaction per batch."""
+    for table, columns in KEY_COLUMNS.items():
+        assignments = ", ".join(f"{column}_uuid = {column}::uuid" for column in columns)
+        total = 0
+        while True:
+            updated = conn.execute(
+                text(
+                    f"UPDATE {table} SET {assignments} WHERE ctid IN ("
+                    f"SELECT ctid FROM {table} WHERE id_uuid IS NULL LIMIT :batch_size)"
+                ),
+                {"batch_size": batch_size},
+            ).rowcount
+            if not updated:
+                break
+            total += updated
+            logger.info("Backfilled %s rows of %s.", total, table)
+            time.sleep(pause)
+
+
+def build_constraints(conn) -> None:
+    """Validate NOT NULL checks and build indexes without blocking writes."""
+    for table, columns in KEY_COLUMNS.items():
+        for column in columns:
+            name = f"{table}_{column}_uuid_not_null"
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}
+            ).scalar()
+            if not exists:
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                        f"CHECK ({column}_uuid IS NOT NULL) NOT VALID"
+                    )
+                )
+            conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}"))
+
+        conn.execute(
+            text(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {table}_id_uuid_key ON {table} (id_uuid)")
+        )
+        conn.execute(
+            text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_id_uuid ON {table} (id_uuid)")
+        )
+        logger.info("Built constraints and indexes for %s.", table)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Prepare the native UUID key migration online.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows updated per transaction")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.database_url)
+    if engine.dialect.name != "postgresql":
+        parser.error("The online migration is only needed on PostgreSQL; run `alembic upgrade head`.")
+
+    # every statement commits on its own: short locks, and CONCURRENTLY needs it
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        prepare(conn)
+        backfill(conn, args.batch_size, args.pause)
+        build_constraints(conn)
+
+    logger.info("Done. Run `alembic upgrade 5b1f2c9d7a4e` to swap the uuid columns in.")
+
+
+if __name__ == "__main__":
+    main()
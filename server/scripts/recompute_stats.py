@@ -0,0 +1,60 @@
+"""Check the admin dashboard counters against a full recomputation.
+
+The counters in catalog_stats and product_cart_stats are maintained by the
+product and cart writes of the application (see `app.core.stats`). Rows
+written around it, by `scripts/seed_data.py`, imports or manual SQL, are not
+counted. This script scans the products and cart items, prints every counter
+that drifted and exits with status 1 if any did. With `--fix` it replaces the
+counters with the recomputed values instead; run it that way once after
+`alembic upgrade` creates the tables.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+import app.api.v1  # noqa: F401 E402  (the services import their schemas through the routers)
+from app.api.services.catalog_stats import CatalogStatsService  # noqa: E402
+from app.db.database import session_scope  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check or rebuild the admin dashboard statistics.")
+    parser.add_argument("--fix", action="store_true", help="Replace the counters with recomputed values")
+    parser.add_argument("--show", type=int, default=20, help="Drifted products to print")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+
+    with session_scope() as db:
+        service = CatalogStatsService(db)
+        if args.fix:
+            service.rebuild()
+            logger.info("Catalog statistics rebuilt.")
+            return 0
+        totals, products = service.find_drift()
+
+    for name, (maintained, actual) in totals.items():
+        print(f"{name}: maintained {maintained}, actual {actual}")
+    for product_id, (maintained, actual) in list(products.items())[: args.show]:
+        print(f"product {product_id}: maintained (carts, units) {maintained}, actual {actual}")
+    if len(products) > args.show:
+        print(f"... and {len(products) - args.show} more products")
+    if totals or products:
+        print(f"{len(totals)} totals and {len(products)} products drifted; rerun with --fix to rebuild")
+        return 1
+    print("Catalog statistics match the products and cart items.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
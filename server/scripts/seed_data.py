@@ -0,0 +1,308 @@
+"""Seed a large synthetic dataset for performance testing.
+
+Generates products, shopper accounts and cart items from a fixed random seed,
+so the same arguments always produce the same rows, ids included. Cart
+contents follow a Zipf distribution: a few products are in many carts, most
+in few or none. Every shopper shares one password, hashed once.
+
+Rows are written in batches: with COPY on PostgreSQL (psycopg2) and with
+`executemany` inserts elsewhere. The tables are created when missing and
+must be empty.
+
+    # a reusable SQLite file, e.g. for DATABASE_URL=sqlite:///perf.db
+    python scripts/seed_data.py --database-url sqlite:///perf.db --products 1000000 --users 200000
+
+    # a PostgreSQL dump, restored with `psql -f perf.sql` after `alembic upgrade head`
+    python scripts/seed_data.py --dump perf.sql
+
+The shoppers are `shopper<n>@example.com`, the accounts the load harness
+(`python -m benchmarks.load --skip-seed`) logs in with.
+"""
+
+import argparse
+import bisect
+import hashlib
+import io
+import itertools
+import logging
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, TextIO
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+import app.api.models  # noqa: E402, F401
+from app.api.models.cart_item import CartItem  # noqa: E402
+from app.api.models.product import Product  # noqa: E402
+from app.api.models.user import User  # noqa: E402
+from app.core.base.model import BaseTableModel  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.utils.password_utils import hash_password  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+SHOPPER_EMAIL = "shopper{}@example.com"
+# ids are uuid7 like the app's own, with timestamps counting up from here
+EPOCH_MS = 1_704_067_200_000  # 2024-01-01
+
+ADJECTIVES = (
+    "oak", "steel", "linen", "pro", "mini", "classic", "nordic", "studio", "travel", "compact",
+    "deluxe", "vintage", "smart", "organic", "rustic", "modern", "wireless", "foldable", "ceramic", "bamboo",
+)  # fmt: skip
+NOUNS = (
+    "lamp", "chair", "mug", "desk", "shelf", "rug", "clock", "vase", "stool", "frame",
+    "kettle", "backpack", "headphones", "blender", "pillow", "jacket", "sneakers", "notebook", "tent", "bottle",
+)  # fmt: skip
+
+PRODUCT_COLUMNS = ("id", "name", "description", "price", "stock")
+USER_COLUMNS = ("id", "email", "password", "role")
+CART_ITEM_COLUMNS = ("id", "user_id", "product_id", "quantity")
+
+
+def row_id(seed: int, table: str, index: int) -> str:
+    """Deterministic uuid7 of row `index` of `table`. Ids can be recomputed
+    from the index, so cart items never need the other tables in memory."""
+    digest = hashlib.blake2b(f"{seed}:{table}:{index}".encode(), digest_size=10).digest()
+    rand = int.from_bytes(digest, "big")
+    value = (EPOCH_MS + index) << 80 | 0x7 << 76 | (rand >> 68) << 64 | 0b10 << 62 | rand & ((1 << 62) - 1)
+    digits = f"{value:032x}"
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+class Zipf:
+    """
+    Draws 0-based ranks with probability proportional to 1 / (rank + 1) ** s.
+    Rank r maps to product (r * stride) % n, a fixed permutation, so the
+    popular products are spread over the catalog instead of being its first rows.
+    Attributes:
+        n (int): Number of products.
+        s (float): Exponent; higher values concentrate picks on fewer products.
+    """
+
+    def __init__(self, n: int, s: float):
+        self.n = n
+        self.s = s
+        self._cumulative = list(itertools.accumulate(1 / (rank + 1) ** s for rank in range(n)))
+        self._stride = next(p for p in range(max(n // 2 + 1, 2), 2 * n + 3) if math.gcd(p, n) == 1)
+
+    def product(self, rng: random.Random) -> int:
+        rank = bisect.bisect(self._cumulative, rng.random() * self._cumulative[-1])
+        return (min(rank, self.n - 1) * self._stride) % self.n
+
+
+def products(seed: int, count: int) -> Iterator[tuple]:
+    rng = random.Random(f"{seed}:products")
+    for index in range(count):
+        adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+        # prices are log-normal around 25, as in most catalogs; a few items are sold out
+        price = round(min(max(rng.lognormvariate(math.log(25), 0.9), 0.5), 99_999_999), 2)
+        stock = 0 if rng.random() < 0.05 else rng.randint(1, 500)
+        yield (
+            row_id(seed, "products", index),
+            f"{adjective.title()} {noun} {index}",
+            f"{noun.title()} from the {adjective} collection.",
+            f"{price:.2f}",
+            stock,
+        )
+
+
+def users(seed: int, count: int, hashed_password: str) -> Iterator[tuple]:
+    for index in range(count):
+        yield row_id(seed, "users", index), SHOPPER_EMAIL.format(index), hashed_password, "user"
+
+
+def cart_items(seed: int, user_count: int, zipf: Zipf, cart_share: float, mean_items: float) -> Iterator[tuple]:
+    """Items of the users with a cart: the number of items per cart is
+    geometric with mean `mean_items`, the products Zipfian, the quantity
+    mostly 1."""
+    rng = random.Random(f"{seed}:carts")
+    index = 0
+    for user in range(user_count):
+        if rng.random() >= cart_share:
+            continue
+        size = 1
+        while rng.random() > 1 / mean_items:
+            size += 1
+        user_id = row_id(seed, "users", user)
+        picked: set[int] = set()
+        for _ in range(min(size, zipf.n)):
+            product = zipf.product(rng)
+            if product in picked:
+                continue
+            picked.add(product)
+            quantity = rng.choices((1, 2, 3, 4, 5), weights=(70, 18, 7, 3, 2))[0]
+            yield row_id(seed, "cart_items", index), user_id, row_id(seed, "products", product), quantity
+            index += 1
+
+
+def batched(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _copy_text(value) -> str:
+    if value is None:
+        return r"\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(rows: list[tuple]) -> str:
+    """Rows in the text format of PostgreSQL's COPY."""
+    return "".join("\t".join(_copy_text(value) for value in row) + "\n" for row in rows)
+
+
+class DatabaseWriter:
+    """Bulk inserts into a database: COPY on PostgreSQL with psycopg2,
+    `executemany` through SQLAlchemy Core elsewhere."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+    def prepare(self) -> None:
+        BaseTableModel.metadata.create_all(bind=self.engine)
+        with self.engine.connect() as conn:
+            for model in (Product, User, CartItem):
+                if conn.execute(model.__table__.select().limit(1)).first() is not None:
+                    raise SystemExit(f"{model.__tablename__} is not empty; seed an empty database")
+
+    def write(self, table: str, columns: tuple, batch: list[tuple]) -> None:
+        if self.use_copy:
+            raw = self.engine.raw_connection()
+            try:
+                with raw.cursor() as cursor:
+                    cursor.copy_expert(
+                        f"COPY {table} ({', '.join(columns)}) FROM STDIN", io.StringIO(copy_rows(batch))
+                    )
+                raw.commit()
+            finally:
+                raw.close()
+            return
+        model_table = BaseTableModel.metadata.tables[table]
+        with self.engine.begin() as conn:
+            conn.execute(model_table.insert(), [dict(zip(columns, row)) for row in batch])
+
+    def close(self) -> None:
+        self.engine.dispose()
+
+
+class DumpWriter:
+    """Writes COPY blocks to a SQL file for `psql -f`. The schema is not
+    included: restore into a database migrated with `alembic upgrade head`."""
+
+    def __init__(self, output: TextIO):
+        self.output = output
+        self._table: Optional[str] = None
+
+    def prepare(self) -> None:
+        self.output.write("-- generated by scripts/seed_data.py\nBEGIN;\n")
+
+    def write(self, table: str, columns: tuple, batch: list[tuple]) -> None:
+        if table != self._table:
+            if self._table is not None:
+                self.output.write("\\.\n")
+            self.output.write(f"COPY {table} ({', '.join(columns)}) FROM stdin;\n")
+            self._table = table
+        self.output.write(copy_rows(batch))
+
+    def close(self) -> None:
+        if self._table is not None:
+            self.output.write("\\.\n")
+        self.output.write("COMMIT;\nANALYZE products;\nANALYZE users;\nANALYZE cart_items;\n")
+        self.output.close()
+
+
+def _fast_sqlite_writes(engine: Engine) -> None:
+    """Skip fsyncs while seeding a SQLite file: a failed seed is simply rerun."""
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
+
+
+def seed(writer, args: argparse.Namespace) -> dict[str, int]:
+    """Generate and write every table; returns the rows written per table."""
+    started = time.perf_counter()
+    hashed = hash_password(args.password)
+    zipf = Zipf(args.products, args.zipf) if args.products else None
+    logger.info("Prepared the password hash and popularity table in %.1fs", time.perf_counter() - started)
+
+    tables = [
+        ("products", PRODUCT_COLUMNS, products(args.seed, args.products)),
+        ("users", USER_COLUMNS, users(args.seed, args.users, hashed)),
+    ]
+    if zipf is not None:
+        tables.append(
+            (
+                "cart_items",
+                CART_ITEM_COLUMNS,
+                cart_items(args.seed, args.users, zipf, args.cart_share, args.mean_cart_items),
+            )
+        )
+
+    writer.prepare()
+    counts = {}
+    for table, columns, rows in tables:
+        table_started = time.perf_counter()
+        counts[table] = 0
+        for batch in batched(rows, args.batch_size):
+            writer.write(table, columns, batch)
+            counts[table] += len(batch)
+        elapsed = time.perf_counter() - table_started
+        logger.info(
+            "Wrote %s %s in %.1fs (%.0f rows/s)", counts[table], table, elapsed, counts[table] / max(elapsed, 1e-9)
+        )
+    writer.close()
+    return counts
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Seed a large synthetic dataset for performance testing.")
+    parser.add_argument("--products", type=int, default=1_000_000, help="Products to generate")
+    parser.add_argument("--users", type=int, default=100_000, help="Shopper accounts to generate")
+    parser.add_argument("--cart-share", type=float, default=0.3, help="Share of the users with a cart")
+    parser.add_argument("--mean-cart-items", type=float, default=3, help="Average items per cart")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of product popularity")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed; the same seed gives the same rows")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per COPY or executemany batch")
+    parser.add_argument("--password", default="LoadTest123!", help="Password of every shopper")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database-url", help="Database to seed (default: DATABASE_URL)")
+    target.add_argument("--dump", help="Write a PostgreSQL COPY dump to this file instead")
+    args = parser.parse_args(argv)
+    if args.mean_cart_items < 1:
+        parser.error("--mean-cart-items must be at least 1")
+    if not 0 <= args.cart_share <= 1:
+        parser.error("--cart-share must be between 0 and 1")
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    if args.dump:
+        writer = DumpWriter(open(args.dump, "w"))
+    else:
+        engine = create_engine(args.database_url or settings.database_url)
+        if engine.dialect.name == "sqlite":
+            _fast_sqlite_writes(engine)
+        writer = DatabaseWriter(engine)
+
+    started = time.perf_counter()
+    counts = seed(writer, args)
+    logger.info("Seeded %s in %.1fs", ", ".join(f"{n} {t}" for t, n in counts.items()), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
+import os
+import shutil
 import sys
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -11,10 +16,19 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+# the loggers open their files when app.utils.logger is imported, so the test
+# run's log directory is set before anything from the app is imported
+TEST_LOG_DIR = tempfile.mkdtemp(prefix="test-logs-")
+os.environ["LOG_DIR"] = TEST_LOG_DIR
+os.environ["SLOW_QUERY_LOG_FILE"] = os.path.join(TEST_LOG_DIR, "slow_queries.log")
+
 
 from app.main import app as fastapi_app # noqa: E402
-from app.db.database import get_db # noqa: E402
+from app.api.models.user import User  # noqa: E402
+from app.db.database import get_db, unit_of_work # noqa: E402
 from app.core.base.model import BaseTableModel  # noqa: E402
+from app.core.cache.response import response_cache  # noqa: E402
+from app.core.rate_limit.limiter import rate_limiter  # noqa: E402
 
 import app.api.models  # noqa: F401 E402
 
@@ -23,7 +37,9 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 
 @pytest.fixture(scope="function")
@@ -41,10 +57,95 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     def _get_test_db():
-        yield db_session
+        with unit_of_work(db_session):
+            yield db_session
 
     fastapi_app.dependency_overrides[get_db] = _get_test_db
     try:
         yield TestClient(fastapi_app)
     finally:
-        fastapi_app.dependency_overrides.clear()
\ No newline at end of file
+        fastapi_app.dependency_overrides.clear()
+
+
+def _auth_headers(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def register(client):
+    """Register a new user through the API, e.g.
+
+        email, headers = register()
+    """
+
+    def _register():
+        email = f"user_{uuid4().hex}@example.com"
+        response = client.post(
+            "/api/v1/auth/register", json={"email": email, "password": "Testpass123!"}
+        )
+        return email, _auth_headers(response.json()["access_token"])
+
+    return _register
+
+
+@pytest.fixture
+def user_headers(register):
+    return register()[1]
+
+
+@pytest.fixture
+def admin_headers(register, db_session):
+    email, headers = register()
+    db_session.query(User).filter_by(email=email).update({"role": "admin"})
+    db_session.commit()
+    return headers
+
+
+@pytest.fixture
+def assert_num_queries():
+    """Assert how many SQL statements run inside a block, e.g.
+
+        with assert_num_queries(2):
+            client.get("/api/v1/cart", headers=headers)
+    """
+
+    @contextmanager
+    def _assert_num_queries(expected: int):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+        assert len(statements) == expected, (
+            f"expected {expected} statements, got {len(statements)}:\n"
+            + "\n".join(statements)
+        )
+
+    return _assert_num_queries
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _test_log_dir():
+    """Test runs log to a temporary directory, never to the tracked logs/."""
+    yield TEST_LOG_DIR
+    shutil.rmtree(TEST_LOG_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _clear_response_cache():
+    """Cached responses must not leak between tests."""
+    response_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    """Every test starts with full rate limit buckets."""
+    rate_limiter.reset()
+    yield
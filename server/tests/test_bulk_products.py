@@ -0,0 +1,110 @@
+from uuid import uuid4
+
+import pytest
+
+from app.api.models.cart_item import CartItem
+from app.api.models.product import Product
+from app.core.base.repository import BaseRepository
+from app.core.stream.hub import stream_hub
+
+
+@pytest.fixture
+def product_ids(client, admin_headers):
+    return [
+        client.post(
+            "/api/v1/products",
+            json={"name": f"Product {uuid4().hex}", "price": 10, "stock": 5},
+            headers=admin_headers,
+        ).json()["data"]["id"]
+        for _ in range(6)
+    ]
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(stream_hub, "publish", events.extend)
+    return events
+
+
+def _bulk(client, headers, operations):
+    return client.post("/api/v1/products/bulk", json={"operations": operations}, headers=headers)
+
+
+def test_bulk_changes_report_every_outcome(client, db_session, register, admin_headers, product_ids, published):
+    restock, sell_out, oversell, reprice, remove, in_cart = product_ids
+    shopper = register()[1]
+    client.post("/api/v1/cart", json={"product_id": in_cart, "quantity": 1}, headers=shopper)
+    missing = str(uuid4())
+
+    response = _bulk(
+        client,
+        admin_headers,
+        [
+            {"id": restock, "stock_delta": 10},
+            {"id": sell_out, "stock_delta": -5},
+            {"id": oversell, "stock_delta": -6},
+            {"id": reprice, "price": "12.34"},
+            {"id": remove, "delete": True},
+            {"id": in_cart, "delete": True},
+            {"id": restock, "price": "1.00"},
+            {"id": missing, "stock_delta": 1},
+            {"id": "not-a-uuid", "delete": True},
+        ],
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    outcomes = [(result["id"], result["action"], result["status"]) for result in data["results"]]
+    assert outcomes == [
+        (restock, "stock", "updated"),
+        (sell_out, "stock", "updated"),
+        (oversell, "stock", "insufficient_stock"),
+        (reprice, "price", "updated"),
+        (remove, "delete", "deleted"),
+        (in_cart, "delete", "deleted"),
+        (restock, "price", "duplicate"),
+        (missing, "stock", "not_found"),
+        ("not-a-uuid", "delete", "not_found"),
+    ]
+    assert (data["applied"], data["failed"]) == (5, 4)
+    assert data["results"][0]["stock"] == 15
+    assert data["results"][3]["price"] == 12.34
+
+    stocks = dict(db_session.query(Product.id, Product.stock).all())
+    assert stocks == {restock: 15, sell_out: 0, oversell: 5, reprice: 5}
+    # the deleted product left the shopper's cart in the same transaction
+    assert db_session.query(CartItem).count() == 0
+    assert {(event["id"], event["deleted"]) for event in published[-5:]} == {
+        (restock, False), (sell_out, False), (reprice, False), (remove, True), (in_cart, True)
+    }
+
+
+def test_bulk_changes_are_set_based(client, admin_headers, product_ids, monkeypatch, assert_num_queries):
+    operations = [{"id": product_id, "stock_delta": 1} for product_id in product_ids]
+    # auth lookup of the admin, one UPDATE ... FROM (VALUES ...) per chunk and
+    # the statistics shard upsert
+    with assert_num_queries(3):
+        _bulk(client, admin_headers, operations)
+
+    monkeypatch.setattr(BaseRepository, "BULK_CHUNK_SIZE", 4)
+    with assert_num_queries(4):
+        response = _bulk(client, admin_headers, operations)
+    assert [result["stock"] for result in response.json()["data"]["results"]] == [7] * 6
+
+
+def test_bulk_changes_invalidate_cached_products(client, admin_headers, user_headers, product_ids):
+    client.get(f"/api/v1/products/{product_ids[0]}", headers=user_headers)
+
+    _bulk(client, admin_headers, [{"id": product_ids[0], "price": "99.99"}])
+
+    detail = client.get(f"/api/v1/products/{product_ids[0]}", headers=user_headers)
+    assert detail.headers["x-cache"] == "MISS"
+    assert float(detail.json()["data"]["price"]) == 99.99
+
+
+def test_bulk_operations_are_validated(client, admin_headers, user_headers, product_ids):
+    assert _bulk(client, admin_headers, []).status_code == 422
+    both = {"id": product_ids[0], "stock_delta": 1, "delete": True}
+    assert _bulk(client, admin_headers, [both]).status_code == 422
+    assert _bulk(client, user_headers, [{"id": product_ids[0], "delete": True}]).status_code == 403
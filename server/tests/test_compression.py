@@ -0,0 +1,96 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.middleware.compression import (
+    CompressionMiddleware,
+    compressed_body_cache,
+    negotiate_encoding,
+)
+
+LARGE_PAYLOAD = {"items": [{"name": f"Product {i}", "price": "9.99"} for i in range(200)]}
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/large")
+    async def large():
+        return JSONResponse(LARGE_PAYLOAD)
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        chunks = (f"line {i}\n".encode() * 50 for i in range(20))
+        return StreamingResponse(chunks, media_type="text/plain")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter([b"data: x\n\n" * 200]), media_type="text/event-stream")
+
+    @app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse(
+            gzip.compress(b"x" * 2000), headers={"Content-Encoding": "gzip"}
+        )
+
+    return TestClient(app)
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*") in ("br", "gzip")
+    assert negotiate_encoding("") is None
+
+
+def test_large_responses_are_gzipped():
+    client = _client()
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == LARGE_PAYLOAD
+
+
+def test_small_and_unaccepted_responses_are_not_compressed():
+    client = _client()
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == LARGE_PAYLOAD
+
+
+def test_streams_are_compressed_incrementally_but_event_streams_are_not():
+    client = _client()
+
+    stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    events = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+
+    assert stream.headers["content-encoding"] == "gzip"
+    assert stream.text == "".join(f"line {i}\n" * 50 for i in range(20))
+    assert "content-encoding" not in events.headers
+    assert encoded.content == b"x" * 2000
+
+
+def test_identical_bodies_are_compressed_once(monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_GZIP_LEVEL", 5)
+    compressed_body_cache.clear()
+    client = _client()
+
+    for _ in range(3):
+        client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert (compressed_body_cache.misses, compressed_body_cache.hits) == (1, 2)
@@ -0,0 +1,77 @@
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, event
+
+from app.core import health
+from app.core.health import ReadinessCheck
+
+
+@pytest.fixture
+def readiness(monkeypatch, db_session):
+    check = ReadinessCheck(db_session.get_bind(), ttl=60)
+    monkeypatch.setattr("app.main.readiness_check", check)
+    return check
+
+
+def test_liveness_does_not_touch_the_database(client, assert_num_queries):
+    with assert_num_queries(0):
+        response = client.get("/health/live")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness_reports_checks(client, readiness):
+    response = client.get("/health/ready")
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["database"]["ok"] is True
+    assert "checkout_wait_ms" in body["checks"]["database"]
+
+
+def test_readiness_caches_the_database_check(client, readiness):
+    statements = []
+    event.listen(readiness.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    for _ in range(3):
+        assert client.get("/health/ready").status_code == status.HTTP_200_OK
+
+    assert statements.count("SELECT 1") == 1
+
+
+def test_not_ready_when_the_pool_is_exhausted(client, readiness, tmp_path):
+    readiness.engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0)
+    held = readiness.engine.connect()
+    try:
+        response = client.get("/health/ready")
+    finally:
+        held.close()
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    body = response.json()
+    assert body["checks"]["pool"]["exhausted"] is True
+    assert body["reasons"] == ["database connection pool exhausted"]
+
+
+def test_not_ready_when_the_threadpool_is_saturated(client, readiness, monkeypatch):
+    monkeypatch.setattr(health, "threadpool_stats", lambda: {"size": 40, "busy": 40, "waiting": 25})
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["reasons"] == ["25 requests waiting for the threadpool"]
+
+
+def test_not_ready_when_the_database_fails(client, readiness):
+    readiness.engine = create_engine("sqlite:////nonexistent/dir/db.sqlite")
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    body = response.json()
+    assert body["checks"]["database"]["ok"] is False
+    assert body["reasons"] == ["database: unavailable"]
+    # the driver's message, naming the database path, stays in the log
+    assert "nonexistent" not in response.text
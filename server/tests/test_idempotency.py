@@ -0,0 +1,194 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.api.models.cart_item import CartItem
+from app.api.models.idempotency_key import IdempotencyKey
+from app.api.models.user import User
+from app.api.repositories.idempotency_key import IdempotencyKeyRepository
+from app.api.services.cart_item import CartItemService
+from app.core.base.model import BaseTableModel
+from app.core.idempotency import idempotency_keys
+from app.db.database import get_db, unit_of_work
+from app.main import app as fastapi_app
+
+
+def _make_admin(register, sessions):
+    email, headers = register()
+    with sessions() as db:
+        db.query(User).filter_by(email=email).update({"role": "admin"})
+        db.commit()
+    return headers
+
+
+def _create_product(client, admin_headers, stock=10):
+    response = client.post(
+        "/api/v1/products",
+        json={"name": f"Product {uuid4().hex}", "price": 4.0, "stock": stock},
+        headers=admin_headers,
+    )
+    return response.json()["data"]["id"]
+
+
+@pytest.fixture
+def product_id(client, admin_headers):
+    return _create_product(client, admin_headers)
+
+
+def _quantities(db):
+    return [item.quantity for item in db.query(CartItem).all()]
+
+
+def test_retry_replays_the_response_without_adding_again(client, db_session, user_headers, product_id):
+    headers = {**user_headers, "Idempotency-Key": "add-1"}
+    body = {"product_id": product_id, "quantity": 2}
+
+    first = client.post("/api/v1/cart", json=body, headers=headers)
+    retry = client.post("/api/v1/cart", json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _quantities(db_session) == [2]
+
+    # without a key, a repeated request is a new one
+    client.post("/api/v1/cart", json=body, headers=user_headers)
+    assert _quantities(db_session) == [4]
+
+
+def test_keys_are_scoped_by_user(client, db_session, register, user_headers, product_id):
+    body = {"product_id": product_id, "quantity": 1}
+    other_headers = register()[1]
+    client.post("/api/v1/cart", json=body, headers={**user_headers, "Idempotency-Key": "same"})
+    client.post("/api/v1/cart", json=body, headers={**other_headers, "Idempotency-Key": "same"})
+    assert _quantities(db_session) == [1, 1]
+
+
+def test_key_reused_for_another_request_is_refused(client, db_session, user_headers, product_id):
+    headers = {**user_headers, "Idempotency-Key": "add-2"}
+    client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 1}, headers=headers)
+
+    response = client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 3}, headers=headers)
+
+    assert response.status_code == 422
+    assert _quantities(db_session) == [1]
+
+
+def test_failed_requests_and_expired_keys_are_not_replayed(client, db_session, user_headers, product_id):
+    headers = {**user_headers, "Idempotency-Key": "add-3"}
+    body = {"product_id": product_id, "quantity": 50}
+
+    # more than in stock: the error is not stored, so the key stays free
+    assert client.post("/api/v1/cart", json=body, headers=headers).status_code == 400
+    assert db_session.query(IdempotencyKey).count() == 0
+
+    body["quantity"] = 1
+    assert client.post("/api/v1/cart", json=body, headers=headers).status_code == 201
+    db_session.query(IdempotencyKey).update(
+        {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    response = client.post("/api/v1/cart", json=body, headers=headers)
+
+    assert "Idempotent-Replayed" not in response.headers
+    assert _quantities(db_session) == [2]
+
+
+def test_claim_blocked_by_a_locked_database_is_a_conflict(client, db_session, user_headers, product_id, monkeypatch):
+    headers = {**user_headers, "Idempotency-Key": "add-locked"}
+    body = {"product_id": product_id, "quantity": 1}
+    create = IdempotencyKeyRepository.create
+
+    def locked(self, obj):
+        monkeypatch.setattr(IdempotencyKeyRepository, "create", create)
+        raise OperationalError("INSERT INTO idempotency_keys", {}, sqlite3.OperationalError("database is locked"))
+
+    monkeypatch.setattr(IdempotencyKeyRepository, "create", locked)
+    response = client.post("/api/v1/cart", json=body, headers=headers)
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert _quantities(db_session) == []
+    assert client.post("/api/v1/cart", json=body, headers=headers).status_code == 201
+
+def test_no_content_responses_are_replayed(client, db_session, user_headers, product_id):
+    item = client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 1}, headers=user_headers)
+    headers = {**user_headers, "Idempotency-Key": "remove-1"}
+    path = f"/api/v1/cart/{item.json()['data']['id']}"
+
+    first = client.delete(path, headers=headers)
+    retry = client.delete(path, headers=headers)
+
+    # without the key, the retry would answer 404
+    assert first.status_code == retry.status_code == 204
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.fixture
+def file_sessions(tmp_path):
+    """Sessions on a SQLite file, one per request as in production."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False})
+    BaseTableModel.metadata.create_all(bind=engine)
+    sessions = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)
+
+    def _get_db():
+        db = sessions()
+        try:
+            with unit_of_work(db):
+                yield db
+        finally:
+            db.close()
+
+    fastapi_app.dependency_overrides[get_db] = _get_db
+    yield sessions
+    fastapi_app.dependency_overrides.clear()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("workers", ["same worker", "two workers"])
+def test_concurrent_requests_with_a_key_are_coalesced(client, register, file_sessions, monkeypatch, workers):
+    product_id = _create_product(client, _make_admin(register, file_sessions))
+    headers = {**register()[1], "Idempotency-Key": "add-4"}
+
+    add_item_to_cart = CartItemService.add_item_to_cart
+
+    def slow_add_item_to_cart(self, *args):
+        time.sleep(0.2)
+        return add_item_to_cart(self, *args)
+
+    monkeypatch.setattr(CartItemService, "add_item_to_cart", slow_add_item_to_cart)
+    if workers == "two workers":
+        # without the in-process lock, only the database keeps them apart
+        @contextmanager
+        def no_lock(key, timeout):
+            yield True
+
+        monkeypatch.setattr(idempotency_keys.locks, "hold", no_lock)
+
+    responses = []
+
+    def send():
+        responses.append(
+            client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 1}, headers=headers)
+        )
+
+    threads = [threading.Thread(target=send) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(response.status_code for response in responses) == [201, 201]
+    assert responses[0].content == responses[1].content
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 1
+    with file_sessions() as db:
+        assert _quantities(db) == [1]
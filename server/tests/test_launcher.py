@@ -0,0 +1,119 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.core.config import settings
+from app.launcher import (
+    available_cpus,
+    clear_metrics_snapshots,
+    load_app,
+    parse_args,
+    server_config,
+    warm_up,
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_warm_up_prebuilds_the_openapi_schema():
+    app, import_ms = load_app("app.main:app")
+    app.openapi_schema = None
+
+    warm_up(app)
+
+    assert import_ms >= 0
+    assert "/api/v1/products" in app.openapi_schema["paths"]
+
+
+def test_stale_metrics_snapshots_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "metrics-123.json").write_text("{}")
+    (tmp_path / "keep.txt").write_text("")
+
+    clear_metrics_snapshots()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["keep.txt"]
+
+
+def test_workers_default_to_available_cpus(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_THREADPOOL_SIZE", settings.SERVER_THREADPOOL_SIZE)
+    args = parse_args(["--workers", "0", "--keep-alive", "15", "--threadpool-size", "64"])
+
+    assert args.workers == available_cpus() >= 1
+    assert settings.SERVER_THREADPOOL_SIZE == 64
+
+    config = server_config(object(), args)
+    assert config.timeout_keep_alive == 15
+    assert config.access_log is False
+    assert config.loop in ("uvloop", "asyncio") and config.http in ("httptools", "h11")
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _start_launcher(tmp_path, workers: int) -> tuple[subprocess.Popen, int]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.launcher", "--port", str(port), "--workers", str(workers)],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "LOG_DIR": str(tmp_path)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/probe", timeout=1) as response:
+                assert response.status == 200
+                return process, port
+        except OSError:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise AssertionError("launcher did not start")
+            time.sleep(0.1)
+
+
+def _wait_for_workers(process: subprocess.Popen, count: int) -> None:
+    deadline = time.monotonic() + 30
+    while True:
+        with open(f"/proc/{process.pid}/task/{process.pid}/children") as children:
+            if len(children.read().split()) == count:
+                return
+        assert time.monotonic() < deadline, f"launcher did not settle on {count} workers"
+        time.sleep(0.1)
+
+
+def test_forked_workers_serve_and_stop_on_sigterm(tmp_path):
+    process, _ = _start_launcher(tmp_path, workers=2)
+    try:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        process.kill()
+
+
+def test_sigttin_and_sigttou_scale_the_workers(tmp_path):
+    process, port = _start_launcher(tmp_path, workers=1)
+    try:
+        # a signal sent while the same one is pending is merged into it
+        process.send_signal(signal.SIGTTIN)
+        _wait_for_workers(process, 2)
+        process.send_signal(signal.SIGTTIN)
+        _wait_for_workers(process, 3)
+
+        process.send_signal(signal.SIGTTOU)
+        _wait_for_workers(process, 2)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/probe", timeout=5) as response:
+            assert response.status == 200
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        process.kill()
@@ -0,0 +1,82 @@
+import gzip
+import json
+import logging
+
+from fastapi import status
+
+from app.utils.logger import (
+    CompressedRotatingFileHandler,
+    InfoSampler,
+    JSONFormatter,
+    info_sampler,
+    LogPipeline,
+    log_pipeline,
+    logger,
+)
+
+
+def _record(level=logging.INFO, lineno=1, created=1000.0, **extra):
+    record = logging.LogRecord("app", level, "service.py", lineno, "Cart %s", ("42",), None)
+    record.created = created
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JSONFormatter().format(_record(user_id=7)))
+
+    assert entry["message"] == "Cart 42"
+    assert entry["level"] == "INFO"
+    assert entry["user_id"] == 7
+
+
+def test_sampler_limits_info_records_per_call_site():
+    sampler = InfoSampler(per_second=2)
+
+    passed = [sampler.filter(_record()) for _ in range(5)]
+    other_site = sampler.filter(_record(lineno=2))
+    warning = sampler.filter(_record(level=logging.WARNING))
+    next_second = sampler.filter(_record(created=1001.0))
+
+    assert passed == [True, True, False, False, False]
+    assert other_site and warning and next_second
+    assert sampler.dropped == 3
+
+
+def test_pipeline_writes_in_background_and_compresses_rotated_files(tmp_path):
+    pipeline = LogPipeline()
+    target = logging.getLogger("tests.pipeline")
+    target.propagate = False
+    path = tmp_path / "app.log"
+    handler = CompressedRotatingFileHandler(str(path), maxBytes=200, backupCount=2)
+    pipeline.attach(target, handler)
+    try:
+        for number in range(20):
+            target.warning("record %s of the rotation test", number)
+        pipeline.flush()
+    finally:
+        pipeline.stop()
+
+    rotated = tmp_path / "app.log.1.gz"
+    assert rotated.exists()
+    assert "rotation test" in gzip.decompress(rotated.read_bytes()).decode()
+    assert "record 19" in path.read_text()
+
+
+def test_client_errors_are_not_logged_as_errors(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(info_sampler, "per_second", 0)
+    handler = logging.FileHandler(tmp_path / "levels.log")
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    listener = log_pipeline._listeners[logger.name]
+    listener.handlers += (handler,)
+    try:
+        response = client.get("/api/v1/cart", headers={"Authorization": "Bearer invalid"})
+        log_pipeline.flush()
+    finally:
+        listener.handlers = listener.handlers[:-1]
+        handler.close()
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    lines = (tmp_path / "levels.log").read_text().splitlines()
+    assert any(line.startswith("INFO HTTP Exception") for line in lines)
+    assert not any(line.startswith("ERROR") for line in lines)
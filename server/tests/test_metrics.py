@@ -0,0 +1,129 @@
+import json
+import os
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import Histogram, MetricsRegistry, registry
+from app.main import app as fastapi_app
+
+DEAD_PID = 4_194_305  # above the kernel's pid_max, so never a live process
+
+
+METRICS_TOKEN = "scrape-token"
+SCRAPE_HEADERS = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+
+
+@pytest.fixture(autouse=True)
+def _metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", METRICS_TOKEN)
+
+
+@pytest.fixture(autouse=True)
+def _empty_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+def test_requests_are_counted_per_route(client):
+    client.get("/probe")
+    client.get("/probe")
+    client.get("/no-such-page")
+
+    body = client.get("/metrics", headers=SCRAPE_HEADERS).text
+
+    assert 'http_requests_total{method="GET",route="/probe",status="200"} 2' in body
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/probe"} 2' in body
+    assert 'http_response_size_bytes_bucket{method="GET",route="/probe",le="+Inf"} 2' in body
+    assert '# TYPE cache_lookups_total counter' in body
+
+
+def test_database_statements_are_counted_per_route(client):
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "metrics@example.com", "password": "Testpass123!"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    body = client.get("/metrics", headers=SCRAPE_HEADERS).text
+
+    assert 'db_statements_total{method="POST",route="/api/v1/auth/register"} 2' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    local = MetricsRegistry()
+    latency = local.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1)))
+    for value in (0.05, 0.5, 5):
+        latency.observe(("/",), value)
+
+    body = local.render()
+
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 1' in body
+    assert 'latency_seconds_bucket{route="/",le="1"} 2' in body
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 3' in body
+    assert 'latency_seconds_count{route="/"} 3' in body
+
+
+def test_snapshots_of_other_workers_are_aggregated(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    client.get("/probe")
+    other_worker = {
+        "pid": DEAD_PID,
+        "metrics": {
+            "http_requests_total": [[["GET", "/probe", "200"], 5]],
+            "http_requests_in_progress": [[["GET"], 3]],
+        },
+    }
+    (tmp_path / f"metrics-{DEAD_PID}.json").write_text(json.dumps(other_worker))
+
+    registry.write_snapshot()
+    body = client.get("/metrics", headers=SCRAPE_HEADERS).text
+
+    assert 'http_requests_total{method="GET",route="/probe",status="200"} 6' in body
+    # only the /metrics request itself is in flight: gauges of exited workers are dropped
+    assert 'http_requests_in_progress{method="GET"} 1' in body
+    assert len(list(tmp_path.glob("metrics-*.json"))) == 2
+
+
+def test_shared_gauges_of_live_workers_are_not_summed(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    live_pid = os.getppid()
+    other_worker = {
+        "pid": live_pid,
+        "metrics": {
+            "http_requests_in_progress": [[["GET"], 2]],
+            "outbox_lag_seconds": [[[], 7.5]],
+        },
+    }
+    (tmp_path / f"metrics-{live_pid}.json").write_text(json.dumps(other_worker))
+
+    body = client.get("/metrics", headers=SCRAPE_HEADERS).text
+
+    # requests in flight are per worker; the outbox lag is the same table seen by all
+    assert 'http_requests_in_progress{method="GET"} 3' in body
+    assert "outbox_lag_seconds 7.5" in body
+
+
+def test_threadpool_saturation_is_reported(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_THREADPOOL_SIZE", 7)
+    with TestClient(fastapi_app) as client:
+        body = client.get("/metrics", headers=SCRAPE_HEADERS).text
+
+    assert "threadpool_size 7" in body
+    # the /metrics endpoint itself runs on the pool
+    assert "threadpool_busy_threads 1" in body
+    assert "threadpool_waiting_tasks 0" in body
+
+
+def test_metrics_require_the_scrape_token(client, monkeypatch):
+    assert client.get("/metrics").status_code == status.HTTP_401_UNAUTHORIZED
+    wrong = {"Authorization": "Bearer not-the-token"}
+    assert client.get("/metrics", headers=wrong).status_code == status.HTTP_401_UNAUTHORIZED
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    response = client.get("/metrics", headers=SCRAPE_HEADERS)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
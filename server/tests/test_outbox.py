@@ -0,0 +1,106 @@
+import json
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.api.models.outbox_event import OutboxEvent
+from app.core.config import settings
+from app.core.outbox.relay import OutboxRelay
+from app.core.outbox.sinks import CallbackSink, FileSink, SQLiteSink
+
+
+@pytest.fixture(autouse=True)
+def outbox_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", True)
+
+
+@pytest.fixture
+def product_id(client, admin_headers):
+    response = client.post(
+        "/api/v1/products",
+        json={"name": f"Product {uuid4().hex}", "price": 3, "stock": 10},
+        headers=admin_headers,
+    )
+    return response.json()["data"]["id"]
+
+
+@pytest.fixture
+def sessions(db_session):
+    return sessionmaker(bind=db_session.get_bind(), expire_on_commit=False)
+
+
+def _topics(db):
+    return [event.topic for event in db.query(OutboxEvent).order_by(OutboxEvent.id)]
+
+
+def test_changes_are_recorded_with_their_transaction(client, db_session, register, admin_headers, product_id):
+    shopper = register()[1]
+    item = client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 1}, headers=shopper)
+    client.put(f"/api/v1/cart/{item.json()['data']['id']}", json={"quantity": 2}, headers=shopper)
+    # refused writes roll back their events with them
+    client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 99}, headers=shopper)
+    client.delete("/api/v1/cart", headers=shopper)
+    client.post("/api/v1/products/bulk", json={"operations": [{"id": product_id, "delete": True}]}, headers=admin_headers)
+
+    assert _topics(db_session) == [
+        "product.created",
+        "cart_item.added",
+        "cart_item.updated",
+        "cart.cleared",
+        "product.deleted",
+    ]
+    created = db_session.query(OutboxEvent).filter_by(topic="product.created").one()
+    assert created.key == product_id
+    assert json.loads(created.payload)["stock"] == 10
+
+
+def test_nothing_is_recorded_when_disabled(client, db_session, user_headers, product_id, monkeypatch):
+    db_session.query(OutboxEvent).delete()
+    db_session.commit()
+    monkeypatch.setattr(settings, "OUTBOX_ENABLED", False)
+    client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 1}, headers=user_headers)
+    assert _topics(db_session) == []
+
+
+def test_relay_delivers_batches_to_every_sink(db_session, sessions, product_id, tmp_path):
+    seen = []
+    file_sink = FileSink(str(tmp_path / "events.jsonl"))
+    sqlite_sink = SQLiteSink(str(tmp_path / "events.db"))
+    relay = OutboxRelay(sessions, [file_sink, sqlite_sink, CallbackSink(seen.extend)], batch_size=1)
+
+    assert relay.run_once() == 1
+    assert relay.run_once() == 0
+    assert relay.delivered == 1 and relay.lag == 0
+    assert _topics(db_session) == []
+
+    lines = (tmp_path / "events.jsonl").read_text().splitlines()
+    assert [json.loads(line)["topic"] for line in lines] == ["product.created"]
+    assert seen[0]["payload"]["id"] == product_id
+    # a redelivered batch is stored once
+    sqlite_sink.deliver(seen)
+    assert sqlite_sink._connection().execute("SELECT count(*) FROM events").fetchone() == (1,)
+
+
+def test_refused_batches_stay_for_a_retry(db_session, sessions, product_id):
+    calls = []
+
+    def flaky(events):
+        calls.append(events)
+        if len(calls) == 1:
+            raise ConnectionError("index unavailable")
+
+    relay = OutboxRelay(sessions, [CallbackSink(flaky)], delete_delivered=False)
+    with pytest.raises(ConnectionError):
+        relay.run_once()
+    event = db_session.query(OutboxEvent).one()
+    db_session.refresh(event)
+    assert (event.attempts, event.delivered_at) == (1, None)
+    assert relay.failed == 1 and relay.lag > 0
+
+    assert relay.run_once() == 1
+    db_session.refresh(event)
+    assert event.delivered_at is not None
+    assert calls[0] == calls[1]
+    # delivered events are kept but not read again
+    assert relay.run_once() == 0
@@ -1,6 +1,7 @@
 from uuid import uuid4
 
 from fastapi import status
+from sqlalchemy import text
 
 from app.api.models.user import User
 
@@ -69,4 +70,28 @@ def test_admin_can_create_and_fetch_product(client, db_session):
         f"/api/v1/products/{product_id}", headers=_auth_headers(token)
     )
     assert detail_response.status_code == status.HTTP_200_OK
-    assert detail_response.json()["data"]["name"] == product_payload["name"]
\ No newline at end of file
+    assert detail_response.json()["data"]["name"] == product_payload["name"]
+
+def test_ids_are_stored_as_16_byte_keys(client, db_session):
+    register = client.post(
+        "/api/v1/auth/register",
+        json={"email": f"user_{uuid4().hex}@example.com", "password": "Testpass123!"},
+    )
+    assert register.status_code == status.HTTP_201_CREATED
+
+    length, kind = db_session.execute(
+        text("SELECT length(id), typeof(id) FROM users LIMIT 1")
+    ).one()
+    assert (length, kind) == (16, "blob")
+
+
+def test_retrieve_product_with_malformed_id_returns_404(client):
+    register = client.post(
+        "/api/v1/auth/register",
+        json={"email": f"user_{uuid4().hex}@example.com", "password": "Testpass123!"},
+    )
+    token = register.json()["access_token"]
+
+    response = client.get("/api/v1/products/not-a-uuid", headers=_auth_headers(token))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
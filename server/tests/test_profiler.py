@@ -0,0 +1,74 @@
+import pytest
+from fastapi import status
+
+from app.core.config import settings
+from app.core.profiling import profile_store
+
+
+@pytest.fixture(autouse=True)
+def _empty_profile_store():
+    profile_store.clear()
+    yield
+    profile_store.clear()
+
+
+def test_admin_request_is_profiled(client, admin_headers):
+    response = client.get("/api/v1/products", headers={**admin_headers, "X-Profile": "1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    profile_id = response.headers["X-Profile-Id"]
+
+    listing = client.get("/api/v1/admin/profiles", headers=admin_headers)
+    assert listing.status_code == status.HTTP_200_OK
+    [profile] = listing.json()["data"]
+    assert profile["id"] == profile_id
+    assert profile["path"] == "/api/v1/products"
+
+    collapsed = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=admin_headers)
+    assert collapsed.status_code == status.HTTP_200_OK
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    for line in collapsed.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+
+def test_query_flag_profiles_request(client, admin_headers):
+    response = client.get("/api/v1/products?profile=1", headers=admin_headers)
+
+    assert "X-Profile-Id" in response.headers
+
+
+def test_non_admin_is_not_profiled(client, user_headers):
+    response = client.get("/api/v1/products", headers={**user_headers, "X-Profile": "1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "X-Profile-Id" not in response.headers
+    assert profile_store.recent() == []
+
+
+def test_unflagged_request_is_not_profiled(client, admin_headers):
+    response = client.get("/api/v1/products", headers=admin_headers)
+
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profiles_are_admin_only(client, user_headers, admin_headers):
+    assert client.get("/api/v1/admin/profiles", headers=user_headers).status_code == status.HTTP_403_FORBIDDEN
+    missing = client.get("/api/v1/admin/profiles/unknown", headers=admin_headers)
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_profiles_are_read_back_from_profiler_dir(client, admin_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_DIR", str(tmp_path))
+    response = client.get("/api/v1/products", headers={**admin_headers, "X-Profile": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+    written = (tmp_path / f"{profile_id}.collapsed").read_text()
+
+    # e.g. profiled by another worker, or pushed out of this one's memory
+    profile_store.clear()
+    collapsed = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=admin_headers)
+
+    assert collapsed.status_code == status.HTTP_200_OK
+    assert collapsed.text == written
+    missing = client.get(f"/api/v1/admin/profiles/{'0' * 32}", headers=admin_headers)
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,202 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.models.product import Product
+from app.api.models.user import User
+from app.core.config import settings
+from app.db import instrumentation
+
+
+def _auth_headers(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _register(client, email=None):
+    email = email or f"user_{uuid4().hex}@example.com"
+    response = client.post(
+        "/api/v1/auth/register", json={"email": email, "password": "Testpass123!"}
+    )
+    return email, response.json()
+
+
+@pytest.fixture
+def user_headers(client):
+    _, data = _register(client)
+    return _auth_headers(data["access_token"])
+
+
+@pytest.fixture
+def admin_headers(client, db_session):
+    email, data = _register(client)
+    db_session.query(User).filter_by(email=email).update({"role": "admin"})
+    db_session.commit()
+    return _auth_headers(data["access_token"])
+
+
+@pytest.fixture
+def product_id(client, admin_headers):
+    response = client.post(
+        "/api/v1/products",
+        json={"name": f"Product {uuid4().hex}", "price": 12.5, "stock": 10},
+        headers=admin_headers,
+    )
+    return response.json()["data"]["id"]
+
+
+@pytest.fixture
+def cart_item_id(client, user_headers, product_id):
+    response = client.post(
+        "/api/v1/cart",
+        json={"product_id": product_id, "quantity": 1},
+        headers=user_headers,
+    )
+    return response.json()["data"]["id"]
+
+
+def test_register_queries(client, assert_num_queries):
+    with assert_num_queries(2):
+        _register(client)
+
+
+def test_login_queries(client, assert_num_queries):
+    email, _ = _register(client)
+    with assert_num_queries(1):
+        response = client.post(
+            "/api/v1/auth/login", json={"email": email, "password": "Testpass123!"}
+        )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_user_queries(client, user_headers, assert_num_queries):
+    with assert_num_queries(1):
+        client.get("/api/v1/auth/user", headers=user_headers)
+
+
+def test_list_products_queries(client, user_headers, product_id, assert_num_queries):
+    # user lookup, one count, one page
+    with assert_num_queries(3):
+        response = client.get("/api/v1/products", headers=user_headers)
+    assert response.json()["data"]["total_items"] == 1
+
+
+def test_retrieve_product_queries(client, user_headers, product_id, assert_num_queries):
+    with assert_num_queries(2):
+        client.get(f"/api/v1/products/{product_id}", headers=user_headers)
+
+
+def test_create_product_queries(client, admin_headers, assert_num_queries):
+    # the writes count toward the dashboard statistics in one shard upsert
+    with assert_num_queries(4):
+        response = client.post(
+            "/api/v1/products",
+            json={"name": f"Product {uuid4().hex}", "price": 3, "stock": 1},
+            headers=admin_headers,
+        )
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_update_product_queries(client, admin_headers, product_id, assert_num_queries):
+    with assert_num_queries(5):
+        client.put(
+            f"/api/v1/products/{product_id}",
+            json={"name": f"Renamed {uuid4().hex}", "stock": 3},
+            headers=admin_headers,
+        )
+
+
+def test_delete_product_queries(client, admin_headers, product_id, assert_num_queries):
+    # shard upsert, and the product's cart counters are dropped
+    with assert_num_queries(6):
+        response = client.delete(
+            f"/api/v1/products/{product_id}", headers=admin_headers
+        )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_add_new_item_to_cart_queries(
+    client, user_headers, product_id, assert_num_queries
+):
+    # statistics: the count telling whether the cart was empty, the shard
+    # upsert and the product's cart counters upsert
+    with assert_num_queries(7):
+        response = client.post(
+            "/api/v1/cart",
+            json={"product_id": product_id, "quantity": 2},
+            headers=user_headers,
+        )
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_add_existing_item_to_cart_queries(
+    client, user_headers, product_id, cart_item_id, assert_num_queries
+):
+    with assert_num_queries(6):
+        response = client.post(
+            "/api/v1/cart",
+            json={"product_id": product_id, "quantity": 2},
+            headers=user_headers,
+        )
+    assert response.json()["data"]["quantity"] == 3
+
+
+def test_get_cart_queries(client, user_headers, cart_item_id, assert_num_queries):
+    with assert_num_queries(2):
+        response = client.get("/api/v1/cart", headers=user_headers)
+    assert response.json()["data"]["items_count"] == 1
+
+
+def test_update_cart_item_queries(
+    client, user_headers, cart_item_id, assert_num_queries
+):
+    with assert_num_queries(6):
+        client.put(
+            f"/api/v1/cart/{cart_item_id}", json={"quantity": 4}, headers=user_headers
+        )
+
+
+def test_remove_cart_item_queries(
+    client, user_headers, cart_item_id, assert_num_queries
+):
+    with assert_num_queries(6):
+        client.delete(f"/api/v1/cart/{cart_item_id}", headers=user_headers)
+
+
+def test_clear_cart_queries(client, user_headers, cart_item_id, assert_num_queries):
+    # the DELETE returns the removed items; the stats count the cart after it
+    with assert_num_queries(5):
+        client.delete("/api/v1/cart", headers=user_headers)
+
+
+def test_query_stats_headers(client, user_headers, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_STATS_HEADERS", True)
+    response = client.get("/api/v1/auth/user", headers=user_headers)
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+
+
+def test_query_budget_raise_mode_fails_request(client, user_headers, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "raise")
+    monkeypatch.setattr(settings, "QUERY_BUDGETS", {"GET /api/v1/cart": 1})
+    with pytest.raises(instrumentation.QueryBudgetExceeded, match="budget 1"):
+        client.get("/api/v1/cart", headers=user_headers)
+
+
+def test_raiseload_rejects_lazy_relationship_loads(client, product_id, db_session):
+    instrumentation.enable_raiseload()
+    try:
+        product = db_session.query(Product).filter_by(id=product_id).one()
+        with pytest.raises(Exception, match="lazy='raise'"):
+            product.cart_items
+    finally:
+        event.remove(Session, "do_orm_execute", instrumentation.raiseload_relationships)
+
+
+def test_repeated_lookups_hit_statement_cache(client, user_headers):
+    instrumentation.statement_cache_stats.reset()
+    for _ in range(3):
+        client.get("/api/v1/auth/user", headers=user_headers)
+    assert instrumentation.statement_cache_stats.hits >= 2
@@ -0,0 +1,286 @@
+"""Query plans of the repository queries
+
+Every case runs a real repository or service call against a seeded
+database, captures the statements it sends and compares their `EXPLAIN`
+output with the snapshot in `tests/query_plans/<dialect>/<case>.txt`. A case
+also fails when an expected index is not used, when a table is scanned in
+full that should not be, or when the cost of a statement grows more than
+`COST_TOLERANCE` above its snapshot. On SQLite the cost is the number of
+virtual machine steps the statement takes; on PostgreSQL it is the
+planner's total cost estimate.
+
+The tests use a SQLite file by default. Set QUERY_PLAN_DATABASE_URL to a
+scratch PostgreSQL database (its tables are dropped and recreated) to check
+the PostgreSQL plans. After an intended plan change, rerun with
+UPDATE_QUERY_PLANS=1 and commit the new snapshots.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.api.repositories.cart_item import CartItemRepository
+from app.api.repositories.product import ProductRepository
+from app.api.repositories.user import UserRepository
+from app.api.services.product import ProductService
+from app.core.base.model import BaseTableModel
+from scripts.seed_data import DatabaseWriter, parse_args, products, row_id, seed
+
+SNAPSHOT_DIR = Path(__file__).parent / "query_plans"
+COST_TOLERANCE = 0.25
+UPDATE = os.getenv("UPDATE_QUERY_PLANS") == "1"
+SEED = parse_args(["--products", "5000", "--users", "1000", "--seed", "43"])
+
+USER_ID = row_id(SEED.seed, "users", 10)
+PRODUCT_ID = row_id(SEED.seed, "products", 10)
+PRODUCT_NAME = list(products(SEED.seed, 11))[10][1]
+
+
+@dataclass
+class Case:
+    """
+    One repository query shape.
+    Attributes:
+        name (str): Snapshot file name.
+        call (Callable[[Session], object]): Runs the query.
+        indexes (list[tuple[str, tuple[str, ...]]]): (table, leading columns)
+            of indexes the plan must use.
+        full_scans (set[str]): Tables the plan may scan in full.
+    """
+
+    name: str
+    call: Callable[[Session], object]
+    indexes: list = field(default_factory=list)
+    full_scans: set = field(default_factory=set)
+
+
+CASES = [
+    Case(
+        "user_by_email",
+        lambda db: UserRepository(db).get_by_email("shopper10@example.com"),
+        indexes=[("users", ("email",))],
+    ),
+    Case("user_by_id", lambda db: UserRepository(db).get(USER_ID), indexes=[("users", ("id",))]),
+    Case(
+        "product_by_name",
+        lambda db: ProductRepository(db).get_by_name(PRODUCT_NAME),
+        indexes=[("products", ("name",))],
+    ),
+    Case("product_by_id", lambda db: ProductRepository(db).get(PRODUCT_ID), indexes=[("products", ("id",))]),
+    Case(
+        "cart_items_of_user",
+        lambda db: CartItemRepository(db).get_user_cart_items(USER_ID),
+        indexes=[("cart_items", ("user_id",)), ("products", ("id",))],
+    ),
+    Case(
+        "cart_item_of_user_by_product",
+        lambda db: CartItemRepository(db).get_product_from_user_cart(USER_ID, PRODUCT_ID),
+        indexes=[("cart_items", ("user_id", "product_id"))],
+    ),
+    Case(
+        "cart_item_of_user_by_id",
+        lambda db: CartItemRepository(db).get_user_cart_item(row_id(SEED.seed, "cart_items", 0), USER_ID),
+        indexes=[("cart_items", ("id",))],
+    ),
+    Case(
+        "delete_cart_of_user",
+        lambda db: CartItemRepository(db).delete_cart_items_by_user_id(USER_ID),
+        indexes=[("cart_items", ("user_id",))],
+    ),
+    # without an ORDER BY a page stops after `limit` rows, but the total
+    # count reads the whole catalog
+    Case("list_products", lambda db: ProductService(db).list_products(page=3), full_scans={"products"}),
+    # a substring match cannot use a b-tree index
+    Case(
+        "list_products_by_name",
+        lambda db: ProductService(db).list_products(name="lamp"),
+        full_scans={"products"},
+    ),
+    Case(
+        "list_products_in_stock",
+        lambda db: ProductService(db).list_products(in_stock=False),
+        full_scans={"products"},
+    ),
+    Case(
+        "list_products_by_price",
+        lambda db: ProductService(db).list_products(min_price=20, max_price=21),
+        indexes=[("products", ("price",))],
+    ),
+]
+
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    url = os.getenv("QUERY_PLAN_DATABASE_URL") or f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    engine = create_engine(url)
+    BaseTableModel.metadata.drop_all(bind=engine)
+    seed(DatabaseWriter(engine), SEED)
+    engine = create_engine(url)  # the writer disposed of the first one
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+def index_names(conn, table: str, columns: tuple[str, ...]) -> set[str]:
+    """Names of the indexes of `table` whose leading columns are `columns`,
+    including those backing primary keys and unique constraints."""
+    found: dict[str, list[str]] = {}
+    if conn.dialect.name == "sqlite":
+        for index in conn.exec_driver_sql(f"PRAGMA index_list({table})").mappings():
+            info = conn.exec_driver_sql(f"PRAGMA index_info({index['name']})").mappings()
+            found[index["name"]] = [row["name"] for row in info]
+    else:
+        inspector = inspect(conn)
+        pk = inspector.get_pk_constraint(table)
+        found[pk["name"]] = pk["constrained_columns"]
+        for constraint in inspector.get_unique_constraints(table):
+            found[constraint["name"]] = constraint["column_names"]
+        for index in inspector.get_indexes(table):
+            found[index["name"]] = index["column_names"]
+    return {name for name, names in found.items() if tuple(names[: len(columns)]) == columns}
+
+
+@dataclass
+class Plan:
+    sql: str
+    lines: list[str]
+    cost: float
+    indexes: set[str]
+    full_scans: set[str]
+
+
+def _sqlite_plan(conn, sql: str, parameters) -> Plan:
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters).all()
+    depth: dict[int, int] = {0: -1}
+    lines, indexes, full_scans = [], set(), set()
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+        indexes.update(re.findall(r"USING (?:COVERING |PRIMARY KEY |)INDEX (\w+)", detail))
+        scan = re.match(r"SCAN (?:TABLE )?(\w+)", detail)
+        if scan:
+            full_scans.add(scan.group(1))
+
+    # cost: virtual machine steps to run the statement
+    steps = 0
+
+    def _count() -> int:
+        nonlocal steps
+        steps += 1
+        return 0
+
+    raw = conn.connection.driver_connection
+    raw.set_progress_handler(_count, 1)
+    try:
+        result = conn.exec_driver_sql(sql, parameters)
+        if result.returns_rows:
+            result.all()
+    finally:
+        raw.set_progress_handler(None, 1)
+    return Plan(sql, lines, steps, indexes, full_scans)
+
+
+def _postgresql_plan(conn, sql: str, parameters) -> Plan:
+    document = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", parameters).scalar()
+    if isinstance(document, str):
+        document = json.loads(document)
+    lines, indexes, full_scans = [], set(), set()
+
+    def walk(node: dict, depth: int) -> None:
+        line = node["Node Type"]
+        if "Relation Name" in node:
+            line += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+            indexes.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan":
+            full_scans.add(node["Relation Name"])
+        lines.append("  " * depth + line)
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(document[0]["Plan"], 0)
+    return Plan(sql, lines, document[0]["Plan"]["Total Cost"], indexes, full_scans)
+
+
+def explain(conn, case: Case) -> list[Plan]:
+    """Run the case and record the statements it sends, then explain and
+    measure each one on its own; every step is rolled back."""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    transaction = conn.begin()
+    event.listen(conn, "before_cursor_execute", _record)
+    try:
+        with Session(bind=conn) as db:
+            case.call(db)
+            db.flush()
+    finally:
+        event.remove(conn, "before_cursor_execute", _record)
+        transaction.rollback()
+
+    plan = _sqlite_plan if conn.dialect.name == "sqlite" else _postgresql_plan
+    plans = []
+    for sql, parameters in statements:
+        transaction = conn.begin()
+        try:
+            plans.append(plan(conn, sql, parameters))
+        finally:
+            transaction.rollback()
+    return plans
+
+
+def render(plans: list[Plan]) -> str:
+    blocks = []
+    for number, plan in enumerate(plans, 1):
+        sql = " ".join(plan.sql.split())
+        blocks.append(f"-- statement {number}, cost {plan.cost:g}\n{sql}\n" + "\n".join(plan.lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+def _snapshot_costs(snapshot: str) -> list[float]:
+    return [float(cost) for cost in re.findall(r"^-- statement \d+, cost (\S+)$", snapshot, re.M)]
+
+
+def _without_costs(snapshot: str) -> str:
+    return re.sub(r"^(-- statement \d+), cost \S+$", r"\1", snapshot, flags=re.M)
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+def test_query_plan(plan_engine, case):
+    with plan_engine.connect() as conn:
+        plans = explain(conn, case)
+        expected_indexes = {columns: index_names(conn, table, columns) for table, columns in case.indexes}
+    assert plans, "the case sent no statements"
+
+    used = set().union(*(plan.indexes for plan in plans))
+    for (table, columns), names in zip(case.indexes, expected_indexes.values()):
+        assert names, f"{table} has no index on {columns}"
+        assert used & names, f"no index on {table}{columns} used; plans:\n{render(plans)}"
+    scanned = set().union(*(plan.full_scans for plan in plans))
+    assert scanned <= case.full_scans, f"unexpected full scans of {scanned - case.full_scans}:\n{render(plans)}"
+
+    path = SNAPSHOT_DIR / plan_engine.dialect.name / f"{case.name}.txt"
+    current = render(plans)
+    if UPDATE:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(current)
+        return
+    if not path.exists():
+        pytest.fail(f"no snapshot at {path}; record it with UPDATE_QUERY_PLANS=1")
+    snapshot = path.read_text()
+    assert _without_costs(current) == _without_costs(snapshot), "the plan changed; rerun with UPDATE_QUERY_PLANS=1"
+    for number, (plan, recorded) in enumerate(zip(plans, _snapshot_costs(snapshot)), 1):
+        assert plan.cost <= recorded * (1 + COST_TOLERANCE), (
+            f"statement {number} costs {plan.cost:g}, up from {recorded:g} in the snapshot"
+        )
@@ -0,0 +1,83 @@
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+
+from app.core.config import RateLimitPolicy
+from app.core.rate_limit.limiter import RateLimiter, parse_rate, rate_limiter
+from app.core.rate_limit.stores import BucketStore, MemoryBucketStore, SQLiteBucketStore
+
+
+def _register(client):
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": f"user_{uuid4().hex}@example.com", "password": "Testpass123!"},
+    )
+    data = response.json()
+    return data["data"]["id"], {"Authorization": f"Bearer {data['access_token']}"}
+
+
+def test_root_is_limited_per_ip(client):
+    responses = [client.get("/") for _ in range(6)]
+
+    assert [r.status_code for r in responses[:5]] == [status.HTTP_200_OK] * 5
+    limited = responses[5]
+    assert limited.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(limited.headers["retry-after"]) > 0
+    assert limited.json()["message"].startswith("Too many requests")
+
+
+def test_cart_writes_are_limited_per_user(client):
+    user_id, headers = _register(client)
+    _, other_headers = _register(client)
+    capacity = rate_limiter._buckets["cart_write"][0]
+    for _ in range(capacity):
+        rate_limiter.check("cart_write", f"user:{user_id}")
+
+    limited = client.delete("/api/v1/cart", headers=headers)
+    other = client.delete("/api/v1/cart", headers=other_headers)
+
+    assert limited.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert other.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60)
+    assert parse_rate("100/hours") == (100, 3600)
+    with pytest.raises(ValueError):
+        parse_rate("ten per minute")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBucketStore()
+    return SQLiteBucketStore(str(tmp_path / "buckets.db"))
+
+
+def test_bucket_allows_burst_then_refills(store):
+    taken = [store.take("key", capacity=2, rate=20).allowed for _ in range(3)]
+    time.sleep(0.06)
+
+    assert taken == [True, True, False]
+    assert store.take("key", capacity=2, rate=20).allowed
+    assert store.take("other", capacity=2, rate=20).allowed
+
+
+def test_sqlite_buckets_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    worker_a, worker_b = SQLiteBucketStore(path), SQLiteBucketStore(path)
+
+    assert worker_a.take("key", capacity=1, rate=0.01).allowed
+    assert not worker_b.take("key", capacity=1, rate=0.01).allowed
+
+
+def test_unreachable_store_allows_requests():
+    class BrokenStore(BucketStore):
+        def take(self, key, capacity, rate, cost=1):
+            raise ConnectionError("store is down")
+
+    limiter = RateLimiter(BrokenStore(), {"login": RateLimitPolicy(rate="1/minute")})
+
+    assert limiter.check("login", "ip:127.0.0.1").allowed
@@ -0,0 +1,111 @@
+import math
+import shutil
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.models.product import Product
+from app.api.models.user import User
+from app.api.repositories.product import ProductRepository
+from app.core.base.model import BaseTableModel
+from app.db.database import get_db, unit_of_work
+from app.db.routing import ReplicaPool, RoutingSession
+from app.main import app as fastapi_app
+
+
+@pytest.fixture
+def routed_sessionmaker(tmp_path):
+    """Primary and replica backed by two SQLite files holding different rows."""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    lags = {replica: 0.0}
+
+    for engine, name in ((primary, "on-primary"), (replica, "on-replica")):
+        BaseTableModel.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as session:
+            session.add(Product(name=name, price=Decimal("1.00"), stock=1))
+            session.commit()
+
+    pool = ReplicaPool(
+        [replica], max_lag=1.0, check_interval=0, lag_probe=lambda e: lags[e]
+    )
+    factory = sessionmaker(class_=RoutingSession, bind=primary, replicas=pool)
+    yield factory, lags, replica
+
+    primary.dispose()
+    replica.dispose()
+
+
+def _names(session):
+    return [product.name for product in ProductRepository(session).get_all()]
+
+
+def test_reads_stay_on_primary_without_opt_in(routed_sessionmaker):
+    factory, _, _ = routed_sessionmaker
+    with factory() as session:
+        assert _names(session) == ["on-primary"]
+
+
+def test_read_only_methods_use_replica_when_enabled(routed_sessionmaker):
+    factory, _, _ = routed_sessionmaker
+    with factory() as session:
+        session.info["use_replicas"] = True
+        assert _names(session) == ["on-replica"]
+        # ad-hoc queries outside read_only repository methods stay on the primary
+        assert session.query(Product.name).scalar() == "on-primary"
+
+
+def test_session_is_pinned_to_primary_after_a_write(routed_sessionmaker):
+    factory, _, _ = routed_sessionmaker
+    with factory() as session:
+        session.info["use_replicas"] = True
+        session.add(Product(name="new", price=Decimal("2.00"), stock=0))
+        session.flush()
+        assert sorted(_names(session)) == ["new", "on-primary"]
+
+
+def test_lagging_replica_falls_back_to_primary(routed_sessionmaker):
+    factory, lags, replica = routed_sessionmaker
+    lags[replica] = math.inf
+    with factory() as session:
+        session.info["use_replicas"] = True
+        assert _names(session) == ["on-primary"]
+
+
+def _override_get_db(factory):
+    def _get_db():
+        with factory() as db, unit_of_work(db):
+            yield db
+
+    fastapi_app.dependency_overrides[get_db] = _get_db
+
+
+def test_cart_is_read_from_primary_after_a_write(client, register, tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", connect_args={"check_same_thread": False})
+    BaseTableModel.metadata.create_all(bind=primary)
+    _override_get_db(sessionmaker(bind=primary, expire_on_commit=False))
+    email, headers = register()
+    with sessionmaker(bind=primary)() as session:
+        product = Product(name="Lamp", price=Decimal("3.00"), stock=5)
+        session.add(product)
+        session.commit()
+        product_id = str(product.id)
+
+    # the replica is a snapshot taken before the cart write, within the allowed lag
+    shutil.copy(tmp_path / "primary.db", tmp_path / "replica.db")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    pool = ReplicaPool([replica], max_lag=5.0, check_interval=0, lag_probe=lambda e: 1.0)
+    _override_get_db(sessionmaker(class_=RoutingSession, bind=primary, replicas=pool, expire_on_commit=False))
+    try:
+        added = client.post("/api/v1/cart", json={"product_id": product_id, "quantity": 2}, headers=headers)
+        assert added.status_code == 201
+
+        cart = client.get("/api/v1/cart", headers=headers).json()["data"]
+        assert [(item["product_id"], item["quantity"]) for item in cart["items"]] == [(product_id, 2)]
+        with sessionmaker(bind=replica)() as session:
+            assert session.query(User).filter_by(email=email).count() == 1
+    finally:
+        primary.dispose()
+        replica.dispose()
@@ -0,0 +1,266 @@
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from fastapi import Request, status
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.services.product import ProductService
+from app.core.cache.backends import MemoryBackend, SQLiteBackend
+from app.core.cache.response import ResponseCache, response_cache
+from app.core.cache.singleflight import SingleFlight
+
+
+@pytest.fixture
+def product_id(client, admin_headers):
+    response = client.post(
+        "/api/v1/products",
+        json={"name": f"Product {uuid4().hex}", "price": 12.5, "stock": 10},
+        headers=admin_headers,
+    )
+    return response.json()["data"]["id"]
+
+
+def test_repeated_list_is_served_from_cache(client, db_session, user_headers, product_id):
+    first = client.get("/api/v1/products?page=1&limit=10", headers=user_headers)
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # parameter order does not matter; only the current user may be looked up
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        second = client.get("/api/v1/products?limit=10&page=1", headers=user_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert not any("products" in statement for statement in statements)
+
+
+def test_entries_are_keyed_by_role(client, user_headers, admin_headers, product_id):
+    client.get(f"/api/v1/products/{product_id}", headers=user_headers)
+
+    as_admin = client.get(f"/api/v1/products/{product_id}", headers=admin_headers)
+
+    assert as_admin.headers["x-cache"] == "MISS"
+
+
+def test_product_update_invalidates_list_and_detail(
+    client, user_headers, admin_headers, product_id
+):
+    client.get("/api/v1/products", headers=user_headers)
+    client.get(f"/api/v1/products/{product_id}", headers=user_headers)
+
+    update = client.put(
+        f"/api/v1/products/{product_id}", json={"stock": 3}, headers=admin_headers
+    )
+    assert update.status_code == status.HTTP_200_OK
+
+    listing = client.get("/api/v1/products", headers=user_headers)
+    detail = client.get(f"/api/v1/products/{product_id}", headers=user_headers)
+
+    assert listing.headers["x-cache"] == "MISS"
+    assert detail.headers["x-cache"] == "MISS"
+    assert detail.json()["data"]["stock"] == 3
+
+
+def test_hits_serve_the_stored_compressed_variant(client, user_headers, admin_headers):
+    for i in range(10):
+        client.post(
+            "/api/v1/products",
+            json={"name": f"Product {uuid4().hex}", "price": 12.5 + i, "stock": 10},
+            headers=admin_headers,
+        )
+    headers = {**user_headers, "Accept-Encoding": "gzip"}
+
+    client.get("/api/v1/products", headers=headers)
+    hit = client.get("/api/v1/products", headers=headers)
+
+    assert hit.headers["x-cache"] == "HIT"
+    assert hit.headers["content-encoding"] == "gzip"
+    assert len(hit.json()["data"]["items"]) == 10
+
+
+def test_invalidation_waits_for_commit(db_session):
+    response_cache.backend.set("key", b"body", 60, ["products"])
+    session = Session(bind=db_session.get_bind())
+
+    response_cache.invalidate_after_commit(session, ["products"])
+    session.rollback()
+    assert response_cache.backend.get("key") == b"body"
+
+    response_cache.invalidate_after_commit(session, ["products"])
+    session.commit()
+    assert response_cache.backend.get("key") is None
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=10)
+    return SQLiteBackend(str(tmp_path / "cache.db"), max_entries=10)
+
+
+def test_backend_tags_and_expiry(backend):
+    backend.set("list", b"1", 60, ["products"])
+    backend.set("detail", b"2", 60, ["product:1"])
+    backend.set("short", b"3", 0.01, ["products"])
+    time.sleep(0.02)
+
+    assert backend.get("short") is None
+    assert backend.invalidate(["product:1"]) == 1
+    assert backend.get("detail") is None
+    assert backend.get("list") == b"1"
+
+
+def test_backend_skips_values_computed_before_an_invalidation(backend):
+    versions = backend.tag_versions(["products", "product:1"])
+    assert versions == [0, 0]
+    # a write commits while the value is being computed
+    backend.invalidate(["product:1"])
+
+    assert not backend.set("detail", b"stale", 60, ["products", "product:1"], versions)
+    assert backend.get("detail") is None
+    assert backend.set("detail", b"fresh", 60, ["products", "product:1"], backend.tag_versions(["products", "product:1"]))
+    assert backend.get("detail") == b"fresh"
+
+
+def test_write_during_computation_is_not_cached(client, user_headers, admin_headers, product_id, monkeypatch):
+    retrieve = ProductService.retrieve_product
+
+    def retrieve_then_write(self, product_id):
+        product = retrieve(self, product_id)
+        # another request commits an update before this body is stored
+        response_cache.invalidate([f"product:{product_id}"])
+        return product
+
+    monkeypatch.setattr(ProductService, "retrieve_product", retrieve_then_write)
+    client.get(f"/api/v1/products/{product_id}", headers=user_headers)
+    monkeypatch.setattr(ProductService, "retrieve_product", retrieve)
+
+    assert client.get(f"/api/v1/products/{product_id}", headers=user_headers).headers["x-cache"] == "MISS"
+    assert response_cache.stale_skips == 1
+
+
+def test_non_canonical_product_paths_are_invalidated(client, user_headers, admin_headers, product_id):
+    path = f"/api/v1/products/{product_id.upper().replace('-', '')}"
+    client.get(path, headers=user_headers)
+    assert client.get(path, headers=user_headers).headers["x-cache"] == "HIT"
+
+    client.put(f"/api/v1/products/{product_id}", json={"stock": 3}, headers=admin_headers)
+
+    detail = client.get(path, headers=user_headers)
+    assert detail.headers["x-cache"] == "MISS"
+    assert detail.json()["data"]["stock"] == 3
+
+
+def test_backend_locks(backend):
+    assert backend.acquire_lock("entry", "a", 60)
+    assert not backend.acquire_lock("entry", "b", 60)
+    backend.release_lock("entry", "b")
+    assert not backend.acquire_lock("entry", "b", 60)
+    backend.release_lock("entry", "a")
+    assert backend.acquire_lock("entry", "b", 0.01)
+    time.sleep(0.02)
+    # an expired lock is free again, e.g. after its holder crashed
+    assert backend.acquire_lock("entry", "c", 60)
+
+
+def test_single_flight_shares_one_call():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("key", load))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        time.sleep(0.001)
+    time.sleep(0.05)  # let the other callers join the flight
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("value", False)] + [("value", True)] * 4
+    assert not flights.in_flight("key")
+
+
+def _request(path="/items"):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+class Item(BaseModel):
+    name: str
+
+
+def test_concurrent_misses_call_the_endpoint_once():
+    cache = ResponseCache(MemoryBackend(), ttl=60)
+    calls = []
+
+    @cache.cached()
+    def endpoint():
+        calls.append(1)
+        time.sleep(0.1)
+        return Item(name="lamp")
+
+    responses = []
+    threads = [
+        threading.Thread(target=lambda: responses.append(endpoint(_cache_request=_request())))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(response.headers["x-cache"] for response in responses) == ["COALESCED"] * 4 + ["MISS"]
+    assert {response.body for response in responses} == {b'{"name":"lamp"}'}
+
+
+def test_other_workers_wait_for_the_entry(tmp_path):
+    # two workers sharing one SQLite cache file
+    first = ResponseCache(SQLiteBackend(str(tmp_path / "cache.db")), ttl=60)
+    second = ResponseCache(SQLiteBackend(str(tmp_path / "cache.db")), ttl=60, lock_timeout=2)
+    key = second.build_key("/items", {}, "anonymous")
+    calls = []
+
+    @second.cached()
+    def endpoint():
+        calls.append(1)
+        return Item(name="from the second worker")
+
+    assert first.acquire_lock(key, "first")
+    threading.Timer(0.1, first.set, args=(key, b'{"name":"from the first worker"}', None, ())).start()
+    response = endpoint(_cache_request=_request())
+
+    assert calls == []
+    assert response.body == b'{"name":"from the first worker"}'
+
+
+def test_entries_are_refreshed_early_near_expiry():
+    cache = ResponseCache(MemoryBackend(), ttl=60)
+    cache.set("fresh", b"1", None, ())
+    # computing this entry took longer than its remaining lifetime
+    cache.set("slow", b"2", None, (), compute_time=10_000)
+
+    assert not cache.get("fresh", None).refresh
+    assert cache.get("slow", None).refresh
+    cache.early_refresh = 0
+    assert not cache.get("slow", None).refresh
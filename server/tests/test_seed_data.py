@@ -0,0 +1,46 @@
+import random
+from collections import Counter
+
+from sqlalchemy import create_engine, func, select
+
+from app.api.models.cart_item import CartItem
+from app.api.models.product import Product
+from app.api.models.user import User
+from scripts.seed_data import DatabaseWriter, Zipf, cart_items, parse_args, products, row_id, seed
+
+
+def test_same_seed_gives_the_same_rows():
+    assert list(products(7, 50)) == list(products(7, 50))
+    assert list(products(7, 50)) != list(products(8, 50))
+    ids = [row_id(7, "products", index) for index in range(1000)]
+    # uuid7 ids in insertion order, like the app's own keys
+    assert ids == sorted(ids) and len(set(ids)) == 1000
+    assert all(value[14] == "7" for value in ids)
+
+
+def test_cart_items_follow_a_zipf_distribution():
+    zipf = Zipf(10_000, 1.1)
+    rng = random.Random(3)
+    picks = Counter(zipf.product(rng) for _ in range(20_000))
+    top = sum(count for _, count in picks.most_common(100))
+    # the most popular 1% of the catalog gets a large share of the picks
+    assert top > 20_000 * 0.4
+
+    items = list(cart_items(3, 2_000, zipf, cart_share=0.5, mean_items=3))
+    per_user = Counter(user_id for _, user_id, _, _ in items)
+    assert 0.4 * 2_000 < len(per_user) < 0.6 * 2_000
+    assert 2 < len(items) / len(per_user) < 4
+    assert len({(user_id, product_id) for _, user_id, product_id, _ in items}) == len(items)
+
+
+def test_seed_writes_loadable_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    args = parse_args(["--products", "300", "--users", "40", "--cart-share", "1", "--batch-size", "64"])
+    counts = seed(DatabaseWriter(engine), args)
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Product)) == counts["products"] == 300
+        assert conn.scalar(select(func.count()).select_from(User)) == 40
+        assert conn.scalar(select(func.count()).select_from(CartItem)) == counts["cart_items"]
+        first = conn.execute(select(Product.id, Product.name)).first()
+    assert first == (row_id(args.seed, "products", 0), next(products(args.seed, 1))[1])
@@ -0,0 +1,76 @@
+import json
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.models.product import Product
+from app.api.models.user import User
+from app.api.repositories.product import ProductRepository
+from app.core.base.model import BaseTableModel
+from app.core.config import settings
+from app.db.slow_query import SlowQueryLog, normalize_sql, slow_query_log
+from app.utils.logger import log_pipeline
+
+
+@pytest.fixture
+def slow_log_file(tmp_path, monkeypatch):
+    log_file = tmp_path / "slow.log"
+    monkeypatch.setattr(settings, "SLOW_QUERY_LOG_FILE", str(log_file))
+    monkeypatch.setattr(slow_query_log, "_file_logger", None)
+    slow_query_log.clear()
+    yield log_file
+    slow_query_log.clear()
+
+
+def test_normalize_sql_collapses_literals_and_placeholder_lists():
+    statement = "SELECT *\n  FROM products WHERE name = 'abc' AND id IN (?, ?, ?) LIMIT 10"
+    assert normalize_sql(statement) == (
+        "SELECT * FROM products WHERE name = ? AND id IN (?, ...) LIMIT ?"
+    )
+
+
+def test_slow_queries_are_logged_and_listed(client, db_session, slow_log_file, monkeypatch):
+    email = f"admin_{uuid4().hex}@example.com"
+    token = client.post(
+        "/api/v1/auth/register", json={"email": email, "password": "Adminpass123!"}
+    ).json()["access_token"]
+    db_session.query(User).filter_by(email=email).update({"role": "admin"})
+    db_session.commit()
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 1e-6)
+    response = client.get(
+        "/api/v1/admin/slow-queries?limit=50",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    shapes = response.json()["data"]
+    assert any("FROM users" in shape["sql"] for shape in shapes)
+
+    log_pipeline.flush()
+    entries = [json.loads(line) for line in slow_log_file.read_text().splitlines()]
+    assert entries and {"sql", "params_shape", "origin", "duration_ms"} <= entries[0].keys()
+
+
+def test_slow_query_origin_and_plan_are_captured(tmp_path, slow_log_file, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    BaseTableModel.metadata.create_all(bind=engine)
+    log = SlowQueryLog(max_shapes=10)
+    monkeypatch.setattr("app.db.slow_query.slow_query_log", log)
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 1e-6)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+
+    with sessionmaker(bind=engine)() as session:
+        session.add(Product(name="widget", price=Decimal("1.00"), stock=1))
+        session.commit()
+        ProductRepository(session).get_by_name("widget")
+
+    log.wait_for_explains()
+    shape = next(shape for shape in log.top(10) if "WHERE products.name" in shape.sql)
+    assert shape.origin == "ProductRepository.get_by_name"
+    assert "products" in shape.plan
+    engine.dispose()
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+from app.api.models.cart_item import CartItem
+from app.api.models.catalog_stats import CatalogStatsShard
+from app.api.models.product import Product
+from app.api.models.user import User
+from app.api.repositories.cart_item import CartItemRepository
+from app.api.repositories.catalog_stats import CatalogStatsRepository
+from app.api.services.catalog_stats import CatalogStatsService
+from app.core import stats
+from scripts import recompute_stats
+
+
+def _product(client, headers, price, stock):
+    response = client.post(
+        "/api/v1/products",
+        json={"name": f"Product {uuid4().hex}", "price": price, "stock": stock},
+        headers=headers,
+    )
+    return response.json()["data"]["id"]
+
+
+def _stats(client, headers, **params):
+    response = client.get("/api/v1/admin/stats", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_writes_keep_the_dashboard_up_to_date(client, db_session, register, admin_headers):
+    lamp = _product(client, admin_headers, 10, 5)
+    mug = _product(client, admin_headers, 2.5, 0)
+    rug = _product(client, admin_headers, 40, 1)
+    alice, bob = register()[1], register()[1]
+
+    client.post("/api/v1/cart", json={"product_id": lamp, "quantity": 2}, headers=alice)
+    client.post("/api/v1/cart", json={"product_id": lamp, "quantity": 1}, headers=alice)
+    client.post("/api/v1/cart", json={"product_id": lamp, "quantity": 1}, headers=bob)
+    rug_item = client.post("/api/v1/cart", json={"product_id": rug, "quantity": 1}, headers=bob).json()["data"]
+    client.put(f"/api/v1/products/{mug}", json={"stock": 4}, headers=admin_headers)
+
+    data = _stats(client, admin_headers)
+    assert {key: value for key, value in data.items() if key != "most_carted"} == {
+        "products": 3,
+        "out_of_stock": 0,
+        "stock_units": 10,
+        "inventory_value": 100.0,
+        "cart_items": 3,
+        "cart_units": 5,
+        "active_carts": 2,
+    }
+    assert [(item["id"], item["carts"], item["units"]) for item in data["most_carted"]] == [
+        (lamp, 2, 4),
+        (rug, 1, 1),
+    ]
+
+    client.delete(f"/api/v1/cart/{rug_item['id']}", headers=bob)
+    client.delete("/api/v1/cart", headers=alice)
+    client.post(
+        "/api/v1/products/bulk",
+        json={"operations": [{"id": lamp, "delete": True}, {"id": mug, "price": 3}]},
+        headers=admin_headers,
+    )
+    data = _stats(client, admin_headers)
+    assert (data["products"], data["stock_units"], data["inventory_value"]) == (2, 5, 52.0)
+    assert (data["cart_items"], data["cart_units"], data["active_carts"]) == (0, 0, 0)
+    assert data["most_carted"] == []
+    assert CatalogStatsService(db_session).find_drift() == ({}, {})
+
+
+def test_rolled_back_changes_are_not_counted(db_session):
+    product = Product(name="Discarded lamp", price=10, stock=3)
+    db_session.add(product)
+    db_session.flush()
+    stats.product_changed(db_session, product.id, None, (3, 10))
+    db_session.rollback()
+    db_session.commit()
+    assert db_session.query(CatalogStatsShard).count() == 0
+
+
+def test_removing_items_then_clearing_the_cart_counts_it_once(db_session):
+    user = User(email=f"user_{uuid4().hex}@example.com", password="x")
+    lamp, mug = Product(name="Lamp", price=10, stock=5), Product(name="Mug", price=2, stock=5)
+    db_session.add_all([user, lamp, mug])
+    db_session.flush()
+    items = [CartItem(user_id=user.id, product_id=product.id, quantity=1) for product in (lamp, mug)]
+    db_session.add_all(items)
+    db_session.flush()
+    for item in items:
+        stats.cart_item_changed(db_session, user.id, item.product_id, 0, 1)
+    db_session.commit()
+
+    # one item removed on its own, the rest by clearing, in one transaction
+    db_session.delete(items[0])
+    db_session.flush()
+    stats.cart_item_changed(db_session, user.id, lamp.id, 1, 0)
+    removed = CartItemRepository(db_session).delete_cart_items_by_user_id(user.id)
+    stats.cart_cleared(db_session, user.id, removed)
+    db_session.commit()
+
+    totals = CatalogStatsRepository(db_session).totals()
+    assert (totals["cart_items"], totals["active_carts"]) == (0, 0)
+
+def test_reading_the_dashboard_does_not_scan_the_catalog(client, admin_headers, assert_num_queries):
+    for stock in range(20):
+        _product(client, admin_headers, 1, stock)
+    # admin lookup, the sum of the shards and the top products
+    with assert_num_queries(3):
+        data = _stats(client, admin_headers, top=5)
+    assert data["products"] == 20 and data["out_of_stock"] == 1
+
+
+def test_recompute_reports_and_fixes_drift(client, db_session, admin_headers, monkeypatch, capsys):
+    _product(client, admin_headers, 4, 2)
+    # written around the services, like the seeding script does
+    db_session.add(Product(name="Seeded lamp", price=5, stock=0))
+    db_session.commit()
+
+    @contextmanager
+    def _session_scope():
+        yield db_session
+
+    monkeypatch.setattr(recompute_stats, "session_scope", _session_scope)
+    assert recompute_stats.main([]) == 1
+    assert "products: maintained 1, actual 2" in capsys.readouterr().out
+
+    assert recompute_stats.main(["--fix"]) == 0
+    db_session.commit()
+    assert recompute_stats.main([]) == 0
+    assert _stats(client, admin_headers)["out_of_stock"] == 1
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import threading
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.core.stream.brokers import MemoryBroker, SQLiteBroker
+from app.core.stream.hub import RESYNC, StreamHub, Subscriber, stream_hub
+
+
+@pytest.fixture
+def user_token(user_headers):
+    return user_headers["Authorization"].removeprefix("Bearer ")
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(stream_hub, "publish", events.extend)
+    return events
+
+
+def _event(product_id, stock):
+    return {"type": "product", "id": product_id, "stock": stock, "price": 1.0, "deleted": False}
+
+
+def test_rapid_updates_of_a_product_are_coalesced():
+    async def scenario():
+        subscriber = Subscriber(None, max_pending=2)
+        for stock in (5, 4, 3):
+            subscriber.push(_event("a", stock))
+        subscriber.push(_event("b", 1))
+        first = await subscriber.get(timeout=1, window=0)
+        # a third product does not fit in the queue: the client must resync
+        for product_id in "cde":
+            subscriber.push(_event(product_id, 1))
+        second = await subscriber.get(timeout=1, window=0)
+        idle = await subscriber.get(timeout=0.01, window=0)
+        return first, second, idle
+
+    first, second, idle = asyncio.run(scenario())
+    assert [(event["id"], event["stock"]) for event in first] == [("a", 3), ("b", 1)]
+    assert second == [RESYNC]
+    assert idle == []
+
+
+def test_subscribers_only_get_the_products_they_watch():
+    hub = StreamHub(MemoryBroker(), max_subscribers=10, max_pending=10)
+
+    async def scenario():
+        watching = hub.subscribe(["a"])
+        everything = hub.subscribe()
+        # published from a threadpool thread, as sync endpoints do
+        thread = threading.Thread(target=hub.publish, args=([_event("a", 1), _event("b", 2)],))
+        thread.start()
+        thread.join()
+        return await watching.get(1, 0), await everything.get(1, 0)
+
+    watching, everything = asyncio.run(scenario())
+    assert [event["id"] for event in watching] == ["a"]
+    assert [event["id"] for event in everything] == ["a", "b"]
+
+
+def test_events_are_published_only_after_commit(client, admin_headers, published):
+    response = client.post(
+        "/api/v1/products",
+        json={"name": f"Product {uuid4().hex}", "price": 12.5, "stock": 10},
+        headers=admin_headers,
+    )
+    product_id = response.json()["data"]["id"]
+
+    client.put(f"/api/v1/products/{product_id}", json={"description": "same stock"}, headers=admin_headers)
+    assert published == []
+
+    client.put(f"/api/v1/products/{product_id}", json={"stock": 3}, headers=admin_headers)
+    assert published == [{"type": "product", "id": product_id, "stock": 3, "price": 12.5, "deleted": False}]
+
+    client.delete(f"/api/v1/products/{product_id}", headers=admin_headers)
+    assert published[-1]["deleted"] is True
+
+
+def test_stream_endpoint_sends_watched_product_events(client, user_token, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_MAX_CONNECTION_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "STREAM_COALESCE_WINDOW", 0)
+
+    timer = threading.Timer(0.2, stream_hub.publish, args=([_event("a", 7), _event("b", 1)],))
+    timer.start()
+    # EventSource cannot send headers, so the token may come in the query string
+    response = client.get(f"/api/v1/products/stream?ids=a&access_token={user_token}")
+    timer.join()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("retry: 3000\nevent: ready\n")
+    assert 'event: product\ndata: {"type":"product","id":"a","stock":7' in response.text
+    assert '"id":"b"' not in response.text
+    assert not stream_hub.subscribers
+
+
+
+def test_clients_are_subscribed_only_while_their_body_is_read():
+    hub = StreamHub(MemoryBroker(), max_subscribers=1, max_pending=10)
+
+    async def scenario():
+        # the response was never started: the client left before the first chunk
+        hub.events(["a"])
+        never_started = len(hub.subscribers)
+
+        body = hub.events(["a"])
+        await body.__anext__()
+        streaming = len(hub.subscribers)
+        # a second client while the hub is full gets an empty body
+        assert [chunk async for chunk in hub.events()] == []
+        await body.aclose()
+        return never_started, streaming, len(hub.subscribers)
+
+    assert asyncio.run(scenario()) == (0, 1, 0)
+
+
+def test_stream_endpoint_refuses_clients_when_full(client, user_token, monkeypatch):
+    monkeypatch.setattr(stream_hub, "max_subscribers", 0)
+    response = client.get(f"/api/v1/products/stream?access_token={user_token}")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+def test_stream_requires_a_token(client):
+    assert client.get("/api/v1/products/stream").status_code == 401
+
+
+def test_sqlite_broker_relays_other_workers_events(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "stream.db"))
+    position, events = broker.read(None)
+    assert events == []
+
+    broker.publish([_event("own", 1)])
+    conn = broker._connection()
+    conn.execute(
+        "INSERT INTO stream_events (origin, payload, created_at) VALUES (?, ?, 0)",
+        (os.getpid() + 1, '{"type": "product", "id": "other"}'),
+    )
+    position, events = broker.read(position)
+    assert [event["id"] for event in events] == ["other"]
+    assert broker.read(position) == (position, [])
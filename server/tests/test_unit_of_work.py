@@ -0,0 +1,63 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.models.product import Product
+from app.api.repositories.product import ProductRepository
+from app.db import database
+from app.db.database import get_db, unit_of_work
+
+
+def _product(name):
+    return Product(name=name, price=Decimal("5.00"), stock=1)
+
+
+def test_repository_writes_are_not_committed_by_themselves(db_session):
+    ProductRepository(db_session).create(_product("flushed only"))
+    db_session.rollback()
+    assert ProductRepository(db_session).get_by_name("flushed only") is None
+
+
+def test_unit_of_work_commits_once_and_rolls_back_on_error(db_session):
+    repository = ProductRepository(db_session)
+    with unit_of_work(db_session):
+        product = repository.create(_product("kept"))
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db_session):
+            repository.create(_product("discarded"))
+            repository.delete(product.id)
+            raise RuntimeError("second step failed")
+
+    assert repository.get_by_name("kept") is not None
+    assert repository.get_by_name("discarded") is None
+
+
+def test_created_objects_keep_server_defaults_after_commit(db_session):
+    with unit_of_work(db_session):
+        product = ProductRepository(db_session).create(_product("timestamps"))
+    # expire_on_commit=False plus eager defaults: no reload needed
+    assert "created_at" in product.__dict__
+    assert product.created_at is not None
+
+
+def test_autocommit_sessions_commit_each_write(db_session):
+    job_session = Session(bind=db_session.get_bind(), info={"autocommit": True})
+    try:
+        ProductRepository(job_session).create(_product("job write"))
+        job_session.rollback()
+        assert ProductRepository(job_session).get_by_name("job write") is not None
+    finally:
+        job_session.close()
+
+
+def test_get_db_gives_each_request_its_own_session(db_session, monkeypatch):
+    # FastAPI may run the dependency of two concurrent requests on the same
+    # threadpool thread; a thread-local session would be shared between them
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    first, second = get_db(), get_db()
+
+    assert next(first) is not next(second)
+    first.close()
+    second.close()